@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+ACC Analytics - Calcoli vettoriali sui dati ACC
+Funzioni pure (numpy/pandas) condivise da dashboard e tool a riga di comando.
+Il modulo non importa Streamlit, così può girare anche in processi worker.
+"""
+
+import bisect
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# ==================== DIMENSIONI ====================
+
+class DimensionIndex:
+    """Tabelle piccole (piloti, auto, competizioni, campionati, leghe) caricate in memoria.
+
+    Ogni colonna è un dizionario chiave -> valore: le query sulle tabelle grandi
+    restituiscono solo id e numeri, e nomi e flag si aggiungono con un lookup per
+    chiave invece che con una JOIN per riga in SQLite. I filtri sui piloti (trust level)
+    diventano una lista di id passata come parametri della query.
+    Va ricostruito quando cambia la versione dati (lo fa la cache del dashboard).
+    """
+
+    TABLES = {
+        'drivers': ('driver_id', 'SELECT driver_id, last_name, short_name, trust_level FROM drivers'),
+        'car_models': ('car_model', 'SELECT car_model, car_name FROM car_models'),
+        'competitions': ('competition_id', 'SELECT competition_id, championship_id, name, track_name FROM competitions'),
+        'championships': ('championship_id', 'SELECT championship_id, league_id, name, championship_type FROM championships'),
+        'leagues': ('league_id', 'SELECT league_id, name FROM leagues'),
+    }
+    # Quota di piloti oltre la quale un filtro per id non conviene come ricerca su indice
+    SELECTIVE_DRIVER_SHARE = 0.1
+
+    def __init__(self, conn):
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.tables: Dict[str, Dict[str, dict]] = {}
+        for table, (key, query) in self.TABLES.items():
+            if table not in existing:
+                continue
+            cursor = conn.execute(query)
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+            self.tables[table] = {
+                column: {row[0]: row[position] for row in rows}
+                for position, column in enumerate(columns) if column != key
+            }
+
+    def lookup(self, table: str, keys: pd.Series, column: str) -> pd.Series:
+        """Valore della colonna per ogni chiave (None se la chiave non esiste, come una LEFT JOIN)"""
+        values = self.tables.get(table, {}).get(column, {})
+        return pd.Series([values.get(key) for key in keys.tolist()], index=keys.index)
+
+    def attach(self, df: pd.DataFrame, key: str, table: str, columns: Dict[str, str]) -> pd.DataFrame:
+        """Copia di df con le colonne della tabella indicate come {nuova_colonna: colonna_tabella}"""
+        return df.assign(**{name: self.lookup(table, df[key], column) for name, column in columns.items()})
+
+    def driver_ids(self, min_trust: int) -> List[str]:
+        """Id dei piloti con trust level almeno min_trust"""
+        trust = self.tables.get('drivers', {}).get('trust_level', {})
+        return [driver_id for driver_id, level in trust.items() if level is not None and level >= min_trust]
+
+    def driver_filter(self, column: str, min_trust: int) -> Tuple[str, str, List]:
+        """Filtro sui piloti con trust level almeno min_trust: (join, condizione, parametri della condizione).
+        Una lista corta di id ("column IN (...)", join vuota) guida l'indice (session_id, driver_id);
+        oltre SELECTIVE_DRIVER_SHARE dei piloti la lista legata costa più della JOIN su drivers,
+        che resta quindi la forma usata (valida anche su DuckDB)"""
+        driver_ids = self.driver_ids(min_trust)
+        total = len(self.tables.get('drivers', {}).get('trust_level', {}))
+        if total and len(driver_ids) > total * self.SELECTIVE_DRIVER_SHARE:
+            return f"JOIN drivers trust_d ON {column} = trust_d.driver_id", "trust_d.trust_level >= ?", [min_trust]
+        return '', f"{column} IN ({', '.join('?' * len(driver_ids))})", driver_ids
+
+
+# ==================== RACE TRACE ====================
+
+def build_race_trace(laps_df: pd.DataFrame) -> pd.DataFrame:
+    """Ricostruisce tempo cumulativo, posizione e distacco dal leader giro per giro.
+
+    laps_df deve contenere driver_id, driver, lap_number, lap_time e,
+    opzionalmente, total_time (tempo totale ufficiale da session_results).
+    lap_number in ACC è il contatore globale della sessione: l'ordine per pilota
+    si ottiene ordinando per lap_number e numerando i giri con cumcount.
+    """
+    columns = ['driver_id', 'driver', 'lap', 'lap_time', 'race_time', 'position', 'gap_to_leader']
+    if laps_df.empty:
+        return pd.DataFrame(columns=columns)
+
+    df = laps_df.sort_values(['driver_id', 'lap_number'], kind='stable').reset_index(drop=True)
+    grouped = df.groupby('driver_id', sort=False)
+    df['lap'] = grouped.cumcount() + 1
+    race_time = grouped['lap_time'].cumsum()
+
+    # Il primo giro ACC include il tempo pre-partenza: se disponibile il tempo
+    # totale ufficiale, riallinea il cumulativo in modo che l'ultimo giro coincida
+    if 'total_time' in df.columns:
+        offset = df['total_time'] - race_time.groupby(df['driver_id']).transform('last')
+        valid_offset = df['total_time'].notna() & (df['total_time'] > 0)
+        race_time = race_time + offset.where(valid_offset, 0)
+    df['race_time'] = race_time.astype('int64')
+
+    # Matrice piloti x giri dei tempi cumulativi (NaN = giro non completato)
+    driver_codes, driver_index = pd.factorize(df['driver_id'], sort=False)
+    lap_codes = df['lap'].to_numpy() - 1
+    n_drivers, n_laps = len(driver_index), int(lap_codes.max()) + 1
+
+    times = np.full((n_drivers, n_laps), np.nan)
+    times[driver_codes, lap_codes] = df['race_time'].to_numpy(dtype=float)
+    # Spareggio a parità di tempo: ordine di passaggio sul traguardo
+    crossing = np.full((n_drivers, n_laps), np.inf)
+    crossing[driver_codes, lap_codes] = df['lap_number'].to_numpy(dtype=float)
+
+    completed = ~np.isnan(times)
+    order = np.lexsort((crossing, np.where(completed, times, np.inf)), axis=0)
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(1, n_drivers + 1)[:, None], axis=0)
+
+    leader_times = np.nanmin(times, axis=0)
+    gaps = times - leader_times[None, :]
+
+    df['position'] = positions[driver_codes, lap_codes]
+    df['gap_to_leader'] = gaps[driver_codes, lap_codes] / 1000.0
+
+    return df[columns].sort_values(['lap', 'position']).reset_index(drop=True)
+
+
+# ==================== LAP TIME PERCENTILES ====================
+
+class LapPercentileTable:
+    """Distribuzioni ordinate dei giri validi per pista, condizione (asciutto/bagnato) e trust level.
+
+    Ogni gruppo (track_name, is_wet, trust_level) conserva l'array ordinato dei tempi:
+    i percentili sono letture per indice e il piazzamento di un tempo è una
+    ricerca binaria (np.searchsorted). L'aggiornamento è incrementale sull'id dei giri.
+    """
+
+    PERCENTILES = (1, 5, 10, 25, 50, 75)
+
+    # Stessi filtri anti-anomalie di format_lap_time
+    LAPS_QUERY = '''
+        SELECT
+            s.track_name,
+            CASE WHEN s.is_wet_session = 1 THEN 1 ELSE 0 END as is_wet,
+            COALESCE(d.trust_level, 0) as trust_level,
+            l.lap_time
+        FROM laps l
+        JOIN sessions s ON l.session_id = s.session_id
+        JOIN drivers d ON l.driver_id = d.driver_id
+        WHERE l.is_valid_for_best = 1
+          AND l.lap_time >= 30000
+          AND l.lap_time <= 3600000
+          AND l.id > ?
+        ORDER BY s.track_name, is_wet, trust_level, l.lap_time
+    '''
+    WATERMARK_QUERY = 'SELECT COALESCE(MAX(id), 0), COUNT(*) FROM laps'
+    TRUST_SIGNATURE_QUERY = 'SELECT trust_level, COUNT(*) FROM drivers GROUP BY trust_level ORDER BY trust_level'
+
+    def __init__(self):
+        self._groups: dict = {}
+        self._last_lap_id = 0
+        self._lap_count = 0
+        self._trust_signature = None
+
+    def refresh(self, conn) -> bool:
+        """Allinea la tabella al database; ritorna True se qualcosa è cambiato"""
+        cursor = conn.cursor()
+        last_lap_id, lap_count = cursor.execute(self.WATERMARK_QUERY).fetchone()
+        trust_signature = tuple(cursor.execute(self.TRUST_SIGNATURE_QUERY).fetchall())
+
+        # Giri cancellati/reimportati o trust level cambiati: ricostruzione completa
+        full_rebuild = (
+            trust_signature != self._trust_signature
+            or last_lap_id < self._last_lap_id
+            or lap_count - self._lap_count != self._count_new_laps(cursor)
+        )
+
+        if not full_rebuild and last_lap_id == self._last_lap_id:
+            return False
+
+        since_id = 0 if full_rebuild else self._last_lap_id
+        rows = cursor.execute(self.LAPS_QUERY, (since_id,)).fetchall()
+
+        if full_rebuild:
+            self._groups = {}
+        self._merge_sorted_rows(rows)
+
+        self._last_lap_id = last_lap_id
+        self._lap_count = lap_count
+        self._trust_signature = trust_signature
+        return True
+
+    def _count_new_laps(self, cursor) -> int:
+        """Numero di giri con id oltre il watermark (per rilevare cancellazioni)"""
+        return cursor.execute('SELECT COUNT(*) FROM laps WHERE id > ?', (self._last_lap_id,)).fetchone()[0]
+
+    def _merge_sorted_rows(self, rows: list):
+        """Unisce righe già ordinate per gruppo e tempo negli array esistenti (un solo passaggio)"""
+        if not rows:
+            return
+
+        keys = [(track, is_wet, trust) for track, is_wet, trust, _ in rows]
+        times = np.fromiter((row[3] for row in rows), dtype=np.int64, count=len(rows))
+
+        start = 0
+        for end in range(1, len(rows) + 1):
+            if end < len(rows) and keys[end] == keys[start]:
+                continue
+            key = keys[start]
+            new_times = times[start:end]
+            current = self._groups.get(key)
+            if current is None:
+                self._groups[key] = new_times.copy()
+            else:
+                self._groups[key] = np.insert(current, np.searchsorted(current, new_times), new_times)
+            start = end
+
+    def percentiles(self, track_name: str) -> pd.DataFrame:
+        """Tabella percentili della pista: una riga per condizione e trust level"""
+        records = []
+        for (track, is_wet, trust_level), times in sorted(self._groups.items(), key=lambda item: item[0][1:]):
+            if track != track_name or len(times) == 0:
+                continue
+            # Array già ordinato: percentile "nearest rank" letto per indice
+            indices = np.rint(np.array(self.PERCENTILES) / 100.0 * (len(times) - 1)).astype(int)
+            values = times[indices]
+            record = {'is_wet': is_wet, 'trust_level': trust_level, 'laps': len(times)}
+            record.update({f'p{p}': int(v) for p, v in zip(self.PERCENTILES, values)})
+            records.append(record)
+
+        return pd.DataFrame(records, columns=['is_wet', 'trust_level', 'laps'] + [f'p{p}' for p in self.PERCENTILES])
+
+    def top_percent(self, track_name: str, lap_time: int, is_wet: Optional[int] = None,
+                    min_trust: int = 0) -> Optional[float]:
+        """Percentuale di giri (filtrati per condizione e trust minimo) non più veloci di lap_time.
+
+        Ritorna X per "top X%": 0 < X <= 100, None se non ci sono giri di confronto.
+        """
+        faster = 0
+        total = 0
+        for (track, wet, trust_level), times in self._groups.items():
+            if track != track_name or trust_level < min_trust:
+                continue
+            if is_wet is not None and wet != is_wet:
+                continue
+            faster += int(np.searchsorted(times, lap_time, side='left'))
+            total += len(times)
+
+        if total == 0:
+            return None
+        return min(100.0, (faster + 1) * 100.0 / total)
+
+
+# ==================== TIME ATTACK LIVE ====================
+
+class TimeAttackLeaderboard:
+    """Classifica Time Attack di una competizione, aggiornata incrementalmente.
+
+    Il watermark (righe, id massimo, updated_at massimo, somma dei tempi) si legge
+    dall'indice della competizione: finché non cambia la classifica in memoria è valida.
+    Quando si muove si leggono solo le righe con id o updated_at oltre il watermark,
+    si spostano nella lista ordinata per tempo e si ricalcolano i gap dei soli vicini.
+    Se le righe unite non riproducono il watermark (cancellazioni, tempi modificati
+    senza updated_at) la classifica viene ricaricata per intero.
+    """
+
+    # Stessi filtri anti-anomalie di format_lap_time
+    MIN_LAP_TIME = 30000
+    MAX_LAP_TIME = 3600000
+
+    ROWS_QUERY = '''
+        SELECT
+            tar.id,
+            tar.driver_id,
+            tar.updated_at,
+            d.last_name,
+            tar.best_lap_time,
+            tar.best_split1,
+            tar.best_split2,
+            tar.best_split3,
+            tar.points,
+            s.session_date,
+            COALESCE(cm.car_name, tar.car_model) as car_name,
+            tar.is_enrolled
+        FROM time_attack_results tar
+        JOIN drivers d ON tar.driver_id = d.driver_id
+        LEFT JOIN sessions s ON tar.session_id = s.session_id
+        LEFT JOIN car_models cm ON tar.car_model = cm.car_model
+        WHERE tar.competition_id = ?
+    '''
+    DELTA_FILTER = ' AND (tar.id > ? OR tar.updated_at > ?)'
+    WATERMARK_QUERY = '''
+        SELECT COUNT(*), COALESCE(MAX(id), 0), MAX(updated_at), TOTAL(best_lap_time)
+        FROM time_attack_results
+        WHERE competition_id = ?
+    '''
+
+    def __init__(self, competition_id: int):
+        self.competition_id = competition_id
+        self.watermark = None
+        self._rows: dict = {}     # driver_id -> riga di ROWS_QUERY
+        self._order: list = []    # (best_lap_time, id, driver_id) dei tempi validi, ordinati
+        self._gaps: dict = {}     # driver_id -> distacco in ms dal pilota che precede
+
+    def refresh(self, conn) -> bool:
+        """Allinea la classifica al database; ritorna True se qualcosa è cambiato"""
+        cursor = conn.cursor()
+        watermark = tuple(cursor.execute(self.WATERMARK_QUERY, (self.competition_id,)).fetchone())
+        if watermark == self.watermark:
+            return False
+
+        if self.watermark is not None:
+            _, last_id, last_updated_at, _ = self.watermark
+            rows = cursor.execute(self.ROWS_QUERY + self.DELTA_FILTER,
+                                  (self.competition_id, last_id, last_updated_at or '')).fetchall()
+            for row in rows:
+                self._upsert(row)
+
+        if self._local_watermark() != watermark:
+            self._rows, self._order, self._gaps = {}, [], {}
+            for row in cursor.execute(self.ROWS_QUERY, (self.competition_id,)).fetchall():
+                self._upsert(row)
+
+        self.watermark = watermark
+        return True
+
+    def _local_watermark(self) -> tuple:
+        """Watermark ricalcolato dalle righe in memoria (deve coincidere con quello del database)"""
+        if not self._rows:
+            return (0, 0, None, 0.0)
+        rows = self._rows.values()
+        updated_at = [row[2] for row in rows if row[2] is not None]
+        return (
+            len(self._rows),
+            max(row[0] for row in rows),
+            max(updated_at) if updated_at else None,
+            float(sum(row[4] for row in rows if row[4] is not None)),
+        )
+
+    def _is_valid(self, row: tuple) -> bool:
+        return row[4] is not None and self.MIN_LAP_TIME < row[4] < self.MAX_LAP_TIME
+
+    def _upsert(self, row: tuple):
+        """Sostituisce la riga del pilota, aggiornando ordine e gap delle posizioni toccate"""
+        driver_id = row[1]
+        previous = self._rows.get(driver_id)
+        if previous is not None and self._is_valid(previous):
+            index = bisect.bisect_left(self._order, (previous[4], previous[0], driver_id))
+            del self._order[index]
+            self._gaps.pop(driver_id, None)
+            self._update_gap(index)
+
+        self._rows[driver_id] = row
+        if self._is_valid(row):
+            index = bisect.bisect_left(self._order, (row[4], row[0], driver_id))
+            self._order.insert(index, (row[4], row[0], driver_id))
+            self._update_gap(index)
+            self._update_gap(index + 1)
+
+    def _update_gap(self, index: int):
+        """Ricalcola il distacco della posizione index rispetto alla precedente"""
+        if index >= len(self._order):
+            return
+        lap_time, _, driver_id = self._order[index]
+        self._gaps[driver_id] = lap_time - self._order[index - 1][0] if index > 0 else None
+
+    def rows(self) -> List[tuple]:
+        """Righe ordinate per tempo: (pilota, best lap, split 1-3, punti, data sessione, auto, iscritto, gap ms)"""
+        result = []
+        for _, _, driver_id in self._order:
+            row = self._rows[driver_id]
+            result.append(tuple(row[3:]) + (self._gaps.get(driver_id),))
+        return result
+
+
+# ==================== POINTS SYSTEMS SIMULATOR ====================
+
+def parse_position_points(position_points_json: Optional[str]) -> Dict[int, float]:
+    """Converte position_points_json ({"1": 25, "2": 18, ...}) in dizionario posizione -> punti"""
+    if not position_points_json:
+        return {}
+    try:
+        raw = json.loads(position_points_json)
+    except (TypeError, ValueError):
+        return {}
+    return {int(pos): float(pts) for pos, pts in raw.items() if pts is not None}
+
+
+def simulate_points_systems(race_results: pd.DataFrame, competition_results: pd.DataFrame,
+                            systems: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """Ricalcola la classifica di un campionato con ogni sistema punti in un'unica passata vettoriale.
+
+    race_results: una riga per pilota e sessione di gara (round, driver_id, position)
+    competition_results: una riga per pilota e competizione (round, driver_id, driver,
+        poles, fastest_laps, time_attack_points, guests_beaten, beaten_by_guests)
+    systems: righe di points_systems
+
+    I sistemi senza tabella posizioni (formule tier calcolate dal manager) vengono
+    saltati e restituiti nella lista. Il risultato ha una riga per pilota con
+    '<sistema> pts' e '<sistema> pos' per ogni sistema simulato.
+    """
+    parsed = [(row, parse_position_points(row['position_points_json'])) for _, row in systems.iterrows()]
+    simulated = [(row, table) for row, table in parsed if table]
+    skipped = [row['name'] for row, table in parsed if not table]
+
+    if competition_results.empty or not simulated:
+        return pd.DataFrame(), skipped
+
+    driver_codes, driver_index = pd.factorize(competition_results['driver_id'], sort=False)
+    round_codes, round_index = pd.factorize(competition_results['round'], sort=True)
+    n_drivers, n_rounds = len(driver_index), len(round_index)
+
+    def round_driver_matrix(column: str) -> np.ndarray:
+        matrix = np.zeros((n_rounds, n_drivers))
+        matrix[round_codes, driver_codes] = competition_results[column].fillna(0).to_numpy(dtype=float)
+        return matrix
+
+    poles = round_driver_matrix('poles')
+    fastest_laps = round_driver_matrix('fastest_laps')
+    time_attack = round_driver_matrix('time_attack_points')
+    net_guests = round_driver_matrix('guests_beaten') - round_driver_matrix('beaten_by_guests')
+
+    # Conteggio arrivi: round x piloti x posizioni (più gare nello stesso round si sommano)
+    max_position = max(max(table) for _, table in simulated)
+    finishes = np.zeros((n_rounds, n_drivers, max_position))
+    races = race_results[
+        race_results['driver_id'].isin(driver_index)
+        & race_results['round'].isin(round_index)
+        & race_results['position'].between(1, max_position)
+    ]
+    np.add.at(
+        finishes,
+        (round_index.get_indexer(races['round']),
+         driver_index.get_indexer(races['driver_id']),
+         races['position'].to_numpy(dtype=int) - 1),
+        1
+    )
+
+    # Sistemi x posizioni, punti pole/giro veloce/bonus guest e scarti
+    position_points = np.zeros((len(simulated), max_position))
+    for s, (_, table) in enumerate(simulated):
+        for pos, pts in table.items():
+            if 1 <= pos <= max_position:
+                position_points[s, pos - 1] = pts
+    system_rows = pd.DataFrame([row for row, _ in simulated])
+    pole_points = system_rows['pole_position_points'].fillna(0).to_numpy(dtype=float)
+    fastest_lap_points = system_rows['fastest_lap_points'].fillna(0).to_numpy(dtype=float)
+    guest_bonus = system_rows['guest_bonus_value'].fillna(0).to_numpy(dtype=float)
+    drop_worst = system_rows['drop_worst_results'].fillna(0).to_numpy(dtype=int)
+
+    # Punti competizione: sistemi x round x piloti
+    competition_points = (
+        np.einsum('rdp,sp->srd', finishes, position_points)
+        + pole_points[:, None, None] * poles
+        + fastest_lap_points[:, None, None] * fastest_laps
+        + guest_bonus[:, None, None] * net_guests
+        + time_attack[None, :, :]
+    )
+
+    # Scarto dei k peggiori risultati: ordinamento lungo l'asse dei round
+    worst_first = np.sort(competition_points, axis=1)
+    drop_mask = np.arange(n_rounds)[None, :, None] < np.minimum(drop_worst, n_rounds)[:, None, None]
+    totals = competition_points.sum(axis=1) - (worst_first * drop_mask).sum(axis=1)
+
+    # Posizioni per sistema (parità: stesso piazzamento)
+    positions = pd.DataFrame(totals.T).rank(axis=0, method='min', ascending=False).to_numpy(dtype=int)
+
+    drivers = competition_results.drop_duplicates('driver_id').set_index('driver_id')['driver']
+    result = pd.DataFrame({'driver_id': driver_index, 'driver': drivers.reindex(driver_index).to_numpy()})
+    for s, (row, _) in enumerate(simulated):
+        result[f"{row['name']} pts"] = np.round(totals[s], 1)
+        result[f"{row['name']} pos"] = positions[:, s]
+
+    return result, skipped
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+ACC API - API JSON in sola lettura sui dati del dashboard
+Espone classifiche, risultati, best lap e statistiche pilota a bot e overlay senza passare
+dalla UI Streamlit. Usa gli stessi metodi dati di ACCWebDashboard (istanziato senza runtime).
+Le risposte sono compresse gzip se il client lo accetta e portano ETag e Last-Modified
+derivati dalla versione dati del database: le richieste condizionali ricevono 304 senza
+eseguire query. Ogni endpoint ha una cache in memoria invalidata dal cambio di versione dati;
+le risposte vuote (anche quelle di una query fallita) non entrano in cache. Campionati,
+competizioni, piste e piloti inesistenti rispondono 404.
+
+Endpoint:
+    GET /api/health
+    GET /api/championships/<id>/standings
+    GET /api/competitions/<id>/results
+    GET /api/competitions/<id>/time-attack
+    GET /api/tracks/<track_name>/leaderboard[?friends=1]
+    GET /api/drivers/<id>/statistics
+
+Uso:
+    python acc_api.py [--db acc_stats.db] [--host 127.0.0.1] [--port 8502] [--max-age 30]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+import streamlit.logger
+from streamlit import config as streamlit_config
+
+from acc_db import get_data_version
+
+# Sotto questa dimensione la compressione non conviene
+GZIP_MIN_BYTES = 512
+# Risposte tenute in cache (tutti gli endpoint)
+RESPONSE_CACHE_ENTRIES = 512
+
+TIME_ATTACK_COLUMNS = ('driver', 'best_lap_time', 'sector1', 'sector2', 'sector3', 'points',
+                       'session_date', 'car', 'is_enrolled', 'gap_ms')
+
+
+class NotFound(Exception):
+    """Risorsa inesistente (404)"""
+
+
+def to_jsonable(value):
+    """Converte DataFrame, tipi numpy e NaN in valori serializzabili"""
+    if isinstance(value, pd.DataFrame):
+        return json.loads(value.to_json(orient='records', date_format='iso'))
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+class DashboardAPI:
+    """Instradamento, cache delle risposte e validatori HTTP sopra i metodi del dashboard"""
+
+    def __init__(self, dashboard, max_age: int = 30, cache_entries: int = RESPONSE_CACHE_ENTRIES):
+        self.dashboard = dashboard
+        self.max_age = max_age
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.routes = [
+            (re.compile(r'^/api/health$'), self.health),
+            (re.compile(r'^/api/championships/(\d+)/standings$'), self.championship_standings),
+            (re.compile(r'^/api/competitions/(\d+)/results$'), self.competition_results),
+            (re.compile(r'^/api/competitions/(\d+)/time-attack$'), self.time_attack),
+            (re.compile(r'^/api/tracks/([^/]+)/leaderboard$'), self.track_leaderboard),
+            (re.compile(r'^/api/drivers/([^/]+)/statistics$'), self.driver_statistics),
+        ]
+
+    # ==================== ENDPOINT ====================
+
+    def health(self, params: Dict) -> Dict:
+        return {'status': 'ok', 'data_version': get_data_version(self.dashboard.db_path)}
+
+    def championship_standings(self, params: Dict, championship_id: str) -> list:
+        self.require('championships', int(championship_id), 'championship')
+        return to_jsonable(self.dashboard.get_championship_standings(int(championship_id)))
+
+    def competition_results(self, params: Dict, competition_id: str) -> list:
+        self.require('competitions', int(competition_id), 'competition')
+        return to_jsonable(self.dashboard.get_competition_results(int(competition_id)))
+
+    def time_attack(self, params: Dict, competition_id: str) -> list:
+        self.require('competitions', int(competition_id), 'competition')
+        rows = self.dashboard.get_time_attack_leaderboard(int(competition_id))
+        if rows is None:
+            raise NotFound(f"time attack of competition {competition_id}")
+        return [dict(zip(TIME_ATTACK_COLUMNS, to_jsonable(row))) for row in rows]
+
+    def track_leaderboard(self, params: Dict, track_name: str) -> list:
+        include_friends = params.get('friends', ['0'])[0].lower() in ('1', 'true', 'yes')
+        track_name = unquote(track_name)
+        if track_name not in self.dashboard.get_tracks_list():
+            raise NotFound(f"track {track_name}")
+        return to_jsonable(self.dashboard.get_track_leaderboard(track_name, include_friends=include_friends))
+
+    def driver_statistics(self, params: Dict, driver_id: str) -> Dict:
+        driver_id = unquote(driver_id)
+        stats = self.dashboard.get_driver_statistics(driver_id)
+        if not stats or not stats.get('total_sessions'):
+            raise NotFound(f"driver {driver_id}")
+        return to_jsonable(stats)
+
+    def require(self, table: str, key: int, label: str):
+        """404 se l'id non esiste (anche tra le leghe archiviate): senza controllo risponderebbe 200 []"""
+        names = self.dashboard.get_dimensions(history=True).tables.get(table, {}).get('name', {})
+        if key not in names:
+            raise NotFound(f"{label} {key}")
+
+    # ==================== CACHE E VALIDATORI ====================
+
+    def resolve(self, path: str) -> Optional[Tuple[Callable, Tuple]]:
+        for pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match:
+                return handler, match.groups()
+        return None
+
+    def etag(self, path: str, query: str, data_version: str) -> str:
+        """ETag della risposta: dipende solo da versione dati e URL, quindi si calcola senza eseguire query"""
+        return hashlib.sha1(f"{data_version}|{path}?{query}".encode('utf-8')).hexdigest()[:20]
+
+    def render(self, path: str, query: str, data_version: str) -> Dict:
+        """Risposta dell'endpoint (corpo JSON e versione gzip), dalla cache se la versione dati non è cambiata.
+        I risultati vuoti non entrano in cache: una query fallita restituisce un DataFrame vuoto"""
+        key = (path, query)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry['data_version'] == data_version:
+                self._cache.move_to_end(key)
+                return entry
+
+        route = self.resolve(path)
+        if route is None:
+            raise NotFound(path)
+        handler, args = route
+        payload = handler(parse_qs(query), *args)
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        entry = {
+            'data_version': data_version,
+            'body': body,
+            'gzip': gzip.compress(body, compresslevel=6, mtime=0) if len(body) >= GZIP_MIN_BYTES else None,
+        }
+        if not payload:
+            return entry
+
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return entry
+
+    def last_modified(self) -> datetime:
+        """Ultima modifica del database (precisione al secondo, come l'header HTTP)"""
+        mtime = Path(self.dashboard.db_path).stat().st_mtime
+        return datetime.fromtimestamp(int(mtime), tz=timezone.utc)
+
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'ACCDashboardAPI/1.0'
+    api: DashboardAPI = None
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body: bool):
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/') or '/'
+        data_version = get_data_version(self.api.dashboard.db_path)
+        if self.api.resolve(path) is None:
+            return self.send_json(404, {'error': f"not found: {path}"}, send_body)
+
+        # Validatori prima del rendering: una richiesta condizionale soddisfatta non esegue query.
+        # ETag distinto per codifica: le due rappresentazioni hanno byte diversi
+        accepts_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        etag = f'"{self.api.etag(path, url.query, data_version)}{"-gz" if accepts_gzip else ""}"'
+        last_modified = self.api.last_modified()
+
+        if self.not_modified(etag, last_modified):
+            self.send_response(304)
+            self.send_validators(etag, last_modified)
+            self.end_headers()
+            return
+
+        try:
+            entry = self.api.render(path, url.query, data_version)
+        except NotFound as e:
+            return self.send_json(404, {'error': f"not found: {e}"}, send_body)
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)}, send_body)
+        except Exception as e:
+            return self.send_json(500, {'error': str(e)}, send_body)
+
+        use_gzip = accepts_gzip and entry['gzip'] is not None
+        body = entry['gzip'] if use_gzip else entry['body']
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_validators(etag, last_modified)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def not_modified(self, etag: str, last_modified: datetime) -> bool:
+        """Richiesta condizionale soddisfatta: If-None-Match ha la precedenza su If-Modified-Since"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or f"W/{etag}" in tags
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def send_validators(self, etag: str, last_modified: datetime):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(last_modified.timestamp(), usegmt=True))
+        self.send_header('Cache-Control', f"public, max-age={self.api.max_age}")
+        self.send_header('Vary', 'Accept-Encoding')
+
+    def send_json(self, status: int, payload: Dict, send_body: bool):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"{self.log_date_time_string()} {self.address_string()} {format % args}\n")
+
+
+def load_dashboard(db_path: str):
+    """Istanzia il dashboard senza runtime Streamlit (come bench_backends.load_dashboard)"""
+    os.environ['ACC_DATABASE_PATH'] = db_path
+    streamlit_config.get_option('logger.level')
+    streamlit.logger.set_log_level('ERROR')
+    import dashboard_acc
+
+    dashboard = dashboard_acc.ACCWebDashboard()
+    dashboard.db_path = db_path
+    return dashboard
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="API JSON in sola lettura sui dati del dashboard")
+    parser.add_argument('--db', default=os.getenv('ACC_DATABASE_PATH', 'acc_stats.db'), help="Database del dashboard")
+    parser.add_argument('--host', default='127.0.0.1', help="Indirizzo di ascolto")
+    parser.add_argument('--port', type=int, default=8502, help="Porta di ascolto")
+    parser.add_argument('--max-age', type=int, default=30, help="Cache-Control max-age delle risposte (secondi)")
+    parser.add_argument('--cache-entries', type=int, default=RESPONSE_CACHE_ENTRIES, help="Risposte tenute in memoria")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"❌ Database not found: {args.db}")
+        return 1
+
+    dashboard = load_dashboard(os.path.abspath(args.db))
+    # Le viste di default (classifiche correnti, record piste) sono pronte prima delle prime richieste
+    dashboard.start_cache_warmup()
+    APIRequestHandler.api = DashboardAPI(dashboard, args.max_age, args.cache_entries)
+    server = ThreadingHTTPServer((args.host, args.port), APIRequestHandler)
+    print(f"🌐 ACC API listening on http://{args.host}:{args.port}/api/health")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
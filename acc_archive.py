@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+ACC Archive - Archiviazione delle leghe concluse
+Sposta campionati, competizioni, sessioni, risultati, giri e classifiche delle leghe
+concluse (leagues.is_completed = 1) in un database di archivio con lo stesso schema.
+Nel database principale restano la riga della lega, i piloti e gli aggregati
+all-time precalcolati (record pista e palmarès), così le viste storiche non devono
+collegare l'archivio. Il dashboard fa ATTACH dell'archivio solo per le leghe archiviate.
+
+Uso:
+    python acc_archive.py [--db acc_stats.db] [--archive acc_archive.db] [--league ID] [--vacuum] [--dry-run]
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from acc_db import bump_data_version
+
+DEFAULT_ARCHIVE_PATH = 'acc_archive.db'
+
+# DDL del database principale riscritto verso lo schema archive
+TABLE_DDL_RE = re.compile(r'^CREATE TABLE (IF NOT EXISTS )?("[^"]+"|\w+)', re.IGNORECASE)
+INDEX_DDL_RE = re.compile(r'^CREATE INDEX (IF NOT EXISTS )?("[^"]+"|\w+)', re.IGNORECASE)
+ARCHIVE_PATH_KEY = 'archive_path'
+
+# Tabelle spostate in archivio e filtro sulle righe delle leghe archiviate
+# (figli prima dei padri: i filtri usano gli id raccolti all'inizio)
+ARCHIVED_ROWS = {
+    'laps': 'session_id IN (SELECT session_id FROM temp.archive_sessions)',
+    'penalties': 'session_id IN (SELECT session_id FROM temp.archive_sessions)',
+    'session_results': 'session_id IN (SELECT session_id FROM temp.archive_sessions)',
+    'sessions': 'session_id IN (SELECT session_id FROM temp.archive_sessions)',
+    'time_attack_results': 'competition_id IN (SELECT competition_id FROM temp.archive_competitions)',
+    'competition_standings': 'competition_id IN (SELECT competition_id FROM temp.archive_competitions)',
+    'competitions': 'competition_id IN (SELECT competition_id FROM temp.archive_competitions)',
+    'championship_standings': 'championship_id IN (SELECT championship_id FROM temp.archive_championships)',
+    'championship_enrollments': 'championship_id IN (SELECT championship_id FROM temp.archive_championships)',
+    'manual_penalties': 'championship_id IN (SELECT championship_id FROM temp.archive_championships)',
+    'championships': 'championship_id IN (SELECT championship_id FROM temp.archive_championships)',
+}
+
+# Aggregati all-time sui dati archiviati (ricalcolati a ogni archiviazione)
+AGGREGATE_TABLES = {
+    'archive_track_bests': '''
+        SELECT track_name, driver_id, lap_id, best_lap, session_date, session_type, is_time_attack,
+               competition_id, competition_name, championship_name, valid_laps
+        FROM (
+            SELECT
+                s.track_name,
+                l.driver_id,
+                l.id as lap_id,
+                l.lap_time as best_lap,
+                s.session_date,
+                s.session_type,
+                s.is_time_attack,
+                s.competition_id,
+                c.name as competition_name,
+                ch.name as championship_name,
+                COUNT(*) OVER (PARTITION BY s.track_name, l.driver_id) as valid_laps,
+                ROW_NUMBER() OVER (PARTITION BY s.track_name, l.driver_id ORDER BY l.lap_time, s.session_date, l.id) as lap_rank
+            FROM archive.laps l
+            JOIN archive.sessions s ON l.session_id = s.session_id
+            LEFT JOIN archive.competitions c ON s.competition_id = c.competition_id
+            LEFT JOIN archive.championships ch ON c.championship_id = ch.championship_id
+            WHERE l.is_valid_for_best = 1 AND l.lap_time > 0
+        )
+        WHERE lap_rank = 1
+    ''',
+    'archive_driver_honours': '''
+        SELECT driver_id, SUM(titles) as titles, SUM(competition_wins) as competition_wins, SUM(race_wins) as race_wins
+        FROM (
+            SELECT cs.driver_id, COUNT(*) as titles, 0 as competition_wins, 0 as race_wins
+            FROM archive.championship_standings cs
+            JOIN archive.championships ch ON cs.championship_id = ch.championship_id
+            WHERE cs.position = 1 AND ch.is_completed = 1
+            GROUP BY cs.driver_id
+
+            UNION ALL
+
+            SELECT cst.driver_id, 0, COUNT(*), 0
+            FROM archive.competition_standings cst
+            JOIN archive.competitions comp ON cst.competition_id = comp.competition_id
+            JOIN archive.championships ch ON comp.championship_id = ch.championship_id
+            WHERE comp.is_completed = 1
+              AND ch.total_rounds > 0
+              AND ch.is_completed != -1
+              AND cst.total_points = (
+                  SELECT MAX(cst2.total_points)
+                  FROM archive.competition_standings cst2
+                  WHERE cst2.competition_id = cst.competition_id
+              )
+            GROUP BY cst.driver_id
+
+            UNION ALL
+
+            SELECT sr.driver_id, 0, 0, COUNT(*)
+            FROM archive.session_results sr
+            JOIN archive.sessions s ON sr.session_id = s.session_id
+            JOIN archive.competitions comp ON s.competition_id = comp.competition_id
+            WHERE sr.position = 1
+              AND s.session_type = 'R'
+              AND comp.is_completed = 1
+              AND (s.is_time_attack IS NULL OR s.is_time_attack = 0)
+            GROUP BY sr.driver_id
+        )
+        GROUP BY driver_id
+    ''',
+}
+
+
+def table_exists(conn: sqlite3.Connection, table: str, schema: str = 'main') -> bool:
+    """True se la tabella esiste nello schema indicato"""
+    row = conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    return row is not None
+
+
+def create_archive_schema(conn: sqlite3.Connection, tables: List[str]):
+    """Crea nell'archivio le tabelle (e i loro indici) con lo stesso DDL del database principale"""
+    for table in tables:
+        if table_exists(conn, table, 'archive'):
+            continue
+        ddl = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+        conn.execute(TABLE_DDL_RE.sub(r'CREATE TABLE archive.\2', ddl, count=1))
+
+        for (index_ddl,) in conn.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+        ).fetchall():
+            if INDEX_DDL_RE.match(index_ddl):
+                conn.execute(INDEX_DDL_RE.sub(r'CREATE INDEX IF NOT EXISTS archive.\2', index_ddl, count=1))
+
+
+def collect_archive_ids(conn: sqlite3.Connection, league_ids: List[int]) -> Dict[str, int]:
+    """Raccoglie in tabelle temporanee gli id da archiviare"""
+    conn.execute('CREATE TEMP TABLE archive_leagues (league_id INTEGER PRIMARY KEY)')
+    conn.executemany('INSERT INTO temp.archive_leagues VALUES (?)', [(league_id,) for league_id in league_ids])
+    conn.execute('''
+        CREATE TEMP TABLE archive_championships AS
+        SELECT championship_id FROM main.championships
+        WHERE league_id IN (SELECT league_id FROM temp.archive_leagues)
+    ''')
+    conn.execute('''
+        CREATE TEMP TABLE archive_competitions AS
+        SELECT competition_id FROM main.competitions
+        WHERE championship_id IN (SELECT championship_id FROM temp.archive_championships)
+    ''')
+    conn.execute('''
+        CREATE TEMP TABLE archive_sessions AS
+        SELECT session_id FROM main.sessions
+        WHERE competition_id IN (SELECT competition_id FROM temp.archive_competitions)
+    ''')
+    return {
+        table: conn.execute(f'SELECT COUNT(*) FROM temp.{table}').fetchone()[0]
+        for table in ('archive_championships', 'archive_competitions', 'archive_sessions')
+    }
+
+
+def archive_leagues(db_path: str, archive_path: str, league_ids: Optional[List[int]] = None,
+                    dry_run: bool = False, vacuum: bool = False) -> Dict:
+    """Sposta le leghe concluse nell'archivio e ricalcola gli aggregati all-time"""
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if league_ids is None:
+            archived = set()
+            if table_exists(conn, 'archived_leagues'):
+                archived = {row[0] for row in conn.execute('SELECT league_id FROM archived_leagues')}
+            league_ids = [
+                row[0] for row in conn.execute('SELECT league_id FROM leagues WHERE is_completed = 1 ORDER BY league_id')
+                if row[0] not in archived
+            ]
+        else:
+            # Solo leghe concluse: i loro risultati non cambiano più e gli aggregati restano validi
+            completed = {row[0] for row in conn.execute('SELECT league_id FROM leagues WHERE is_completed = 1')}
+            refused = [league_id for league_id in league_ids if league_id not in completed]
+            if refused:
+                raise ValueError(f"leagues not completed or not found: {', '.join(map(str, refused))}")
+
+        conn.execute('ATTACH DATABASE ? AS archive', (archive_path,))
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            counts = collect_archive_ids(conn, league_ids)
+            tables = [table for table in ARCHIVED_ROWS if table_exists(conn, table)]
+            moved = {
+                table: conn.execute(f'SELECT COUNT(*) FROM main."{table}" WHERE {ARCHIVED_ROWS[table]}').fetchone()[0]
+                for table in tables
+            }
+
+            if dry_run:
+                conn.execute('ROLLBACK')
+                return {'leagues': league_ids, 'moved': moved, 'dry_run': True, 'elapsed': time.perf_counter() - start, **counts}
+
+            create_archive_schema(conn, tables)
+            for table in tables:
+                conn.execute(f'INSERT OR REPLACE INTO archive."{table}" SELECT * FROM main."{table}" WHERE {ARCHIVED_ROWS[table]}')
+                conn.execute(f'DELETE FROM main."{table}" WHERE {ARCHIVED_ROWS[table]}')
+
+            # Aggregati all-time sull'intero archivio (anche leghe archiviate in precedenza)
+            for table, query in AGGREGATE_TABLES.items():
+                conn.execute(f'DROP TABLE IF EXISTS main."{table}"')
+                conn.execute(f'CREATE TABLE main."{table}" AS {query}')
+            conn.execute('CREATE INDEX IF NOT EXISTS main.idx_archive_track_bests ON archive_track_bests (track_name, best_lap)')
+
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS main.archived_leagues (
+                    league_id INTEGER PRIMARY KEY,
+                    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.executemany('INSERT OR REPLACE INTO main.archived_leagues (league_id) VALUES (?)',
+                             [(league_id,) for league_id in league_ids])
+            conn.execute('CREATE TABLE IF NOT EXISTS main.dashboard_meta (key TEXT PRIMARY KEY, value TEXT)')
+            conn.execute('INSERT OR REPLACE INTO main.dashboard_meta (key, value) VALUES (?, ?)',
+                         (ARCHIVE_PATH_KEY, os.path.relpath(archive_path, os.path.dirname(os.path.abspath(db_path)))))
+            bump_data_version(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        conn.execute('DETACH DATABASE archive')
+        if vacuum:
+            conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+    return {'leagues': league_ids, 'moved': moved, 'dry_run': False, 'elapsed': time.perf_counter() - start, **counts}
+
+
+def resolve_archive_path(db_path: str, configured_path: Optional[str] = None) -> Optional[str]:
+    """Percorso dell'archivio: configurazione esplicita, altrimenti quello registrato nel database"""
+    if configured_path:
+        return configured_path
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            row = conn.execute('SELECT value FROM dashboard_meta WHERE key = ?', (ARCHIVE_PATH_KEY,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    if not row:
+        return None
+    return str(Path(db_path).resolve().parent / row[0])
+
+
+def attach_archive(conn: sqlite3.Connection, archive_path: str) -> List[str]:
+    """Collega l'archivio e crea viste temporanee main+archivio con i nomi delle tabelle originali.
+    Le viste temp hanno precedenza sulle tabelle di main, quindi le query esistenti vedono tutto lo storico."""
+    conn.execute('ATTACH DATABASE ? AS archive', (archive_path,))
+    unioned = []
+    for table in ARCHIVED_ROWS:
+        if table_exists(conn, table) and table_exists(conn, table, 'archive'):
+            conn.execute(f'''
+                CREATE TEMP VIEW IF NOT EXISTS "{table}" AS
+                SELECT * FROM main."{table}" UNION ALL SELECT * FROM archive."{table}"
+            ''')
+            unioned.append(table)
+    return unioned
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Archivia le leghe concluse in un database separato")
+    parser.add_argument('--db', default=os.getenv('ACC_DATABASE_PATH', 'acc_stats.db'), help="Database principale")
+    parser.add_argument('--archive', default=os.getenv('ACC_ARCHIVE_PATH', DEFAULT_ARCHIVE_PATH), help="Database di archivio")
+    parser.add_argument('--league', type=int, action='append', help="Lega da archiviare (default: tutte le concluse)")
+    parser.add_argument('--vacuum', action='store_true', help="Compatta il database principale dopo lo spostamento")
+    parser.add_argument('--dry-run', action='store_true', help="Mostra cosa verrebbe spostato senza modificare nulla")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"❌ Database not found: {args.db}")
+        return 1
+
+    try:
+        result = archive_leagues(args.db, args.archive, args.league, dry_run=args.dry_run, vacuum=args.vacuum)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if not result['leagues']:
+        print("ℹ️ No completed leagues to archive")
+        return 0
+
+    action = "Would move" if result['dry_run'] else "Moved"
+    print(f"🗄️ {action} leagues {', '.join(map(str, result['leagues']))} "
+          f"({result['archive_championships']} championships, {result['archive_competitions']} competitions, "
+          f"{result['archive_sessions']} sessions) in {result['elapsed']:.2f}s")
+    for table, count in result['moved'].items():
+        print(f"   {table}: {count} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
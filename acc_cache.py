@@ -0,0 +1,232 @@
+"""
+ACC Cache - Cache dei risultati con budget di memoria
+Conserva DataFrame (e dizionari/liste che li contengono) misurandone l'occupazione
+con memory_usage(deep=True) e rispetta un budget globale di byte, più limiti opzionali
+per namespace (tipo di query). Oltre il budget espelle la voce usata meno di recente
+(LRU) o meno di frequente (LFU, a parità la meno recente). Per ogni namespace tiene
+contatori di hit, miss ed espulsioni e i byte occupati.
+I miss concorrenti sulla stessa chiave sono accorpati (single-flight): il primo esegue
+la query, gli altri ne attendono il risultato invece di rieseguirla. L'attesa ha un timeout,
+oltre il quale il thread calcola da sé, e chi non può attendere (i worker del pool di query,
+da cui l'esecuzione in corso potrebbe dipendere) calcola subito.
+"""
+
+import copy
+import sys
+import threading
+import weakref
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+CACHE_POLICIES = ('lru', 'lfu')
+
+# Secondi di attesa massima di un'esecuzione già in corso prima di calcolare in proprio
+FLIGHT_WAIT_TIMEOUT = 10.0
+
+# Tutte le cache del processo (per svuotarle insieme, es. nei benchmark a freddo)
+_caches = weakref.WeakSet()
+
+
+def measure(value) -> int:
+    """Byte occupati da un risultato (DataFrame misurati in profondità, contenitori ricorsivamente)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(measure(key) + measure(item) for key, item in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(measure(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def clear_all():
+    """Svuota tutte le cache del processo"""
+    for cache in list(_caches):
+        cache.clear()
+
+
+class SingleFlight:
+    """Chiamate concorrenti con la stessa chiave: una sola esecuzione, risultato (o eccezione) condiviso"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, compute: Callable[[], Any], wait: bool = True,
+           timeout: Optional[float] = FLIGHT_WAIT_TIMEOUT) -> Tuple[Any, bool]:
+        """(risultato, True se ottenuto da un'esecuzione già in corso di un altro thread).
+        Con wait=False, o se l'esecuzione in corso non finisce entro timeout, calcola senza accorpare"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'value': None, 'error': None}
+                self._calls[key] = call
+
+        if not leader:
+            if not wait or not call['done'].wait(timeout):
+                return compute(), False
+            if call['error'] is not None:
+                raise call['error']
+            return call['value'], True
+
+        try:
+            call['value'] = compute()
+            return call['value'], False
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+
+class FrameCache:
+    """Cache LRU/LFU limitata in byte, con statistiche per namespace.
+
+    I valori restituiti sono copie: chi li riceve può aggiungere colonne o
+    riformattare senza alterare la voce in cache.
+    """
+
+    def __init__(self, max_bytes: int, policy: str = 'lru', namespace_limits: Optional[Dict[str, int]] = None):
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy: {policy} (available: {', '.join(CACHE_POLICIES)})")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.namespace_limits = dict(namespace_limits or {})
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._namespace_bytes = defaultdict(int)
+        self._counters = defaultdict(lambda: {'hits': 0, 'misses': 0, 'evictions': 0, 'rejected': 0, 'coalesced': 0})
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        _caches.add(self)
+
+    def get(self, namespace: str, key: Hashable, count: bool = True):
+        """(True, copia del valore) se presente, altrimenti (False, None); count=False non aggiorna i contatori"""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                if count:
+                    self._counters[namespace]['misses'] += 1
+                return False, None
+            self._entries.move_to_end((namespace, key))
+            entry['uses'] += 1
+            if count:
+                self._counters[namespace]['hits'] += 1
+            value = entry['value']
+        return True, self._copy(value)
+
+    def put(self, namespace: str, key: Hashable, value) -> bool:
+        """Memorizza il valore se entra nei limiti; ritorna False se troppo grande"""
+        nbytes = measure(value)
+        limit = min(self.max_bytes, self.namespace_limits.get(namespace, self.max_bytes))
+        with self._lock:
+            if nbytes > limit:
+                self._counters[namespace]['rejected'] += 1
+                return False
+            self._remove((namespace, key))
+            self._entries[(namespace, key)] = {'value': value, 'bytes': nbytes, 'uses': 1}
+            self._bytes += nbytes
+            self._namespace_bytes[namespace] += nbytes
+
+            # Prima il limite del namespace (solo sue voci), poi il budget globale
+            while self._namespace_bytes[namespace] > limit:
+                self._evict(namespace)
+            while self._bytes > self.max_bytes:
+                self._evict(None)
+        return True
+
+    def get_or_compute(self, namespace: str, key: Hashable, compute: Callable[[], Any],
+                       cacheable: Callable[[Any], bool] = None, wait: bool = True) -> Any:
+        """Valore in cache o calcolato (e memorizzato se cacheable lo accetta).
+        Con più miss contemporanei sulla stessa chiave il calcolo è eseguito una volta sola;
+        wait=False non attende un'esecuzione già in corso (vedi SingleFlight.do)"""
+        found, value = self.get(namespace, key)
+        if found:
+            return value
+
+        def compute_and_store():
+            # Un'esecuzione appena conclusa può aver già memorizzato il valore
+            found, value = self.get(namespace, key, count=False)
+            if found:
+                return value
+            value = compute()
+            if cacheable is None or cacheable(value):
+                self.put(namespace, key, self._copy(value))
+            return value
+
+        value, shared = self._flights.do((namespace, key), compute_and_store, wait=wait)
+        if shared:
+            with self._lock:
+                self._counters[namespace]['coalesced'] += 1
+        # Il risultato dell'esecuzione è condiviso con i thread in attesa: ognuno riceve la sua copia
+        return self._copy(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._namespace_bytes.clear()
+
+    def stats(self) -> pd.DataFrame:
+        """Voci, byte occupati e contatori per namespace"""
+        with self._lock:
+            entries = defaultdict(int)
+            for namespace, _ in self._entries:
+                entries[namespace] += 1
+            namespaces = sorted(set(self._counters) | set(entries))
+            rows = []
+            for namespace in namespaces:
+                counters = self._counters[namespace]
+                lookups = counters['hits'] + counters['misses']
+                rows.append({
+                    'namespace': namespace,
+                    'entries': entries[namespace],
+                    'bytes': self._namespace_bytes[namespace],
+                    'limit_bytes': self.namespace_limits.get(namespace, self.max_bytes),
+                    'hits': counters['hits'],
+                    'misses': counters['misses'],
+                    'hit_rate': counters['hits'] / lookups if lookups else 0.0,
+                    'evictions': counters['evictions'],
+                    'rejected': counters['rejected'],
+                    'coalesced': counters['coalesced'],
+                })
+        return pd.DataFrame(rows, columns=['namespace', 'entries', 'bytes', 'limit_bytes', 'hits', 'misses',
+                                           'hit_rate', 'evictions', 'rejected', 'coalesced'])
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def _remove(self, entry_key) -> Optional[dict]:
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self._bytes -= entry['bytes']
+            self._namespace_bytes[entry_key[0]] -= entry['bytes']
+        return entry
+
+    def _evict(self, namespace: Optional[str]):
+        """Espelle una voce (del namespace indicato o di qualsiasi namespace) secondo la politica"""
+        candidates = (entry_key for entry_key in self._entries if namespace is None or entry_key[0] == namespace)
+        if self.policy == 'lfu':
+            # min è stabile: a parità di utilizzi vince la voce meno recente
+            victim = min(candidates, key=lambda entry_key: self._entries[entry_key]['uses'], default=None)
+        else:
+            victim = next(candidates, None)
+        if victim is None:
+            return
+        self._remove(victim)
+        self._counters[victim[0]]['evictions'] += 1
+
+    @staticmethod
+    def _copy(value):
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return value.copy()
+        if isinstance(value, (dict, list, tuple)):
+            return copy.deepcopy(value)
+        return value
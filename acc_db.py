@@ -0,0 +1,379 @@
+"""
+ACC DB - Accesso condiviso al database
+Versione dati del database usata come chiave dalle cache del dashboard:
+l'importer incrementa un contatore in dashboard_meta a ogni scrittura, le
+modifiche fatte da altri strumenti sono intercettate da mtime e dimensione file,
+la sostituzione del file (acc_swap.py) dall'inode.
+
+Backend analitici per le aggregazioni pesanti sui giri: SQLite (default) oppure
+DuckDB, che tiene una copia colonnare in memoria delle tabelle (ricaricata quando
+cambia la versione dati) ed esegue le stesse query vettoriali e multi-thread.
+DuckDB è opzionale (pip install duckdb).
+
+Esecutore parallelo per le query indipendenti di una pagina: SQLite rilascia il GIL
+durante l'esecuzione, quindi più connessioni in lettura lavorano davvero in parallelo.
+
+Replica in memoria opzionale dell'intero database (database.memory_replica): le letture
+non toccano il file, che viene ricopiato solo quando cambia la versione dati.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # backend analitico opzionale
+    duckdb = None
+
+ANALYTICS_BACKENDS = ('sqlite', 'duckdb')
+
+# Tabelle copiate nel backend DuckDB (quelle usate dalle query aggregate del dashboard)
+ANALYTICS_TABLES = ('laps', 'sessions', 'session_results', 'drivers', 'competitions', 'championships',
+                    'competition_standings', 'championship_standings')
+# Aggregati delle leghe archiviate (presenti solo dopo acc_archive.py)
+OPTIONAL_ANALYTICS_TABLES = ('archive_track_bests', 'archive_driver_honours')
+
+# Tabelle senza le quali il dashboard non può funzionare
+REQUIRED_TABLES = ('drivers', 'sessions', 'championships')
+
+META_SCHEMA = 'CREATE TABLE IF NOT EXISTS dashboard_meta (key TEXT PRIMARY KEY, value TEXT)'
+DATA_VERSION_KEY = 'data_version'
+
+# Secondi tra due controlli della versione dati della replica in memoria all'apertura delle connessioni
+REPLICA_CHECK_INTERVAL = 1.0
+
+# Indici delle query del dashboard sulle tabelle grandi (race trace, risultati per sessione):
+# li crea l'importer e acc_swap li aggiunge al database pubblicato se mancano
+QUERY_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS "idx_laps_session_driver" ON "laps" ("session_id", "driver_id", "lap_number")',
+    'CREATE INDEX IF NOT EXISTS "idx_session_results_session" ON "session_results" ("session_id")',
+)
+
+# Thread worker di un QueryExecutor che sta eseguendo un task (di qualsiasi pool)
+_worker_state = threading.local()
+
+# Ultima versione dati letta per database, con lo stat dei file da cui è stata letta
+_data_versions: Dict[str, tuple] = {}
+
+
+def bump_data_version(conn: sqlite3.Connection) -> int:
+    """Incrementa il contatore versione dati (da chiamare dentro la transazione di scrittura)"""
+    conn.execute(META_SCHEMA)
+    conn.execute('''
+        INSERT INTO dashboard_meta (key, value) VALUES (?, '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+    ''', (DATA_VERSION_KEY,))
+    return int(conn.execute('SELECT value FROM dashboard_meta WHERE key = ?', (DATA_VERSION_KEY,)).fetchone()[0])
+
+
+def ensure_query_indexes(conn: sqlite3.Connection) -> List[str]:
+    """Crea gli indici di QUERY_INDEXES mancanti; ritorna i nomi di quelli creati"""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    created = []
+    for statement in QUERY_INDEXES:
+        name = statement.split('"')[1]
+        if name not in existing:
+            conn.execute(statement)
+            created.append(name)
+    return created
+
+
+def read_data_counter(conn: sqlite3.Connection) -> int:
+    """Contatore versione dati (0 se il database non è mai passato dall'importer)"""
+    try:
+        row = conn.execute('SELECT value FROM dashboard_meta WHERE key = ?', (DATA_VERSION_KEY,)).fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0]) if row else 0
+
+
+def in_query_worker() -> bool:
+    """True se il thread corrente è un worker di QueryExecutor con un task in corso.
+    Chi attende un risultato calcolato da altri non deve farlo da un worker: l'esecuzione
+    attesa potrebbe avere i propri task in coda dietro a quello stesso worker"""
+    return getattr(_worker_state, 'busy', False)
+
+
+def get_file_identity(db_path: str) -> str:
+    """Identità del file (device e inode): cambia solo quando il database viene sostituito"""
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return '0:0'
+    return f"{stat.st_dev}:{stat.st_ino}"
+
+
+def get_data_version(db_path: str) -> str:
+    """Versione dati del database: contatore importer + inode, mtime e dimensione del file.
+    Il contatore è riletto solo quando cambia lo stat del file (o del -wal, dove finiscono
+    le scritture in modalità WAL): una versione invariata costa due stat, non una connessione"""
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return '0:0:0:0'
+    try:
+        wal_stat = os.stat(f"{db_path}-wal")
+        wal_key = (wal_stat.st_ino, wal_stat.st_mtime_ns, wal_stat.st_size)
+    except OSError:
+        wal_key = None
+    stat_key = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size, wal_key)
+
+    cached = _data_versions.get(db_path)
+    if cached is not None and cached[0] == stat_key:
+        return cached[1]
+
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            counter = read_data_counter(conn)
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        # Database illeggibile (es. in sostituzione): versione non memorizzata, si riprova alla prossima
+        return f"0:{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    version = f"{counter}:{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}"
+    _data_versions[db_path] = (stat_key, version)
+    return version
+
+
+class SQLiteAnalytics:
+    """Backend analitico di default: una connessione SQLite per query"""
+
+    name = 'sqlite'
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def query(self, sql: str, params: Optional[List] = None) -> pd.DataFrame:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return pd.read_sql_query(sql, conn, params=params or [])
+        finally:
+            conn.close()
+
+
+class DuckDBAnalytics:
+    """Backend analitico DuckDB su una copia colonnare delle tabelle, allineata alla versione dati"""
+
+    name = 'duckdb'
+
+    def __init__(self, db_path: str, threads: Optional[int] = None):
+        if duckdb is None:
+            raise ImportError("DuckDB backend requires the duckdb package (pip install duckdb)")
+        self.db_path = db_path
+        self.conn = duckdb.connect()
+        if threads:
+            self.conn.execute(f"SET threads = {int(threads)}")
+        self.data_version = None
+        self.lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Ricarica le tabelle se la versione dati è cambiata (True se ricaricate)"""
+        data_version = get_data_version(self.db_path)
+        if data_version == self.data_version:
+            return False
+
+        with self.lock:
+            if data_version == self.data_version:
+                return False
+            source = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            try:
+                existing = {row[0] for row in source.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+                tables = ANALYTICS_TABLES + tuple(t for t in OPTIONAL_ANALYTICS_TABLES if t in existing)
+                for table in tables:
+                    df = pd.read_sql_query(f'SELECT * FROM "{table}"', source)
+                    self.conn.register('snapshot_df', df)
+                    self.conn.execute(f'CREATE OR REPLACE TABLE "{table}" AS SELECT * FROM snapshot_df')
+                    self.conn.unregister('snapshot_df')
+            finally:
+                source.close()
+            self.data_version = data_version
+        return True
+
+    def query(self, sql: str, params: Optional[List] = None) -> pd.DataFrame:
+        self.refresh()
+        # Un cursore per query: le connessioni DuckDB non vanno condivise tra thread
+        cursor = self.conn.cursor()
+        try:
+            df = cursor.execute(sql, params or []).df()
+        finally:
+            cursor.close()
+        return self.normalize(df)
+
+    @staticmethod
+    def normalize(df: pd.DataFrame) -> pd.DataFrame:
+        """Riporta i tipi a quelli restituiti da SQLite (booleani come interi)"""
+        for column in df.columns:
+            if pd.api.types.is_bool_dtype(df[column]):
+                df[column] = df[column].astype(int)
+        return df
+
+
+def get_analytics_backend(db_path: str, name: str = 'sqlite'):
+    """Crea il backend analitico richiesto ('sqlite' o 'duckdb')"""
+    if name == 'duckdb':
+        return DuckDBAnalytics(db_path)
+    if name != 'sqlite':
+        raise ValueError(f"Unknown analytics backend: {name} (available: {', '.join(ANALYTICS_BACKENDS)})")
+    return SQLiteAnalytics(db_path)
+
+
+class MemoryReplica:
+    """Copia in memoria dell'intero database (VFS memdb di SQLite), allineata alla versione dati.
+
+    Ogni versione è copiata con l'API di backup in un nuovo database memdb condiviso nel
+    processo: le connessioni nuove aprono l'ultima copia, quelle già aperte finiscono sulla
+    precedente, che SQLite libera alla chiusura dell'ultima connessione. A differenza della
+    cache condivisa (cache=shared) memdb usa i lock normali, quindi i lettori non si serializzano.
+    Sopra max_bytes la copia non viene fatta e le connessioni leggono dal file.
+    La versione dati si controlla al più ogni REPLICA_CHECK_INTERVAL secondi all'apertura
+    delle connessioni (refresh() la controlla sempre, es. una volta per script run).
+    """
+
+    def __init__(self, db_path: str, max_bytes: int):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.data_version = None
+        self.uri = None
+        self.fallback_reason = None
+        self._keeper = None
+        self._generation = 0
+        self._checked_at = 0.0
+        # lock protegge la copia pubblicata (uri e keeper), _copy_lock serializza le ricopie:
+        # durante la copia le connessioni continuano ad aprirsi sulla versione precedente
+        self.lock = threading.Lock()
+        self._copy_lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Ricopia il database se la versione dati è cambiata (True se ricopiato o disattivato)"""
+        self._checked_at = time.monotonic()
+        data_version = get_data_version(self.db_path)
+        if data_version == self.data_version:
+            return False
+
+        with self._copy_lock:
+            if data_version == self.data_version:
+                return False
+            size = os.path.getsize(self.db_path)
+            if size > self.max_bytes:
+                self._publish(None, None)
+                self.fallback_reason = (f"database is {size / 1024 / 1024:.0f} MB, above the "
+                                        f"{self.max_bytes / 1024 / 1024:.0f} MB memory replica limit")
+            else:
+                self._generation += 1
+                uri = f"file:/acc_replica_{id(self)}_{self._generation}?vfs=memdb"
+                # La connessione che riceve la copia tiene in vita il database memdb
+                keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                source = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+                try:
+                    source.backup(keeper)
+                except sqlite3.Error:
+                    keeper.close()
+                    raise
+                finally:
+                    source.close()
+                self._publish(keeper, f"{uri}&mode=ro")
+                self.fallback_reason = None
+            self.data_version = data_version
+        return True
+
+    def _publish(self, keeper: Optional[sqlite3.Connection], uri: Optional[str]):
+        """Sostituisce la copia servita; la precedente resta a chi la sta ancora leggendo"""
+        with self.lock:
+            previous = self._keeper
+            self._keeper, self.uri = keeper, uri
+            if previous is not None:
+                previous.close()
+
+    def check(self) -> bool:
+        """refresh() se sono passati almeno REPLICA_CHECK_INTERVAL secondi dall'ultimo controllo"""
+        if time.monotonic() - self._checked_at < REPLICA_CHECK_INTERVAL:
+            return False
+        return self.refresh()
+
+    def connect(self) -> sqlite3.Connection:
+        """Connessione in lettura all'ultima copia (al file se la replica è disattivata).
+        uri e apertura sotto lock: un _publish concorrente non può liberare la copia nel frattempo"""
+        self.check()
+        with self.lock:
+            if self.uri is None:
+                return sqlite3.connect(self.db_path)
+            return sqlite3.connect(self.uri, uri=True)
+
+
+class QueryExecutor:
+    """Thread pool per query indipendenti, con una connessione in lettura per worker.
+
+    I task sono funzioni che ricevono la connessione del worker; i risultati sono raccolti
+    tutti prima di tornare, così la latenza è quella del task più lento e non la somma.
+    Le connessioni dei worker restano aperte tra una pagina e l'altra (vedono comunque
+    i dati appena scritti) e vengono riaperte tra un task e l'altro quando cambia
+    l'identità del file, cioè quando il database è stato sostituito.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], max_workers: int = 4):
+        self._connect = connect
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='acc-query')
+
+    def _connection(self, file_identity: Optional[str]) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.file_identity != file_identity:
+            conn.close()
+            conn = None
+        if conn is None:
+            conn = self._connect()
+            conn.execute('PRAGMA query_only = ON')
+            self._local.conn = conn
+            self._local.file_identity = file_identity
+        return conn
+
+    def _execute(self, task: Callable[[sqlite3.Connection], Any], file_identity: Optional[str]) -> Any:
+        self._local.busy = True
+        _worker_state.busy = True
+        try:
+            return task(self._connection(file_identity))
+        finally:
+            self._local.busy = False
+            _worker_state.busy = False
+
+    def run(self, tasks: Dict[str, Callable[[sqlite3.Connection], Any]], file_identity: Optional[str] = None,
+            return_exceptions: bool = False) -> Dict[str, Any]:
+        """Esegue i task in parallelo e ritorna i risultati per nome.
+
+        Con return_exceptions le eccezioni sono restituite come risultati, altrimenti
+        viene rilanciata la prima (dopo aver atteso tutti i task).
+        """
+        outcomes = {}
+        if getattr(self._local, 'busy', False):
+            # Chiamata da un task già in esecuzione su un worker: in linea, per non saturare il pool,
+            # e sulla connessione del task esterno (riaprirla per un'altra identità chiuderebbe
+            # quella che il task esterno sta ancora usando)
+            conn = self._local.conn
+            for name, task in tasks.items():
+                try:
+                    outcomes[name] = task(conn)
+                except Exception as e:
+                    outcomes[name] = e
+        else:
+            futures = {name: self._pool.submit(self._execute, task, file_identity) for name, task in tasks.items()}
+            for name, future in futures.items():
+                try:
+                    outcomes[name] = future.result()
+                except Exception as e:
+                    outcomes[name] = e
+
+        if not return_exceptions:
+            for outcome in outcomes.values():
+                if isinstance(outcome, Exception):
+                    raise outcome
+        return outcomes
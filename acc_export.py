@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+ACC Export - Export colonnare Parquet dei dati ACC
+Scrive sessions, session_results e laps partizionati per lega/stagione/pista e le
+classifiche partizionate per lega/stagione, con tipi compatti e nomi dictionary-encoded.
+L'export è incrementale: un manifest conserva l'impronta di ogni partizione (piloti compresi) e si
+riscrivono solo quelle cambiate. Richiede pyarrow (già dipendenza di Streamlit).
+
+Uso:
+    python acc_export.py [--db acc_stats.db] [--out exports/parquet] [--full]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+MANIFEST_FILE = '_manifest.json'
+MANIFEST_VERSION = 2
+
+# Partizioni per gruppo di tabelle
+SESSION_TABLES = ('sessions', 'session_results', 'laps')
+STANDINGS_TABLES = ('competition_standings', 'championship_standings')
+
+# Partizioni scritte per blocco (limita la memoria negli export completi)
+PARTITIONS_PER_CHUNK = 50
+
+# Lega/stagione di ogni sessione (sessioni senza competizione: lega 0, stagione = anno)
+SESSION_PARTITIONS_QUERY = '''
+    SELECT
+        s.session_id,
+        COALESCE(ch.league_id, 0) as league,
+        COALESCE(ch.season, CAST(strftime('%Y', s.session_date) AS INTEGER)) as season,
+        s.track_name as track,
+        COALESCE(s.processed_at, '') as processed_at,
+        COALESCE(s.competition_id, 0) as competition_id,
+        COALESCE(s.total_drivers, 0) as total_drivers
+    FROM sessions s
+    LEFT JOIN competitions c ON s.competition_id = c.competition_id
+    LEFT JOIN championships ch ON c.championship_id = ch.championship_id
+'''
+
+SESSION_LAP_COUNTS_QUERY = '''
+    SELECT session_id, COUNT(*) as laps, MAX(id) as max_lap_id
+    FROM laps
+    GROUP BY session_id
+'''
+
+# Campi dei piloti copiati negli export (nome, trust level)
+DRIVER_FIELDS_QUERY = '''
+    SELECT driver_id, last_name, trust_level
+    FROM drivers
+'''
+
+# Piloti di ogni sessione: i giri hanno sempre un risultato, quindi basta session_results
+SESSION_DRIVERS_QUERY = '''
+    SELECT session_id, driver_id
+    FROM session_results
+'''
+
+STANDINGS_DRIVERS_QUERY = '''
+    SELECT COALESCE(ch.league_id, 0) as league, COALESCE(ch.season, 0) as season, cs.driver_id
+    FROM competition_standings cs
+    JOIN competitions c ON cs.competition_id = c.competition_id
+    JOIN championships ch ON c.championship_id = ch.championship_id
+    UNION
+    SELECT COALESCE(ch.league_id, 0) as league, COALESCE(ch.season, 0) as season, cs.driver_id
+    FROM championship_standings cs
+    JOIN championships ch ON cs.championship_id = ch.championship_id
+'''
+
+STANDINGS_FINGERPRINT_QUERY = '''
+    SELECT
+        COALESCE(ch.league_id, 0) as league,
+        COALESCE(ch.season, 0) as season,
+        (SELECT COUNT(*) || ':' || COALESCE(SUM(cs.total_points), 0) || ':' || COALESCE(MAX(cs.updated_at), '')
+         FROM competition_standings cs
+         JOIN competitions c ON cs.competition_id = c.competition_id
+         WHERE c.championship_id = ch.championship_id) as competition_part,
+        (SELECT COUNT(*) || ':' || COALESCE(SUM(cs.total_points), 0) || ':' || COALESCE(MAX(cs.last_updated), '')
+         FROM championship_standings cs
+         WHERE cs.championship_id = ch.championship_id) as championship_part
+    FROM championships ch
+'''
+
+TABLE_QUERIES = {
+    'sessions': '''
+        SELECT s.session_id, s.filename, s.session_type, s.track_name, s.server_name, s.session_date,
+               s.best_lap_overall, s.best_split1, s.best_split2, s.best_split3, s.total_drivers,
+               s.is_wet_session, s.competition_id, s.session_order, s.is_time_attack
+        FROM sessions s
+        JOIN export_sessions e ON s.session_id = e.session_id
+    ''',
+    'session_results': '''
+        SELECT sr.session_id, sr.driver_id, d.last_name as driver, sr.position, sr.car_id, sr.race_number,
+               sr.car_model, sr.cup_category, sr.best_lap, sr.best_split1, sr.best_split2, sr.best_split3,
+               sr.total_time, sr.lap_count, sr.missing_mandatory_pitstop
+        FROM session_results sr
+        JOIN export_sessions e ON sr.session_id = e.session_id
+        LEFT JOIN drivers d ON sr.driver_id = d.driver_id
+    ''',
+    'laps': '''
+        SELECT l.id, l.session_id, l.driver_id, d.last_name as driver, d.trust_level, l.car_id, l.lap_time,
+               l.is_valid_for_best, l.split1, l.split2, l.split3, l.lap_number,
+               s.session_date, s.competition_id, s.is_wet_session, s.is_time_attack
+        FROM laps l
+        JOIN export_sessions e ON l.session_id = e.session_id
+        JOIN sessions s ON l.session_id = s.session_id
+        LEFT JOIN drivers d ON l.driver_id = d.driver_id
+    ''',
+    'competition_standings': '''
+        SELECT COALESCE(ch.league_id, 0) as league, COALESCE(ch.season, 0) as season,
+               c.championship_id, cs.competition_id, cs.driver_id, d.last_name as driver,
+               cs.race_points, cs.pole_points, cs.fastest_lap_points, cs.time_attack_points,
+               cs.points_bonus, cs.points_dropped, cs.total_points, cs.guests_beaten, cs.beaten_by_guests
+        FROM competition_standings cs
+        JOIN competitions c ON cs.competition_id = c.competition_id
+        JOIN championships ch ON c.championship_id = ch.championship_id
+        LEFT JOIN drivers d ON cs.driver_id = d.driver_id
+    ''',
+    'championship_standings': '''
+        SELECT COALESCE(ch.league_id, 0) as league, COALESCE(ch.season, 0) as season,
+               cs.championship_id, cs.driver_id, d.last_name as driver, cs.gross_points, cs.points_dropped,
+               cs.base_points, cs.participation_multiplier, cs.participation_bonus, cs.total_points,
+               cs.position, cs.competitions_participated, cs.wins, cs.podiums, cs.poles, cs.fastest_laps
+        FROM championship_standings cs
+        JOIN championships ch ON cs.championship_id = ch.championship_id
+        LEFT JOIN drivers d ON cs.driver_id = d.driver_id
+    ''',
+}
+
+# Tipi compatti per colonna (le stringhe ripetute diventano categoriche -> dictionary encoding)
+COLUMN_DTYPES = {
+    'session_id': 'category', 'driver_id': 'category', 'driver': 'category', 'filename': 'string',
+    'session_type': 'category', 'track_name': 'category', 'server_name': 'category',
+    'position': 'Int16', 'car_id': 'Int16', 'race_number': 'Int16', 'car_model': 'Int16',
+    'cup_category': 'Int8', 'trust_level': 'Int8', 'lap_count': 'Int16', 'lap_number': 'Int32',
+    'total_drivers': 'Int16', 'session_order': 'Int8', 'competition_id': 'Int32', 'championship_id': 'Int32',
+    'id': 'int64', 'lap_time': 'Int32', 'best_lap': 'Int32', 'best_lap_overall': 'Int32', 'total_time': 'Int64',
+    'split1': 'Int32', 'split2': 'Int32', 'split3': 'Int32',
+    'best_split1': 'Int32', 'best_split2': 'Int32', 'best_split3': 'Int32',
+    'is_valid_for_best': 'boolean', 'is_wet_session': 'boolean', 'is_time_attack': 'boolean',
+    'missing_mandatory_pitstop': 'Int8',
+    'race_points': 'float32', 'pole_points': 'float32', 'fastest_lap_points': 'float32',
+    'time_attack_points': 'float32', 'points_bonus': 'float32', 'points_dropped': 'float32',
+    'total_points': 'float32', 'gross_points': 'float32', 'base_points': 'float32',
+    'participation_multiplier': 'float32', 'participation_bonus': 'float32',
+    'guests_beaten': 'Int16', 'beaten_by_guests': 'Int16', 'competitions_participated': 'Int16',
+    'wins': 'Int16', 'podiums': 'Int16', 'poles': 'Int16', 'fastest_laps': 'Int16',
+}
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Applica i tipi compatti dell'export"""
+    for column, dtype in COLUMN_DTYPES.items():
+        if column in df:
+            df[column] = df[column].astype(dtype)
+    if 'session_date' in df:
+        df['session_date'] = pd.to_datetime(df['session_date'], errors='coerce')
+    return df
+
+
+def partition_path(league, season, track: Optional[str] = None) -> str:
+    """Percorso partizione in stile hive (league=2/season=2025/track=monza)"""
+    path = f"league={league}/season={season}"
+    return f"{path}/track={track}" if track is not None else path
+
+
+def fingerprint(values) -> str:
+    """Impronta breve di una partizione"""
+    return hashlib.md5('|'.join(map(str, values)).encode('utf-8')).hexdigest()
+
+
+def driver_prints(partition_drivers: pd.DataFrame, driver_fields: pd.Series) -> Dict[str, str]:
+    """Impronta dei piloti di ogni partizione: un pilota rinominato (o con trust level cambiato)
+    fa riscrivere le partizioni in cui compare, perché nome e trust level sono copiati negli export"""
+    pairs = partition_drivers[['partition', 'driver_id']].drop_duplicates()
+    pairs = pairs.assign(fields=pairs['driver_id'].map(driver_fields).fillna(''))
+    return {partition: fingerprint(sorted(fields)) for partition, fields in pairs.groupby('partition')['fields']}
+
+
+class ParquetExporter:
+    """Export incrementale del database in Parquet partizionato"""
+
+    def __init__(self, db_path: str, export_dir: str):
+        self.db_path = db_path
+        self.export_dir = Path(export_dir)
+        self.manifest_path = self.export_dir / MANIFEST_FILE
+
+    def load_manifest(self) -> Dict:
+        """Manifest dell'export precedente (vuoto se assente o di versione diversa)"""
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {'version': MANIFEST_VERSION, 'partitions': {'sessions': {}, 'standings': {}}}
+
+    def session_partitions(self, conn: sqlite3.Connection) -> pd.DataFrame:
+        """Partizione e impronta di ogni sessione"""
+        sessions = pd.read_sql_query(SESSION_PARTITIONS_QUERY, conn)
+        lap_counts = pd.read_sql_query(SESSION_LAP_COUNTS_QUERY, conn)
+        sessions = sessions.merge(lap_counts, on='session_id', how='left').fillna({'laps': 0, 'max_lap_id': 0})
+        sessions['partition'] = [
+            partition_path(league, season, track)
+            for league, season, track in zip(sessions['league'], sessions['season'], sessions['track'])
+        ]
+        return sessions
+
+    def write_partition(self, table: str, partition: str, df: pd.DataFrame):
+        """Scrive una partizione in modo atomico (file temporaneo + rename)"""
+        target_dir = self.export_dir / table / partition
+        target_dir.mkdir(parents=True, exist_ok=True)
+        target = target_dir / 'part-0.parquet'
+        temp = target_dir / 'part-0.parquet.tmp'
+        df.to_parquet(temp, engine='pyarrow', compression='zstd', index=False)
+        os.replace(temp, target)
+
+    def remove_partition(self, table: str, partition: str):
+        """Elimina una partizione non più presente nel database"""
+        shutil.rmtree(self.export_dir / table / partition, ignore_errors=True)
+
+    def export_session_tables(self, conn: sqlite3.Connection, sessions: pd.DataFrame, partitions: List[str]):
+        """Riscrive sessions/session_results/laps per le partizioni indicate, a blocchi"""
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS export_sessions (session_id TEXT PRIMARY KEY, partition TEXT)')
+
+        for start in range(0, len(partitions), PARTITIONS_PER_CHUNK):
+            chunk = set(partitions[start:start + PARTITIONS_PER_CHUNK])
+            chunk_sessions = sessions[sessions['partition'].isin(chunk)]
+
+            conn.execute('DELETE FROM export_sessions')
+            conn.executemany('INSERT INTO export_sessions VALUES (?, ?)',
+                             chunk_sessions[['session_id', 'partition']].itertuples(index=False))
+            partition_of = chunk_sessions.set_index('session_id')['partition']
+
+            for table in SESSION_TABLES:
+                df = compact_frame(pd.read_sql_query(TABLE_QUERIES[table], conn))
+                df_partition = df['session_id'].astype(str).map(partition_of)
+                for partition in chunk:
+                    self.write_partition(table, partition, df[df_partition == partition].reset_index(drop=True))
+
+    def export_standings(self, conn: sqlite3.Connection, partitions: List[str]):
+        """Riscrive le classifiche per le partizioni lega/stagione indicate"""
+        for table in STANDINGS_TABLES:
+            df = compact_frame(pd.read_sql_query(TABLE_QUERIES[table], conn))
+            df_partition = [partition_path(league, season) for league, season in zip(df['league'], df['season'])]
+            df = df.assign(partition=df_partition)
+            for partition in partitions:
+                part_df = df[df['partition'] == partition].drop(columns=['league', 'season', 'partition'])
+                self.write_partition(table, partition, part_df.reset_index(drop=True))
+
+    def export(self, full: bool = False) -> Dict:
+        """Esporta le partizioni cambiate dall'ultimo export (tutte con full=True)"""
+        start = time.perf_counter()
+        manifest = {'version': MANIFEST_VERSION, 'partitions': {'sessions': {}, 'standings': {}}} if full else self.load_manifest()
+
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            sessions = self.session_partitions(conn)
+            # Impronta dei campi di ogni pilota, combinata poi per partizione
+            drivers = pd.read_sql_query(DRIVER_FIELDS_QUERY, conn)
+            driver_fields = pd.Series([fingerprint(row) for row in drivers.itertuples(index=False)],
+                                      index=drivers['driver_id'])
+            session_drivers = pd.read_sql_query(SESSION_DRIVERS_QUERY, conn).merge(
+                sessions[['session_id', 'partition']], on='session_id')
+            session_driver_prints = driver_prints(session_drivers, driver_fields)
+            session_prints = {
+                partition: fingerprint([*group.sort_values('session_id')[
+                    ['session_id', 'processed_at', 'competition_id', 'total_drivers', 'laps', 'max_lap_id']
+                ].itertuples(index=False), session_driver_prints.get(partition, '')])
+                for partition, group in sessions.groupby('partition')
+            }
+
+            standings = pd.read_sql_query(STANDINGS_FINGERPRINT_QUERY, conn)
+            standings['partition'] = [partition_path(league, season) for league, season in zip(standings['league'], standings['season'])]
+            standings_drivers = pd.read_sql_query(STANDINGS_DRIVERS_QUERY, conn)
+            standings_drivers['partition'] = [partition_path(league, season) for league, season in
+                                              zip(standings_drivers['league'], standings_drivers['season'])]
+            standings_driver_prints = driver_prints(standings_drivers, driver_fields)
+            standings_prints = {
+                partition: fingerprint([*group[['competition_part', 'championship_part']].itertuples(index=False),
+                                        standings_driver_prints.get(partition, '')])
+                for partition, group in standings.groupby('partition')
+            }
+
+            previous_sessions = manifest['partitions'].get('sessions', {})
+            previous_standings = manifest['partitions'].get('standings', {})
+            changed_sessions = sorted(p for p, fp in session_prints.items() if previous_sessions.get(p) != fp)
+            changed_standings = sorted(p for p, fp in standings_prints.items() if previous_standings.get(p) != fp)
+
+            if changed_sessions:
+                self.export_session_tables(conn, sessions, changed_sessions)
+            if changed_standings:
+                self.export_standings(conn, changed_standings)
+        finally:
+            conn.close()
+
+        removed = 0
+        for partition in set(previous_sessions) - set(session_prints):
+            for table in SESSION_TABLES:
+                self.remove_partition(table, partition)
+            removed += 1
+        for partition in set(previous_standings) - set(standings_prints):
+            for table in STANDINGS_TABLES:
+                self.remove_partition(table, partition)
+            removed += 1
+
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'exported_at': datetime.now().isoformat(timespec='seconds'),
+            'partitions': {'sessions': session_prints, 'standings': standings_prints},
+        }
+        temp = self.manifest_path.with_suffix('.tmp')
+        temp.write_text(json.dumps(manifest, indent=1), encoding='utf-8')
+        os.replace(temp, self.manifest_path)
+
+        return {
+            'session_partitions': len(session_prints),
+            'standings_partitions': len(standings_prints),
+            'written': len(changed_sessions) + len(changed_standings),
+            'removed': removed,
+            'elapsed': time.perf_counter() - start,
+        }
+
+
+def has_export(export_dir: Optional[str]) -> bool:
+    """True se la cartella contiene un export completo"""
+    return bool(export_dir) and (Path(export_dir) / MANIFEST_FILE).exists() and (Path(export_dir) / 'laps').is_dir()
+
+
+def read_laps(export_dir: str, track_name: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Legge i giri esportati (con filtro pista applicato alle partizioni)"""
+    filters = [('track', '==', track_name)] if track_name else None
+    return pd.read_parquet(Path(export_dir) / 'laps', engine='pyarrow', columns=columns, filters=filters)
+
+
+def load_driver_lap_trend(export_dir: str, driver_id: str, track_name: str) -> pd.DataFrame:
+    """Miglior giro per competizione del pilota su una pista (stesso risultato della query SQL del dashboard)"""
+    laps = read_laps(export_dir, track_name, columns=['driver_id', 'lap_time', 'is_valid_for_best', 'session_date',
+                                                      'competition_id', 'is_wet_session'])
+    laps = laps[
+        (laps['driver_id'] == driver_id)
+        & (laps['is_valid_for_best'] == True)
+        & (laps['lap_time'] > 0)
+        & (laps['is_wet_session'] != True)
+        & laps['competition_id'].notna()
+    ]
+    if laps.empty:
+        return pd.DataFrame(columns=['competition_id', 'session_date', 'best_lap'])
+
+    trend = laps.groupby('competition_id', observed=True).agg(
+        session_date=('session_date', 'max'),
+        best_lap=('lap_time', 'min'),
+    ).reset_index()
+    trend['competition_id'] = trend['competition_id'].astype(int)
+    trend['session_date'] = trend['session_date'].dt.strftime('%Y-%m-%d')
+    trend['best_lap'] = trend['best_lap'].astype(int)
+    return trend.sort_values('session_date').reset_index(drop=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Esporta il database ACC in Parquet partizionato")
+    parser.add_argument('--db', default=os.getenv('ACC_DATABASE_PATH', 'acc_stats.db'), help="Percorso database")
+    parser.add_argument('--out', default=os.getenv('ACC_PARQUET_DIR', 'exports/parquet'), help="Cartella export")
+    parser.add_argument('--full', action='store_true', help="Riscrive tutte le partizioni")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"❌ Database not found: {args.db}")
+        return 1
+
+    stats = ParquetExporter(args.db, args.out).export(full=args.full)
+    print(f"✅ {stats['written']} partitions written, {stats['removed']} removed "
+          f"({stats['session_partitions']} session + {stats['standings_partitions']} standings partitions) "
+          f"in {stats['elapsed']:.2f}s -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
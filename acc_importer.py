@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+ACC Importer - Importazione file risultati del server ACC
+Legge i file JSON dei risultati (UTF-16 o UTF-8) e scrive sessions, session_results,
+laps, penalties, drivers e synced_files. Il parsing gira in un pool di processi che
+restituisce righe già pronte; il processo principale le inserisce con executemany
+in transazioni da molti file.
+
+In modalità --watch la cartella viene riscansionata periodicamente e si importano
+solo i file nuovi o modificati rispetto a synced_files (dimensione e hash).
+
+Uso:
+    python acc_importer.py CARTELLA_RISULTATI [--db acc_stats.db] [--workers N] [--replace]
+    python acc_importer.py CARTELLA_RISULTATI --watch [--interval 30]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from acc_db import QUERY_INDEXES, bump_data_version
+
+# Nome file ACC: AAMMGG_HHMMSS_TIPO.json (es. 240110_232709_R.json, 260429_220311_FP2.json)
+SESSION_FILE_RE = re.compile(r'^(\d{6})_(\d{6})_([A-Z]+\d*)$')
+
+# Tag competizione nel nome server (es. "Official Race (id_race=101)", "TIME ATTACK (id_ta=97)")
+COMPETITION_TAG_RE = re.compile(r'id_(race|ta)=(\d+)')
+
+# Giro/split non valido nei file ACC
+ACC_INVALID_TIME = 2147483647
+
+# File per transazione
+FILES_PER_TRANSACTION = 200
+
+# Sotto questa soglia l'hashing resta nel processo principale
+MIN_FILES_FOR_HASH_POOL = 32
+
+# Hash file come li scrive il manager (MD5 esadecimale); gli import storici hanno segnaposto come 'local_file'
+FILE_HASH_RE = re.compile(r'^[0-9a-f]{32}$')
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS "sessions" (
+        "session_id" TEXT, "filename" TEXT NOT NULL UNIQUE, "session_type" TEXT NOT NULL,
+        "track_name" TEXT NOT NULL, "server_name" TEXT, "session_date" TIMESTAMP NOT NULL,
+        "best_lap_overall" INTEGER, "best_split1" INTEGER, "best_split2" INTEGER, "best_split3" INTEGER,
+        "total_drivers" INTEGER, "is_wet_session" BOOLEAN DEFAULT FALSE, "metadata" TEXT,
+        "competition_id" INTEGER, "session_order" INTEGER, "is_autoassign_comp" BOOLEAN DEFAULT TRUE,
+        "processed_at" TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "is_time_attack" BOOLEAN DEFAULT 0,
+        PRIMARY KEY("session_id")
+    )''',
+    '''CREATE TABLE IF NOT EXISTS "session_results" (
+        "id" INTEGER, "session_id" TEXT NOT NULL, "driver_id" TEXT NOT NULL, "position" INTEGER,
+        "car_id" INTEGER, "race_number" INTEGER, "car_model" INTEGER, "cup_category" INTEGER,
+        "best_lap" INTEGER, "best_split1" INTEGER, "best_split2" INTEGER, "best_split3" INTEGER,
+        "total_time" INTEGER, "lap_count" INTEGER, "is_spectator" BOOLEAN DEFAULT FALSE,
+        "missing_mandatory_pitstop" BOOLEAN DEFAULT FALSE,
+        PRIMARY KEY("id" AUTOINCREMENT)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS "laps" (
+        "id" INTEGER, "session_id" TEXT NOT NULL, "driver_id" TEXT NOT NULL, "car_id" INTEGER NOT NULL,
+        "lap_time" INTEGER NOT NULL, "is_valid_for_best" BOOLEAN, "split1" INTEGER, "split2" INTEGER,
+        "split3" INTEGER, "lap_number" INTEGER,
+        PRIMARY KEY("id" AUTOINCREMENT)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS "penalties" (
+        "id" INTEGER, "session_id" TEXT NOT NULL, "driver_id" TEXT NOT NULL, "car_id" INTEGER NOT NULL,
+        "reason" TEXT NOT NULL, "penalty_type" TEXT NOT NULL, "penalty_value" INTEGER,
+        "violation_lap" INTEGER, "cleared_lap" INTEGER, "is_post_race" BOOLEAN DEFAULT FALSE,
+        PRIMARY KEY("id" AUTOINCREMENT)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS "drivers" (
+        "driver_id" TEXT, "last_name" TEXT NOT NULL, "short_name" TEXT, "preferred_race_number" INTEGER,
+        "first_seen" TIMESTAMP, "last_seen" TIMESTAMP, "total_sessions" INTEGER DEFAULT 0,
+        "bad_driver_reports" INTEGER DEFAULT 0,
+        "trust_level" INTEGER DEFAULT 0 CHECK("trust_level" IN (0, 1, 2)),
+        PRIMARY KEY("driver_id")
+    )''',
+    '''CREATE TABLE IF NOT EXISTS "synced_files" (
+        "filename" TEXT, "file_hash" TEXT NOT NULL, "file_size" INTEGER, "remote_path" TEXT,
+        "synced_at" TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "deleted_from_server" BOOLEAN DEFAULT FALSE,
+        "backup_created" BOOLEAN DEFAULT FALSE, "session_info" TEXT, "processed_in_db" BOOLEAN DEFAULT FALSE,
+        "processed_at" TIMESTAMP, "processing_result" TEXT,
+        PRIMARY KEY("filename")
+    )''',
+    'CREATE INDEX IF NOT EXISTS "idx_session_date" ON "sessions" ("session_date")',
+    'CREATE INDEX IF NOT EXISTS "idx_track_name" ON "sessions" ("track_name")',
+    'CREATE INDEX IF NOT EXISTS "idx_competition_sessions" ON "sessions" ("competition_id")',
+    'CREATE INDEX IF NOT EXISTS "idx_best_laps" ON "laps" ("is_valid_for_best", "lap_time")',
+    *QUERY_INDEXES,
+    'CREATE INDEX IF NOT EXISTS "idx_driver_trust" ON "drivers" ("trust_level")',
+]
+
+SESSION_COLUMNS = ('session_id', 'filename', 'session_type', 'track_name', 'server_name', 'session_date',
+                   'best_lap_overall', 'best_split1', 'best_split2', 'best_split3', 'total_drivers',
+                   'is_wet_session', 'metadata', 'competition_id', 'session_order', 'is_time_attack')
+
+
+def read_result_document(raw: bytes) -> Dict:
+    """Decodifica un file risultati ACC (il server scrive UTF-16 LE, gli export manuali UTF-8)"""
+    if raw[:2] in (b'\xff\xfe', b'\xfe\xff') or (len(raw) > 1 and raw[1:2] == b'\x00'):
+        text = raw.decode('utf-16')
+    else:
+        text = raw.decode('utf-8-sig')
+    return json.loads(text)
+
+
+def split_time(splits: List, index: int) -> Optional[int]:
+    """Split i-esimo (None se mancante o non valido)"""
+    if splits and len(splits) > index and splits[index] != ACC_INVALID_TIME:
+        return splits[index]
+    return None
+
+
+def parse_result_file(path: str) -> Dict:
+    """Converte un file risultati in righe pronte per executemany (eseguita nei processi worker)"""
+    file_path = Path(path)
+    match = SESSION_FILE_RE.match(file_path.stem)
+    if not match:
+        return {'filename': file_path.name, 'error': 'unrecognized filename'}
+
+    raw = file_path.read_bytes()
+    file_hash = hashlib.md5(raw).hexdigest()
+    try:
+        document = read_result_document(raw)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        return {'filename': file_path.name, 'file_hash': file_hash, 'file_size': len(raw), 'error': f'invalid json: {e}'}
+
+    date_part, time_part, session_type = match.groups()
+    session_id = file_path.stem
+    try:
+        session_date = datetime.strptime(date_part + time_part, '%y%m%d%H%M%S').isoformat()
+    except ValueError as e:
+        # Nome nel formato giusto ma data/ora impossibile (es. 240110_003999_R): file saltato e segnalato
+        return {'filename': file_path.name, 'file_hash': file_hash, 'file_size': len(raw), 'error': f'invalid date in filename: {e}'}
+    server_name = document.get('serverName', '')
+    result = document.get('sessionResult') or {}
+    leaderboard = result.get('leaderBoardLines') or []
+
+    tag = COMPETITION_TAG_RE.search(server_name or '')
+    competition_id = int(tag.group(2)) if tag else None
+    is_time_attack = 1 if tag and tag.group(1) == 'ta' else 0
+
+    # Pilota per (carId, driverIndex): i giri e le penalità referenziano l'auto
+    car_drivers = {}
+    drivers = {}
+    results = []
+    for position, line in enumerate(leaderboard, start=1):
+        car = line.get('car') or {}
+        car_id = car.get('carId')
+        car_drivers[car_id] = [driver.get('playerId') for driver in car.get('drivers') or []]
+
+        for driver in car.get('drivers') or []:
+            drivers[driver.get('playerId')] = (
+                driver.get('lastName') or driver.get('playerId'),
+                driver.get('shortName') or None,
+                car.get('raceNumber'),
+            )
+
+        current = line.get('currentDriver') or {}
+        timing = line.get('timing') or {}
+        results.append((
+            session_id, current.get('playerId'), position, car_id, car.get('raceNumber'),
+            car.get('carModel'), car.get('cupCategory'), timing.get('bestLap'),
+            split_time(timing.get('bestSplits'), 0), split_time(timing.get('bestSplits'), 1),
+            split_time(timing.get('bestSplits'), 2), timing.get('totalTime'), timing.get('lapCount'),
+            line.get('missingMandatoryPitstop', 0),
+        ))
+
+    def driver_for(car_id, driver_index) -> Optional[str]:
+        players = car_drivers.get(car_id) or []
+        return players[driver_index] if driver_index is not None and driver_index < len(players) else None
+
+    laps = []
+    for lap_number, lap in enumerate(document.get('laps') or [], start=1):
+        driver_id = driver_for(lap.get('carId'), lap.get('driverIndex', 0))
+        if driver_id is None:
+            continue
+        splits = lap.get('splits')
+        laps.append((
+            session_id, driver_id, lap.get('carId'), lap.get('laptime'), 1 if lap.get('isValidForBest') else 0,
+            split_time(splits, 0), split_time(splits, 1), split_time(splits, 2), lap_number,
+        ))
+
+    penalties = []
+    for key, is_post_race in (('penalties', 0), ('post_race_penalties', 1)):
+        for penalty in document.get(key) or []:
+            driver_id = driver_for(penalty.get('carId'), penalty.get('driverIndex', 0))
+            if driver_id is None:
+                continue
+            penalties.append((
+                session_id, driver_id, penalty.get('carId'), penalty.get('reason', ''),
+                penalty.get('penalty', ''), penalty.get('penaltyValue'), penalty.get('violationInLap'),
+                penalty.get('clearedInLap'), is_post_race,
+            ))
+
+    best_splits = result.get('bestSplits')
+    session = (
+        session_id, file_path.name, session_type, document.get('trackName', ''), server_name, session_date,
+        result.get('bestlap'), split_time(best_splits, 0), split_time(best_splits, 1), split_time(best_splits, 2),
+        len(leaderboard), 1 if result.get('isWetSession') else 0, document.get('metaData'),
+        competition_id, (document.get('sessionIndex') or 0) + 1, is_time_attack,
+    )
+
+    return {
+        'filename': file_path.name,
+        'file_hash': file_hash,
+        'file_size': len(raw),
+        'session_date': session_date,
+        'session': session,
+        'results': results,
+        'laps': laps,
+        'penalties': penalties,
+        'drivers': drivers,
+    }
+
+
+class ResultsImporter:
+    """Importa file risultati ACC in un database SQLite"""
+
+    def __init__(self, db_path: str, workers: Optional[int] = None, replace: bool = False):
+        self.db_path = db_path
+        self.workers = workers or os.cpu_count() or 1
+        self.replace = replace
+
+    def connect(self) -> sqlite3.Connection:
+        """Connessione per l'importazione (schema creato se il database è nuovo)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA synchronous = NORMAL')
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        return conn
+
+    def pending_files(self, conn: sqlite3.Connection, paths: Iterable[Path]) -> List[Path]:
+        """File da importare (le sessioni già presenti si saltano se non è richiesto --replace)"""
+        paths = sorted(path for path in paths if SESSION_FILE_RE.match(path.stem))
+        if self.replace:
+            return paths
+        existing = {row[0] for row in conn.execute('SELECT session_id FROM sessions')}
+        return [path for path in paths if path.stem not in existing]
+
+    def parse_files(self, paths: List[Path]) -> Iterator[Dict]:
+        """Parsing parallelo: i risultati arrivano in ordine, un file alla volta"""
+        if self.workers <= 1 or len(paths) < 2:
+            for path in paths:
+                yield parse_result_file(str(path))
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            chunksize = max(1, len(paths) // (self.workers * 4))
+            yield from executor.map(parse_result_file, [str(path) for path in paths], chunksize=chunksize)
+
+    def known_competitions(self, conn: sqlite3.Connection) -> set:
+        """Competizioni esistenti (l'assegnazione automatica usa solo id presenti)"""
+        try:
+            return {row[0] for row in conn.execute('SELECT competition_id FROM competitions')}
+        except sqlite3.OperationalError:
+            return set()
+
+    def write_batch(self, conn: sqlite3.Connection, batch: List[Dict], competitions: set):
+        """Scrive un blocco di file in una sola transazione"""
+        session_ids = [(parsed['session'][0],) for parsed in batch]
+        sessions = []
+        for parsed in batch:
+            session = dict(zip(SESSION_COLUMNS, parsed['session']))
+            if session['competition_id'] not in competitions:
+                session['competition_id'] = None
+                session['session_order'] = None
+            sessions.append(tuple(session.values()))
+
+        drivers = {}
+        for parsed in sorted(batch, key=lambda item: item['session_date']):
+            for driver_id, (last_name, short_name, race_number) in parsed['drivers'].items():
+                if driver_id:
+                    drivers[driver_id] = (driver_id, last_name, short_name, race_number)
+
+        with conn:
+            bump_data_version(conn)
+
+            if self.replace:
+                for table in ('session_results', 'laps', 'penalties'):
+                    conn.executemany(f'DELETE FROM {table} WHERE session_id = ?', session_ids)
+
+            conn.executemany(f'''
+                INSERT INTO sessions ({', '.join(SESSION_COLUMNS)})
+                VALUES ({', '.join('?' * len(SESSION_COLUMNS))})
+                ON CONFLICT(session_id) DO UPDATE SET
+                    track_name = excluded.track_name,
+                    server_name = excluded.server_name,
+                    metadata = excluded.metadata,
+                    best_lap_overall = excluded.best_lap_overall,
+                    best_split1 = excluded.best_split1,
+                    best_split2 = excluded.best_split2,
+                    best_split3 = excluded.best_split3,
+                    total_drivers = excluded.total_drivers,
+                    is_wet_session = excluded.is_wet_session,
+                    competition_id = COALESCE(sessions.competition_id, excluded.competition_id),
+                    processed_at = CURRENT_TIMESTAMP
+            ''', sessions)
+
+            conn.executemany('''
+                INSERT INTO session_results (session_id, driver_id, position, car_id, race_number, car_model,
+                    cup_category, best_lap, best_split1, best_split2, best_split3, total_time, lap_count,
+                    missing_mandatory_pitstop)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (row for parsed in batch for row in parsed['results']))
+
+            conn.executemany('''
+                INSERT INTO laps (session_id, driver_id, car_id, lap_time, is_valid_for_best,
+                    split1, split2, split3, lap_number)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (row for parsed in batch for row in parsed['laps']))
+
+            conn.executemany('''
+                INSERT INTO penalties (session_id, driver_id, car_id, reason, penalty_type, penalty_value,
+                    violation_lap, cleared_lap, is_post_race)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (row for parsed in batch for row in parsed['penalties']))
+
+            conn.executemany('''
+                INSERT INTO drivers (driver_id, last_name, short_name, preferred_race_number)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(driver_id) DO UPDATE SET
+                    last_name = excluded.last_name,
+                    short_name = COALESCE(excluded.short_name, drivers.short_name),
+                    preferred_race_number = COALESCE(excluded.preferred_race_number, drivers.preferred_race_number)
+            ''', drivers.values())
+
+            conn.executemany('''
+                INSERT INTO synced_files (filename, file_hash, file_size, processed_in_db, processed_at, processing_result)
+                VALUES (?, ?, ?, 1, CURRENT_TIMESTAMP, ?)
+                ON CONFLICT(filename) DO UPDATE SET
+                    file_hash = excluded.file_hash,
+                    file_size = excluded.file_size,
+                    processed_in_db = 1,
+                    processed_at = excluded.processed_at,
+                    processing_result = excluded.processing_result
+            ''', [
+                (parsed['filename'], parsed['file_hash'], parsed['file_size'],
+                 f"processed: {parsed['session'][2]}_{len(parsed['results'])}drivers_{len(parsed['laps'])}laps"
+                 + (f"_comp{session[13]}" if session[13] else ''))
+                for parsed, session in zip(batch, sessions)
+            ])
+
+    def update_driver_stats(self, conn: sqlite3.Connection):
+        """Ricalcola first_seen, last_seen e total_sessions di tutti i piloti con una sola aggregazione
+        su session_results (una volta a fine importazione, corretta anche con --replace)"""
+        with conn:
+            bump_data_version(conn)
+            conn.execute('''
+                UPDATE drivers SET
+                    first_seen = stats.first_seen,
+                    last_seen = stats.last_seen,
+                    total_sessions = stats.total_sessions
+                FROM (
+                    SELECT
+                        sr.driver_id,
+                        MIN(s.session_date) as first_seen,
+                        MAX(s.session_date) as last_seen,
+                        COUNT(DISTINCT sr.session_id) as total_sessions
+                    FROM session_results sr
+                    JOIN sessions s ON sr.session_id = s.session_id
+                    GROUP BY sr.driver_id
+                ) stats
+                WHERE drivers.driver_id = stats.driver_id
+            ''')
+
+    def record_failure(self, conn: sqlite3.Connection, parsed: Dict):
+        """Registra un file non importabile (non viene ritentato finché non cambia)"""
+        if 'file_hash' not in parsed:
+            return
+        with conn:
+            conn.execute('''
+                INSERT INTO synced_files (filename, file_hash, file_size, processed_in_db, processed_at, processing_result)
+                VALUES (?, ?, ?, 0, CURRENT_TIMESTAMP, ?)
+                ON CONFLICT(filename) DO UPDATE SET
+                    file_hash = excluded.file_hash,
+                    file_size = excluded.file_size,
+                    processed_in_db = 0,
+                    processed_at = excluded.processed_at,
+                    processing_result = excluded.processing_result
+            ''', (parsed['filename'], parsed['file_hash'], parsed['file_size'], f"error: {parsed['error']}"))
+
+    def import_files(self, paths: Iterable[Path]) -> Dict:
+        """Importa i file indicati e ritorna le statistiche dell'importazione"""
+        start = time.perf_counter()
+        stats = {'files': 0, 'skipped': 0, 'errors': [], 'sessions': 0, 'results': 0, 'laps': 0, 'penalties': 0}
+
+        conn = self.connect()
+        try:
+            paths = list(paths)
+            pending = self.pending_files(conn, paths)
+            stats['skipped'] = len(paths) - len(pending)
+            competitions = self.known_competitions(conn)
+
+            batch = []
+            for parsed in self.parse_files(pending):
+                stats['files'] += 1
+                if 'error' in parsed:
+                    stats['errors'].append(f"{parsed['filename']}: {parsed['error']}")
+                    self.record_failure(conn, parsed)
+                    continue
+                batch.append(parsed)
+                stats['sessions'] += 1
+                stats['results'] += len(parsed['results'])
+                stats['laps'] += len(parsed['laps'])
+                stats['penalties'] += len(parsed['penalties'])
+
+                if len(batch) >= FILES_PER_TRANSACTION:
+                    self.write_batch(conn, batch, competitions)
+                    batch = []
+
+            if batch:
+                self.write_batch(conn, batch, competitions)
+            if stats['sessions']:
+                self.update_driver_stats(conn)
+        finally:
+            conn.close()
+
+        stats['elapsed'] = time.perf_counter() - start
+        return stats
+
+    def import_folder(self, folder: str) -> Dict:
+        """Importa tutti i file risultati presenti in una cartella (ricorsivamente)"""
+        return self.import_files(Path(folder).rglob('*.json'))
+
+
+def hash_file(path: str) -> Tuple[str, str, int]:
+    """Hash MD5 e dimensione di un file (eseguita nei processi worker)"""
+    raw = Path(path).read_bytes()
+    return path, hashlib.md5(raw).hexdigest(), len(raw)
+
+
+class FolderWatcher:
+    """Scansione incrementale di una cartella risultati basata su synced_files"""
+
+    def __init__(self, importer: ResultsImporter, folder: str):
+        self.importer = importer
+        self.folder = Path(folder)
+        # Hash già calcolati per file non modificati: {percorso: (mtime_ns, size, hash)}
+        self.hash_cache = {}
+
+    def hash_files(self, paths: List[Path]) -> Dict[str, str]:
+        """Hash dei file indicati, in parallelo se sono molti (riusa quelli con mtime invariato)"""
+        hashes = {}
+        to_hash = []
+        for path in paths:
+            stat = path.stat()
+            cached = self.hash_cache.get(str(path))
+            if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                hashes[str(path)] = cached[2]
+            else:
+                to_hash.append((str(path), stat.st_mtime_ns))
+
+        mtimes = dict(to_hash)
+        names = [name for name, _ in to_hash]
+        if self.importer.workers > 1 and len(names) >= MIN_FILES_FOR_HASH_POOL:
+            with ProcessPoolExecutor(max_workers=self.importer.workers) as executor:
+                computed = list(executor.map(hash_file, names, chunksize=max(1, len(names) // (self.importer.workers * 4))))
+        else:
+            computed = [hash_file(name) for name in names]
+
+        for name, file_hash, size in computed:
+            self.hash_cache[name] = (mtimes[name], size, file_hash)
+            hashes[name] = file_hash
+        return hashes
+
+    def scan(self) -> Dict:
+        """Confronta la cartella con synced_files e importa solo i file nuovi o modificati"""
+        start = time.perf_counter()
+        conn = self.importer.connect()
+        try:
+            synced = {
+                filename: (file_hash, file_size)
+                for filename, file_hash, file_size in conn.execute('SELECT filename, file_hash, file_size FROM synced_files')
+            }
+            sessions = {row[0] for row in conn.execute('SELECT session_id FROM sessions')}
+
+            files = [path for path in self.folder.rglob('*.json') if SESSION_FILE_RE.match(path.stem)]
+            new_files = [path for path in files if path.name not in synced]
+
+            # File già registrati: si confronta l'hash solo se la dimensione non basta a decidere
+            changed_files = []
+            to_verify = []
+            for path in (path for path in files if path.name in synced):
+                file_hash, file_size = synced[path.name]
+                if FILE_HASH_RE.match(file_hash or '') and path.stat().st_size != file_size:
+                    changed_files.append(path)
+                else:
+                    to_verify.append(path)
+
+            hashes = self.hash_files(to_verify)
+            adopted = []
+            for path in to_verify:
+                file_hash, _ = synced[path.name]
+                if hashes[str(path)] == file_hash:
+                    continue
+                if not FILE_HASH_RE.match(file_hash or '') and path.stem in sessions:
+                    # Import storico senza hash: si registra l'hash senza reimportare
+                    adopted.append((hashes[str(path)], self.hash_cache[str(path)][1], path.name))
+                else:
+                    changed_files.append(path)
+
+            if adopted:
+                with conn:
+                    conn.executemany('UPDATE synced_files SET file_hash = ?, file_size = ? WHERE filename = ?', adopted)
+        finally:
+            conn.close()
+
+        stats = {'files': 0, 'sessions': 0, 'laps': 0, 'errors': []}
+        if new_files or changed_files:
+            stats = self.importer.import_files(new_files + changed_files)
+
+        return {
+            'scanned': len(files),
+            'new': len(new_files),
+            'changed': len(changed_files),
+            'adopted': len(adopted),
+            'hashed': len(to_verify),
+            'imported': stats['sessions'],
+            'laps': stats['laps'],
+            'errors': stats['errors'],
+            'elapsed': time.perf_counter() - start,
+        }
+
+    def watch(self, interval: float):
+        """Scansione periodica fino a interruzione (Ctrl+C)"""
+        print(f"👀 Watching {self.folder} every {interval:.0f}s (Ctrl+C to stop)")
+        try:
+            while True:
+                result = self.scan()
+                if result['new'] or result['changed'] or result['adopted']:
+                    print(f"🔄 {datetime.now():%H:%M:%S} scanned {result['scanned']} files: "
+                          f"{result['new']} new, {result['changed']} changed, {result['adopted']} hashes recorded, "
+                          f"{result['imported']} sessions imported in {result['elapsed']:.2f}s")
+                for error in result['errors']:
+                    print(f"⚠️ {error}")
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("👋 Watcher stopped")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Importa i file risultati del server ACC nel database")
+    parser.add_argument('folder', help="Cartella con i file risultati JSON")
+    parser.add_argument('--db', default=os.getenv('ACC_DATABASE_PATH', 'acc_stats.db'), help="Percorso database")
+    parser.add_argument('--workers', type=int, default=None, help="Processi di parsing (default: CPU disponibili)")
+    parser.add_argument('--replace', action='store_true', help="Reimporta anche le sessioni già presenti")
+    parser.add_argument('--watch', action='store_true', help="Importa periodicamente solo i file nuovi o modificati")
+    parser.add_argument('--interval', type=float, default=30.0, help="Secondi tra due scansioni in --watch")
+    args = parser.parse_args()
+
+    if not Path(args.folder).is_dir():
+        print(f"❌ Folder not found: {args.folder}")
+        return 1
+
+    if args.watch:
+        # I file modificati vanno reimportati: il watcher sostituisce sempre le sessioni esistenti
+        importer = ResultsImporter(args.db, workers=args.workers, replace=True)
+        FolderWatcher(importer, args.folder).watch(args.interval)
+        return 0
+
+    stats = ResultsImporter(args.db, workers=args.workers, replace=args.replace).import_folder(args.folder)
+
+    print(f"✅ Imported {stats['sessions']} sessions, {stats['results']} results, {stats['laps']} laps, "
+          f"{stats['penalties']} penalties in {stats['elapsed']:.2f}s ({stats['skipped']} already imported)")
+    for error in stats['errors']:
+        print(f"⚠️ {error}")
+
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
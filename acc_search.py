@@ -0,0 +1,153 @@
+"""
+ACC Search - Indice di ricerca piloti in memoria
+Indice trigrammi + prefissi su last_name, short_name e preferred_race_number,
+insensibile ad accenti e maiuscole. Costruito una volta per versione dati,
+le ricerche non toccano il database.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Punteggi per tipo di corrispondenza (a parità vince il trust_level più alto, poi il nome)
+SCORE_EXACT = 100
+SCORE_RACE_NUMBER = 95
+SCORE_PREFIX = 90
+SCORE_TOKEN_PREFIX = 80
+SCORE_SUBSTRING = 60
+SCORE_FUZZY = 50
+
+# Soglia minima di similarità trigrammi per le corrispondenze approssimate
+MIN_FUZZY_SIMILARITY = 0.3
+
+
+def normalize_text(text) -> str:
+    """Minuscolo senza accenti e con soli caratteri alfanumerici separati da spazio"""
+    if text is None or (isinstance(text, float) and pd.isna(text)):
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(re.findall(r'[a-z0-9]+', stripped.casefold()))
+
+
+def trigrams(text: str) -> set:
+    """Trigrammi di una stringa normalizzata (con padding per valorizzare l'inizio parola)"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DriverSearchIndex:
+    """Indice piloti per ricerca fuzzy (trigrammi) e per prefisso"""
+
+    def __init__(self, drivers_df: pd.DataFrame):
+        self.drivers = drivers_df.reset_index(drop=True)
+        self.records = self.drivers.to_dict('records')
+        self.by_id = {record['driver_id']: pos for pos, record in enumerate(self.records)}
+        self.trust_levels = self.drivers['trust_level'].fillna(0).astype(int).tolist()
+
+        self.names = []                       # testo normalizzato per pilota (nome + sigla)
+        self.trigram_sets = []                # trigrammi per pilota
+        self.postings = defaultdict(list)     # trigramma -> posizioni piloti
+        self.race_numbers = defaultdict(list) # numero gara -> posizioni piloti
+        tokens = []                           # (token, posizione) per ricerca prefisso
+
+        for pos, row in enumerate(self.drivers.itertuples(index=False)):
+            name = normalize_text(row.last_name)
+            short = normalize_text(row.short_name)
+            text = f"{name} {short}".strip() if short and short not in name.split() else name
+            self.names.append(name)
+
+            grams = trigrams(text)
+            self.trigram_sets.append(grams)
+            for gram in grams:
+                self.postings[gram].append(pos)
+
+            for token in set(text.split()):
+                tokens.append((token, pos))
+
+            if pd.notna(row.preferred_race_number):
+                self.race_numbers[str(int(row.preferred_race_number))].append(pos)
+
+        tokens.sort()
+        self.tokens = [token for token, _ in tokens]
+        self.token_positions = [pos for _, pos in tokens]
+
+    def __len__(self) -> int:
+        return len(self.drivers)
+
+    def get(self, driver_id) -> Optional[Dict]:
+        """Dati pilota per driver_id"""
+        pos = self.by_id.get(driver_id)
+        return None if pos is None else dict(self.records[pos])
+
+    def _token_prefix_matches(self, prefix: str) -> set:
+        """Posizioni dei piloti con almeno una parola che inizia con il prefisso"""
+        matches = set()
+        start = bisect_left(self.tokens, prefix)
+        for i in range(start, len(self.tokens)):
+            if not self.tokens[i].startswith(prefix):
+                break
+            matches.add(self.token_positions[i])
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Piloti ordinati per rilevanza (ogni risultato include lo score)"""
+        normalized = normalize_text(query)
+        if not normalized:
+            return []
+
+        scores = {}
+
+        def add(pos: int, score: float):
+            if score > scores.get(pos, 0):
+                scores[pos] = score
+
+        # Numero di gara (anche con '#' davanti)
+        compact = normalized.replace(' ', '')
+        if compact.isdigit():
+            for pos in self.race_numbers.get(str(int(compact)), []):
+                add(pos, SCORE_RACE_NUMBER)
+
+        # Prefisso sulla prima parola della query, poi verifica sul testo completo
+        first_token = normalized.split()[0]
+        for pos in self._token_prefix_matches(first_token):
+            name = self.names[pos]
+            if name == normalized:
+                add(pos, SCORE_EXACT)
+            elif name.startswith(normalized):
+                add(pos, SCORE_PREFIX)
+            elif normalized in name or ' ' not in normalized:
+                add(pos, SCORE_TOKEN_PREFIX)
+
+        # Trigrammi: sottostringhe e corrispondenze approssimate (errori di battitura)
+        query_grams = trigrams(normalized)
+        overlap = defaultdict(int)
+        for gram in query_grams:
+            for pos in self.postings.get(gram, ()):
+                overlap[pos] += 1
+
+        for pos, shared in overlap.items():
+            if pos in scores and scores[pos] >= SCORE_TOKEN_PREFIX:
+                continue
+            if normalized in self.names[pos]:
+                add(pos, SCORE_SUBSTRING)
+                continue
+            similarity = shared / len(query_grams | self.trigram_sets[pos])
+            if similarity >= MIN_FUZZY_SIMILARITY:
+                add(pos, SCORE_FUZZY * similarity)
+
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (-item[1], -self.trust_levels[item[0]], self.names[item[0]])
+        )[:limit]
+
+        results = []
+        for pos, score in ranked:
+            driver = dict(self.records[pos])
+            driver['score'] = round(score, 1)
+            results.append(driver)
+        return results
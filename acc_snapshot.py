@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+ACC Snapshot - Export statico delle pagine del dashboard in HTML e JSON
+Dopo ogni aggiornamento del database genera una pagina per ogni classifica di campionato,
+risultato di competizione, classifica best lap di pista e profilo di pilota registrato,
+ciascuna in HTML (tabella e grafico Plotly incorporato come JSON) e JSON, più un indice.
+I dati sono letti con gli stessi metodi di ACCWebDashboard; gli aggregati condivisi
+(record di pista, elenchi) sono calcolati una volta e passati ai processi worker, che
+si dividono le pagine. Il sito è scritto in <out>.incoming e sostituisce <out> a fine run,
+così un host statico non serve mai un export a metà. Se la versione dati non è cambiata
+dall'ultimo export non si rigenera nulla (salvo --force).
+
+Uso:
+    python acc_snapshot.py [--db acc_stats.db] [--out snapshot] [--workers 4] [--force]
+"""
+
+import argparse
+import html
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from acc_api import load_dashboard, to_jsonable
+from acc_db import get_data_version
+
+MANIFEST_FILE = 'snapshot.json'
+PLOTLY_JS = 'https://cdn.plot.ly/plotly-2.35.2.min.js'
+# Colonne con tempi sul giro in millisecondi, formattate nelle tabelle HTML
+LAP_TIME_COLUMNS = ('best_lap', 'best_lap_time', 'record_lap')
+# Righe mostrate nei grafici a barre
+CHART_ROWS = 25
+
+CHAMPIONSHIPS_QUERY = '''
+    SELECT ch.championship_id, ch.name, ch.season, l.name as league
+    FROM championships ch
+    LEFT JOIN leagues l ON ch.league_id = l.league_id
+    WHERE EXISTS (SELECT 1 FROM championship_standings cs WHERE cs.championship_id = ch.championship_id)
+    ORDER BY ch.start_date DESC, ch.championship_id DESC
+'''
+
+COMPETITIONS_QUERY = '''
+    SELECT c.competition_id, c.name, c.track_name, c.round_number, c.date_start, ch.name as championship
+    FROM competitions c
+    LEFT JOIN championships ch ON c.championship_id = ch.championship_id
+    WHERE EXISTS (SELECT 1 FROM competition_standings cs WHERE cs.competition_id = c.competition_id)
+    ORDER BY c.date_start DESC, c.competition_id DESC
+'''
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title} · {community}</title>
+<script src="{plotly_js}"></script>
+<style>
+body {{ font-family: sans-serif; background: #0e1117; color: #fafafa; margin: 2rem auto; max-width: 1100px; padding: 0 1rem; }}
+a {{ color: #4da3ff; }}
+table {{ border-collapse: collapse; width: 100%; font-size: 0.9rem; margin: 1rem 0; }}
+th, td {{ border-bottom: 1px solid #333; padding: 0.3rem 0.5rem; text-align: left; }}
+th {{ background: #262730; }}
+.meta {{ color: #aaa; font-size: 0.85rem; }}
+</style>
+</head>
+<body>
+<p class="meta"><a href="{root}index.html">🏠 {community}</a> · data version {data_version} · generated {generated}</p>
+<h1>{title}</h1>
+{body}
+</body>
+</html>
+'''
+
+# Stato dei processi worker (impostato da init_worker)
+_dashboard = None
+_shared = None
+
+
+def slug(value) -> str:
+    """Nome di file sicuro per id e nomi di pista"""
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', str(value)).strip('_') or 'unknown'
+
+
+def load_shared(dashboard) -> Dict:
+    """Aggregati condivisi tra le pagine: elenchi e record di pista, calcolati una sola volta"""
+    conn = sqlite3.connect(f"file:{dashboard.db_path}?mode=ro", uri=True)
+    try:
+        championships = pd.read_sql_query(CHAMPIONSHIPS_QUERY, conn)
+        competitions = pd.read_sql_query(COMPETITIONS_QUERY, conn)
+    finally:
+        conn.close()
+
+    records = dashboard.get_all_tracks_summary()
+    return {
+        'data_version': get_data_version(dashboard.db_path),
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'community': dashboard.config.get('community', {}).get('name', 'ACC Dashboard'),
+        'championships': championships,
+        'competitions': competitions,
+        'tracks': dashboard.get_tracks_list(),
+        'drivers': dashboard.get_drivers_list(),
+        'track_records': {
+            row.track_name: {'best_lap': int(row.best_lap), 'driver': row.driver_name}
+            for row in records.itertuples(index=False)
+        } if not records.empty else {},
+    }
+
+
+def init_worker(db_path: str, shared: Dict):
+    """Inizializza il processo worker: un'istanza del dashboard e gli aggregati condivisi"""
+    global _dashboard, _shared
+    _dashboard = load_dashboard(db_path)
+    _shared = shared
+
+
+def format_table(df: pd.DataFrame) -> str:
+    """Tabella HTML con i tempi sul giro formattati"""
+    if df.empty:
+        return '<p>No data</p>'
+    table = df.copy()
+    for column in table.columns:
+        if column in LAP_TIME_COLUMNS:
+            table[column] = table[column].apply(lambda value: _dashboard.format_lap_time(value) if pd.notna(value) else '')
+    return table.to_html(index=False, na_rep='', border=0, escape=True)
+
+
+def bar_chart(labels: List, values: List, title: str, color: str = '#4da3ff') -> go.Figure:
+    """Grafico a barre orizzontali nello stile scuro del dashboard"""
+    fig = go.Figure(go.Bar(y=labels[::-1], x=values[::-1], orientation='h', marker_color=color))
+    fig.update_layout(
+        title=title,
+        height=max(300, len(labels) * 24 + 100),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        margin=dict(l=10, r=10, t=50, b=10),
+    )
+    return fig
+
+
+def figure_html(fig: Optional[go.Figure], element_id: str) -> str:
+    """Grafico incorporato come JSON e disegnato da plotly.js"""
+    if fig is None:
+        return ''
+    return (f'<div id="{element_id}"></div>\n'
+            f'<script>(function() {{ var fig = {fig.to_json()}; '
+            f'Plotly.newPlot("{element_id}", fig.data, fig.layout, {{responsive: true}}); }})();</script>')
+
+
+def lap_gap_seconds(best_lap, track_name: str) -> Optional[float]:
+    """Distacco dal record della pista (aggregato condiviso), in secondi"""
+    record = _shared['track_records'].get(track_name)
+    if record is None or pd.isna(best_lap):
+        return None
+    return round((best_lap - record['best_lap']) / 1000, 3)
+
+
+# ==================== PAGINE ====================
+
+def render_championship(championship_id: int) -> Tuple[str, Dict, str]:
+    meta = _shared['championships'].set_index('championship_id').loc[championship_id]
+    standings = _dashboard.get_championship_standings(int(championship_id))
+    top = standings.head(CHART_ROWS)
+    fig = bar_chart(list(top['driver']), list(top['total_points']), 'Total points') if not top.empty else None
+    payload = {'championship': {'id': int(championship_id), 'name': meta['name'], 'season': meta['season'],
+                                'league': meta['league']},
+               'standings': standings, 'figure': json.loads(fig.to_json()) if fig else None}
+    title = f"🏆 {meta['name']}"
+    return title, payload, format_table(standings) + figure_html(fig, 'standings-chart')
+
+
+def render_competition(competition_id: int) -> Tuple[str, Dict, str]:
+    meta = _shared['competitions'].set_index('competition_id').loc[competition_id]
+    results = _dashboard.get_competition_results(int(competition_id))
+    top = results.head(CHART_ROWS)
+    fig = bar_chart(list(top['driver']), list(top['total_points']), 'Total points', '#44BB44') if not top.empty else None
+    payload = {'competition': {'id': int(competition_id), 'name': meta['name'], 'track': meta['track_name'],
+                               'round': meta['round_number'], 'date_start': meta['date_start'],
+                               'championship': meta['championship']},
+               'results': results, 'figure': json.loads(fig.to_json()) if fig else None}
+    title = f"🏁 {meta['name']} - {meta['track_name']}"
+    return title, payload, f"<p class=\"meta\">{html.escape(str(meta['championship']))}</p>" + \
+        format_table(results) + figure_html(fig, 'results-chart')
+
+
+def render_track(track_name: str) -> Tuple[str, Dict, str]:
+    leaderboard = _dashboard.get_track_leaderboard(track_name)
+    if not leaderboard.empty:
+        leaderboard['gap_s'] = [lap_gap_seconds(lap, track_name) for lap in leaderboard['best_lap']]
+    top = leaderboard.head(CHART_ROWS)
+    fig = bar_chart(list(top['driver_name']), list(top['gap_s']), 'Gap to track record (s)', '#FF8C00') \
+        if not top.empty else None
+    payload = {'track': track_name, 'record': _shared['track_records'].get(track_name),
+               'leaderboard': leaderboard, 'figure': json.loads(fig.to_json()) if fig else None}
+    return f"⚡ {track_name}", payload, format_table(leaderboard) + figure_html(fig, 'leaderboard-chart')
+
+
+def render_driver(driver_id: str) -> Tuple[str, Dict, str]:
+    driver = next(driver for driver in _shared['drivers'] if driver['driver_id'] == driver_id)
+    stats = _dashboard.get_driver_statistics(driver_id)
+    best_times = _dashboard.get_driver_best_times(driver_id)
+    if not best_times.empty:
+        best_times['gap_s'] = [lap_gap_seconds(lap, track) for lap, track in zip(best_times['best_lap'], best_times['track_name'])]
+    fig = bar_chart(list(best_times['track_name']), list(best_times['gap_s']), 'Gap to track record (s)', '#dc3545') \
+        if not best_times.empty else None
+    payload = {'driver': driver, 'statistics': stats, 'best_times': best_times,
+               'figure': json.loads(fig.to_json()) if fig else None}
+    stats_table = format_table(pd.DataFrame([stats])) if stats else ''
+    return f"👤 {driver['last_name']}", payload, stats_table + format_table(best_times) + figure_html(fig, 'best-times-chart')
+
+
+PAGE_RENDERERS = {
+    'championships': render_championship,
+    'competitions': render_competition,
+    'tracks': render_track,
+    'drivers': render_driver,
+}
+
+
+def write_page(out_dir: Path, relative: str, title: str, payload: Dict, body: str, root: str):
+    """Scrive la pagina in HTML e JSON (stesso nome, estensione diversa)"""
+    path = out_dir / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.with_suffix('.json').write_text(
+        json.dumps(to_jsonable(payload), ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+    path.with_suffix('.html').write_text(PAGE_TEMPLATE.format(
+        title=html.escape(title),
+        community=html.escape(_shared['community']),
+        plotly_js=PLOTLY_JS,
+        root=root,
+        data_version=html.escape(_shared['data_version']),
+        generated=_shared['generated'],
+        body=body,
+    ), encoding='utf-8')
+
+
+def render_page(task: Tuple[str, object, str]) -> Tuple[str, str, Optional[str]]:
+    """Genera una pagina nel processo worker; ritorna (sezione, percorso, errore)"""
+    section, key, out_dir = task
+    relative = f"{section}/{slug(key)}"
+    try:
+        title, payload, body = PAGE_RENDERERS[section](key)
+        write_page(Path(out_dir), relative, title, payload, body, root='../')
+        return section, relative, None
+    except Exception as e:
+        return section, relative, str(e)
+
+
+def write_index(out_dir: Path, pages: Dict[str, List[Tuple[str, str]]]):
+    """Indice del sito con i collegamenti a tutte le pagine"""
+    sections = {'championships': '🏆 Championships', 'competitions': '🏁 Competitions',
+                'tracks': '⚡ Best Laps', 'drivers': '👥 Drivers'}
+    body = []
+    for section, label in sections.items():
+        links = ''.join(f'<li><a href="{html.escape(path)}.html">{html.escape(str(name))}</a></li>'
+                        for name, path in pages.get(section, []))
+        body.append(f"<h2>{label}</h2><ul>{links}</ul>")
+    index = {section: [{'name': name, 'html': f"{path}.html", 'json': f"{path}.json"} for name, path in entries]
+             for section, entries in pages.items()}
+    write_page(out_dir, 'index', _shared['community'], index, '\n'.join(body), root='')
+
+
+def page_tasks(shared: Dict, out_dir: Path) -> Tuple[List[Tuple[str, object, str]], Dict[str, Dict]]:
+    """Pagine da generare e nome visualizzato di ciascuna (per l'indice)"""
+    names = {
+        'championships': {row.championship_id: row.name for row in shared['championships'].itertuples(index=False)},
+        'competitions': {row.competition_id: f"{row.name} - {row.track_name}" for row in shared['competitions'].itertuples(index=False)},
+        'tracks': {track: track for track in shared['tracks']},
+        'drivers': {driver['driver_id']: driver['last_name'] for driver in shared['drivers']},
+    }
+    tasks = [(section, key, str(out_dir)) for section, keys in names.items() for key in keys]
+    return tasks, names
+
+
+def publish(staging: Path, out_dir: Path):
+    """Sostituisce l'export pubblicato con quello appena generato"""
+    previous = out_dir.with_name(out_dir.name + '.previous')
+    shutil.rmtree(previous, ignore_errors=True)
+    if out_dir.exists():
+        os.replace(out_dir, previous)
+    os.replace(staging, out_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+def export_snapshot(db_path: str, out: str, workers: int, force: bool = False) -> Dict:
+    """Genera tutte le pagine; ritorna il riepilogo (None se l'export è già aggiornato)"""
+    start = time.time()
+    out_dir = Path(out).resolve()
+    manifest_path = out_dir / MANIFEST_FILE
+    data_version = get_data_version(db_path)
+    if not force and manifest_path.exists():
+        if json.loads(manifest_path.read_text(encoding='utf-8')).get('data_version') == data_version:
+            return None
+
+    global _dashboard, _shared
+    _dashboard = load_dashboard(db_path)
+    _shared = load_shared(_dashboard)
+
+    staging = out_dir.with_name(out_dir.name + '.incoming')
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    tasks, names = page_tasks(_shared, staging)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(db_path, _shared)) as executor:
+            results = list(executor.map(render_page, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    else:
+        results = [render_page(task) for task in tasks]
+
+    pages = {section: [] for section in PAGE_RENDERERS}
+    errors = []
+    for (section, key, _), (_, relative, error) in zip(tasks, results):
+        if error:
+            errors.append(f"{relative}: {error}")
+        else:
+            pages[section].append((names[section][key], relative))
+    write_index(staging, pages)
+
+    summary = {
+        'data_version': data_version,
+        'generated': _shared['generated'],
+        'pages': {section: len(entries) for section, entries in pages.items()},
+        'errors': errors,
+        'elapsed': round(time.time() - start, 2),
+    }
+    (staging / MANIFEST_FILE).write_text(json.dumps(summary, indent=2), encoding='utf-8')
+    publish(staging, out_dir)
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Esporta le pagine del dashboard in HTML e JSON statici")
+    parser.add_argument('--db', default=os.getenv('ACC_DATABASE_PATH', 'acc_stats.db'), help="Database del dashboard")
+    parser.add_argument('--out', default='snapshot', help="Cartella del sito statico")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processi worker")
+    parser.add_argument('--force', action='store_true', help="Rigenera anche se la versione dati non è cambiata")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"❌ Database not found: {args.db}")
+        return 1
+
+    summary = export_snapshot(os.path.abspath(args.db), args.out, max(1, args.workers), args.force)
+    if summary is None:
+        print(f"✅ Snapshot already up to date in {args.out}")
+        return 0
+
+    pages = ', '.join(f"{count} {section}" for section, count in summary['pages'].items())
+    print(f"✅ Snapshot written to {args.out} in {summary['elapsed']:.1f}s ({pages})")
+    for error in summary['errors']:
+        print(f"   ❌ {error}")
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+ACC Swap - Sostituzione atomica del database del dashboard
+Pubblica un nuovo acc_stats.db senza interrompere chi sta consultando il dashboard:
+1. copia il nuovo database accanto a quello in uso (<db>.incoming) con l'API di backup
+   di SQLite, così la copia è consistente anche se la sorgente è in scrittura;
+2. lo valida (quick_check o integrity_check, tabelle essenziali), aggiunge gli indici delle
+   query del dashboard se mancano (acc_db.QUERY_INDEXES) e incrementa la versione dati;
+3. lo rinomina sopra quello in uso con os.replace, che è atomico sullo stesso filesystem.
+Le connessioni già aperte finiscono la query sul file precedente; il dashboard rileva
+il cambio di inode (versione dati e identità del file) e riapre connessioni e cache.
+
+Uso:
+    python acc_swap.py nuovo_stats.db [--db acc_stats.db] [--full-check] [--keep-previous]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+from acc_db import REQUIRED_TABLES, bump_data_version, ensure_query_indexes, get_data_version
+
+INCOMING_SUFFIX = '.incoming'
+PREVIOUS_SUFFIX = '.previous'
+
+
+class SwapError(Exception):
+    """Il nuovo database non è valido o non può sostituire quello in uso"""
+
+
+def copy_database(source: str, destination: str):
+    """Copia consistente del database con l'API di backup (journal classico, niente WAL)"""
+    source_conn = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    destination_conn = sqlite3.connect(destination)
+    try:
+        source_conn.backup(destination_conn)
+        # Un database in WAL sostituito lascerebbe -wal/-shm del file precedente
+        destination_conn.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        destination_conn.close()
+        source_conn.close()
+
+
+def validate_database(db_path: str, full_check: bool = False) -> Dict[str, int]:
+    """Controllo di integrità e tabelle essenziali; ritorna le righe delle tabelle essenziali"""
+    conn = sqlite3.connect(db_path)
+    try:
+        check = 'integrity_check' if full_check else 'quick_check'
+        problems = [row[0] for row in conn.execute(f'PRAGMA {check}').fetchall()]
+        if problems != ['ok']:
+            raise SwapError(f"{check} failed: {'; '.join(problems[:5])}")
+
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = [table for table in REQUIRED_TABLES if table not in existing]
+        if missing:
+            raise SwapError(f"missing tables: {', '.join(missing)}")
+
+        return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in REQUIRED_TABLES}
+    finally:
+        conn.close()
+
+
+def fsync_path(path: Path, directory: bool = False):
+    """Forza su disco file o directory (le directory non si aprono su Windows)"""
+    if directory and os.name == 'nt':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def swap_database(source: str, target: str, full_check: bool = False, keep_previous: bool = False) -> Dict:
+    """Copia, valida e sostituisce atomicamente target con source"""
+    start = time.time()
+    target_path = Path(target).resolve()
+    incoming = target_path.with_name(target_path.name + INCOMING_SUFFIX)
+    if Path(source).resolve() == target_path:
+        raise SwapError("source and target are the same file")
+    if Path(f"{target_path}-wal").exists():
+        raise SwapError(f"{target_path.name} is in WAL mode with an open writer: stop it before swapping")
+
+    incoming.unlink(missing_ok=True)
+    try:
+        copy_database(source, str(incoming))
+        counts = validate_database(str(incoming), full_check)
+
+        conn = sqlite3.connect(incoming)
+        try:
+            with conn:
+                # Sulla copia, prima della pubblicazione: il database in uso non viene mai scritto
+                created_indexes = ensure_query_indexes(conn)
+                data_counter = bump_data_version(conn)
+        finally:
+            conn.close()
+        fsync_path(incoming)
+
+        previous = None
+        if keep_previous and target_path.exists():
+            previous = target_path.with_name(target_path.name + PREVIOUS_SUFFIX)
+            previous.unlink(missing_ok=True)
+            os.link(target_path, previous)
+
+        os.replace(incoming, target_path)
+        fsync_path(target_path.parent, directory=True)
+    except Exception:
+        incoming.unlink(missing_ok=True)
+        raise
+
+    return {
+        'target': str(target_path),
+        'previous': str(previous) if previous else None,
+        'counts': counts,
+        'created_indexes': created_indexes,
+        'data_counter': data_counter,
+        'data_version': get_data_version(str(target_path)),
+        'elapsed': time.time() - start,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sostituisce atomicamente il database del dashboard")
+    parser.add_argument('source', help="Nuovo database da pubblicare")
+    parser.add_argument('--db', default=os.getenv('ACC_DATABASE_PATH', 'acc_stats.db'), help="Database in uso dal dashboard")
+    parser.add_argument('--full-check', action='store_true', help="PRAGMA integrity_check invece di quick_check")
+    parser.add_argument('--keep-previous', action='store_true', help="Conserva il database sostituito come <db>.previous")
+    args = parser.parse_args()
+
+    if not Path(args.source).exists():
+        print(f"❌ Database not found: {args.source}")
+        return 1
+
+    try:
+        result = swap_database(args.source, args.db, full_check=args.full_check, keep_previous=args.keep_previous)
+    except (SwapError, sqlite3.Error, OSError) as e:
+        print(f"❌ Swap aborted, {args.db} left untouched: {e}")
+        return 1
+
+    counts = ', '.join(f"{count} {table}" for table, count in result['counts'].items())
+    print(f"✅ Swapped {result['target']} in {result['elapsed']:.2f}s ({counts})")
+    if result['created_indexes']:
+        print(f"   indexes added: {', '.join(result['created_indexes'])}")
+    print(f"   data version: {result['data_version']}")
+    if result['previous']:
+        print(f"   previous database kept as {result['previous']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
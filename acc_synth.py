@@ -0,0 +1,701 @@
+#!/usr/bin/env python3
+"""
+ACC Synth - Generatore di database sintetici per i test di carico
+Crea un database con lo stesso schema di acc_stats.db (tabelle e indici copiati dal
+database modello) popolato con leghe, campionati a tier, time attack, sessioni, giri,
+risultati, penalità e classifiche, alla scala richiesta (es. 3M giri, 40k sessioni,
+5k piloti, 20 leghe). I tempi giro seguono la distribuzione per pista del database
+modello; a parità di seed e parametri il contenuto generato è identico.
+
+Uso:
+    python acc_synth.py --output synthetic.db [--template acc_stats.db] [--seed 42]
+                        [--sessions 40000] [--laps 3000000] [--drivers 5000] [--leagues 20]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from acc_db import bump_data_version
+from acc_importer import ACC_INVALID_TIME
+
+# Tabelle di riferimento copiate integralmente dal modello
+REFERENCE_TABLES = ('car_models', 'points_systems', 'teams')
+# Tabelle del modello non ricreate (interne o prodotte da altri strumenti)
+SKIPPED_TABLES = ('sqlite_sequence', 'dashboard_meta', 'archived_leagues', 'archive_track_bests', 'archive_driver_honours')
+
+# Piste di riserva se il modello non ha giri: miglior tempo realistico (ms) e frazioni dei settori
+DEFAULT_TRACKS = {
+    'misano': (93500, (0.251, 0.395, 0.354)),
+    'monza': (106500, (0.318, 0.357, 0.325)),
+    'spa': (136500, (0.312, 0.418, 0.270)),
+    'imola': (99500, (0.331, 0.342, 0.327)),
+    'zolder': (87500, (0.342, 0.327, 0.331)),
+    'suzuka': (118500, (0.322, 0.371, 0.307)),
+    'nurburgring': (112500, (0.353, 0.334, 0.313)),
+    'barcelona': (102000, (0.398, 0.339, 0.263)),
+}
+
+# Mix piloti del database reale: ospiti, amici, membri TFL
+TRUST_MIX = (0.82, 0.14, 0.04)
+# Distacco medio dal tempo di riferimento della pista per livello (media, deviazione)
+TRUST_PACE = {2: (0.012, 0.007), 1: (0.025, 0.012), 0: (0.040, 0.020)}
+# Peso dei giri per tipo sessione (gara ~3 volte qualifica/prove)
+SESSION_LAP_WEIGHT = {'FP': 1.2, 'Q': 0.8, 'R': 3.0}
+TIME_ATTACK_POINTS = (10, 8, 6, 5, 4, 3, 2, 1)
+DEFAULT_POSITION_POINTS = (20, 15, 12, 10, 8, 6, 4, 3, 2, 1)
+WET_SLOWDOWN = 0.08
+PENALTY_CATALOGUE = (
+    ('Cutting', 'DriveThrough', 3),
+    ('Cutting', 'None', 0),
+    ('PitSpeeding', 'StopAndGo_30', 3),
+    ('Cutting', 'PostRaceTime', 30),
+    ('Trolling', 'StopAndGo_30', 3),
+)
+NAME_SYLLABLES = ('ro', 'ma', 'ti', 'ker', 'zo', 'la', 'van', 'di', 'fer', 'nu', 'sa', 'bel', 'gi', 'on', 'ra', 'mo',
+                  'ck', 'lu', 'pe', 'ta', 'ri', 'xx', 'ne', 'co', 'sk', 'el')
+
+
+def load_track_profiles(template: sqlite3.Connection) -> Dict[str, tuple]:
+    """Tempo di riferimento (2° percentile dei giri validi) e frazioni settori per pista dal modello"""
+    try:
+        laps = pd.read_sql_query('''
+            SELECT s.track_name, l.lap_time, l.split1, l.split2, l.split3
+            FROM laps l
+            JOIN sessions s ON l.session_id = s.session_id
+            WHERE l.is_valid_for_best = 1 AND l.lap_time BETWEEN 30000 AND 600000
+              AND l.split1 > 0 AND l.split2 > 0 AND l.split3 > 0
+        ''', template)
+    except Exception:
+        return dict(DEFAULT_TRACKS)
+
+    profiles = {}
+    for track, group in laps.groupby('track_name'):
+        if len(group) < 20:
+            continue
+        fractions = np.array([(group[f'split{i}'] / group['lap_time']).median() for i in (1, 2, 3)])
+        profiles[track] = (int(group['lap_time'].quantile(0.02)), tuple(fractions / fractions.sum()))
+    return profiles or dict(DEFAULT_TRACKS)
+
+
+class SyntheticDatabaseGenerator:
+    """Genera un database ACC sintetico con lo schema del database modello"""
+
+    def __init__(self, output_path: str, template_path: str, seed: int = 42, sessions: int = 40000,
+                 laps: int = 3000000, drivers: int = 5000, leagues: int = 20, tiers: int = 3,
+                 rounds: int = 6, wet_ratio: float = 0.06):
+        self.output_path = output_path
+        self.template_path = template_path
+        self.rng = np.random.default_rng(seed)
+        self.target_sessions = sessions
+        self.target_laps = laps
+        self.num_drivers = drivers
+        self.num_leagues = max(1, leagues)
+        self.tiers = tiers
+        self.rounds = rounds
+        self.wet_ratio = wet_ratio
+        self.used_session_ids = set()
+        self.counts = {}
+
+    # ==================== SCHEMA E TABELLE DI RIFERIMENTO ====================
+
+    def create_schema(self, conn: sqlite3.Connection, template: sqlite3.Connection):
+        """Ricrea tabelle e indici del modello e copia le tabelle di riferimento"""
+        objects = template.execute('''
+            SELECT type, name, sql FROM sqlite_master
+            WHERE type IN ('table', 'index') AND sql IS NOT NULL
+            ORDER BY CASE type WHEN 'table' THEN 0 ELSE 1 END, rowid
+        ''').fetchall()
+        tables = []
+        for object_type, name, sql in objects:
+            table = name if object_type == 'table' else template.execute(
+                "SELECT tbl_name FROM sqlite_master WHERE name = ?", (name,)).fetchone()[0]
+            if table in SKIPPED_TABLES or name.startswith('sqlite_'):
+                continue
+            conn.execute(sql)
+            if object_type == 'table':
+                tables.append(name)
+
+        for table in REFERENCE_TABLES:
+            if table not in tables:
+                continue
+            rows = template.execute(f'SELECT * FROM "{table}"').fetchall()
+            if rows:
+                placeholders = ', '.join('?' * len(rows[0]))
+                conn.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', rows)
+
+    def load_points_systems(self, conn: sqlite3.Connection) -> Dict[str, tuple]:
+        """Sistemi punti a tabella posizioni: nome -> (punti, pole, giro veloce, scarti)"""
+        systems = {}
+        for name, positions_json, pole, fastest, drops in conn.execute('''
+            SELECT name, position_points_json, pole_position_points, fastest_lap_points, drop_worst_results
+            FROM points_systems WHERE position_points_json IS NOT NULL AND position_points_json != ''
+        '''):
+            positions = json.loads(positions_json)
+            points = tuple(positions[str(position)] for position in sorted(map(int, positions)))
+            systems[name] = (points, pole or 0, fastest or 0, drops or 0)
+
+        if not systems:
+            conn.execute('''
+                INSERT INTO points_systems (name, description, position_points_json, pole_position_points,
+                    fastest_lap_points, created_at)
+                VALUES ('GT3 Standard', 'Synthetic default', ?, 1, 1, '2024-01-01 00:00:00')
+            ''', (json.dumps({str(i + 1): p for i, p in enumerate(DEFAULT_POSITION_POINTS)}),))
+            systems['GT3 Standard'] = (DEFAULT_POSITION_POINTS, 1, 1, 0)
+        return systems
+
+    # ==================== PILOTI ====================
+
+    def create_drivers(self, car_models: List[int]):
+        """Piloti con livello di fiducia, passo, popolarità (quanto spesso corrono) e auto preferita"""
+        n = self.num_drivers
+        rng = self.rng
+        self.trust = rng.choice([0, 1, 2], size=n, p=TRUST_MIX)
+        means = np.array([TRUST_PACE[level][0] for level in self.trust])
+        stds = np.array([TRUST_PACE[level][1] for level in self.trust])
+        self.pace = np.clip(rng.normal(means, stds), 0.0, 0.15)
+        # Pochi piloti molto assidui, molti occasionali (i membri TFL corrono di più)
+        popularity = rng.pareto(1.2, size=n) + 0.05
+        popularity *= np.where(self.trust == 2, 6.0, np.where(self.trust == 1, 2.0, 1.0))
+        self.popularity = popularity / popularity.sum()
+        self.car_model = rng.choice(car_models, size=n)
+        self.race_number = rng.integers(1, 999, size=n)
+
+        prefixes = rng.choice(['S', 'P', 'M'], size=n, p=[0.55, 0.4, 0.05])
+        self.driver_ids = [f"{prefix}{value}" for prefix, value in zip(prefixes, rng.integers(10**15, 10**18, size=n))]
+        names = []
+        used = set()
+        for index in range(n):
+            name = ''.join(rng.choice(NAME_SYLLABLES, size=rng.integers(2, 5))).capitalize()
+            if rng.random() < 0.4:
+                name += str(rng.integers(1, 99))
+            while name in used:
+                name += str(rng.integers(0, 9))
+            used.add(name)
+            names.append(name)
+        self.driver_names = names
+
+        self.first_seen = [None] * n
+        self.last_seen = [None] * n
+        self.total_sessions = np.zeros(n, dtype=int)
+
+    def pick_drivers(self, count: int, pool: Optional[np.ndarray] = None) -> np.ndarray:
+        """Estrae piloti distinti pesati per popolarità (da tutti o da un gruppo)"""
+        pool = np.arange(self.num_drivers) if pool is None else pool
+        count = min(count, len(pool))
+        weights = self.popularity[pool] / self.popularity[pool].sum()
+        return self.rng.choice(pool, size=count, replace=False, p=weights)
+
+    # ==================== PIANIFICAZIONE ====================
+
+    def plan(self) -> List[Dict]:
+        """Struttura leghe/campionati/competizioni/sessioni con i piloti di ogni sessione"""
+        rng = self.rng
+        tracks = list(self.track_profiles)
+        systems = list(self.points_systems)
+        members = np.flatnonzero(self.trust == 2)
+        friends = np.flatnonzero(self.trust >= 1)
+        base_date = datetime(2024, 1, 8)
+        budgets = [self.target_sessions // self.num_leagues + (1 if i < self.target_sessions % self.num_leagues else 0)
+                   for i in range(self.num_leagues)]
+
+        leagues = []
+        for league_index, budget in enumerate(budgets):
+            start = base_date + timedelta(days=140 * league_index)
+            league = {
+                'league_id': league_index + 1,
+                'name': f"Synthetic League {league_index + 1}",
+                'season': start.year,
+                'start': start,
+                'end': start + timedelta(days=180),
+                'is_completed': int(league_index < self.num_leagues - 1),
+                'championships': [],
+            }
+
+            # Campionati a tier: time attack nei giorni precedenti e gara (Q + R) con gli iscritti
+            tier_pool = members if len(members) >= 8 else friends
+            for tier in range(1, self.tiers + 1):
+                enrolled = self.pick_drivers(int(rng.integers(12, 17)), tier_pool)
+                championship = self.plan_championship(league, f"Tier {tier}", 'tier', tier, enrolled, systems)
+                for round_number in range(1, self.rounds + 1):
+                    race_day = start + timedelta(days=7 * round_number + tier, hours=21)
+                    sessions = []
+                    for offset in sorted(rng.integers(1, 6 * 24, size=8), reverse=True):
+                        sessions.append(self.plan_session('FP', self.pick_drivers(int(rng.integers(1, 4)), enrolled),
+                                                          race_day - timedelta(hours=int(offset)), time_attack=True))
+                    racers = self.pick_drivers(max(2, int(len(enrolled) * rng.uniform(0.7, 1.0))), enrolled)
+                    sessions.append(self.plan_session('Q', racers, race_day))
+                    sessions.append(self.plan_session('R', racers, race_day + timedelta(minutes=20)))
+                    championship['competitions'].append(self.plan_competition(round_number, rng.choice(tracks), race_day, sessions, True))
+                league['championships'].append(championship)
+
+            # Campionato aperto a amici e membri
+            open_drivers = self.pick_drivers(int(rng.integers(16, 25)), friends)
+            championship = self.plan_championship(league, "Open Cup", 'standard', None, open_drivers, systems)
+            for round_number in range(1, self.rounds + 1):
+                race_day = start + timedelta(days=7 * round_number + 5, hours=21, minutes=30)
+                racers = self.pick_drivers(max(2, int(len(open_drivers) * rng.uniform(0.6, 1.0))), open_drivers)
+                sessions = [self.plan_session('FP', racers, race_day - timedelta(minutes=45))] if rng.random() < 0.3 else []
+                sessions.append(self.plan_session('Q', racers, race_day))
+                sessions.append(self.plan_session('R', racers, race_day + timedelta(minutes=20)))
+                championship['competitions'].append(self.plan_competition(round_number, rng.choice(tracks), race_day, sessions, False))
+            league['championships'].append(championship)
+
+            # Raccolta 4Fun: le sessioni rimanenti del budget in serate libere aperte a tutti
+            planned = sum(len(comp['sessions']) for champ in league['championships'] for comp in champ['competitions'])
+            championship = self.plan_championship(league, "4Fun Collection", 'standard', None, None, systems, fun=True)
+            remaining = budget - planned
+            while remaining > 0:
+                day = start + timedelta(days=int(rng.integers(0, 180)), hours=int(rng.integers(18, 23)), minutes=int(rng.integers(0, 60)))
+                count = min(remaining, int(rng.integers(1, 5)))
+                drivers = self.pick_drivers(int(rng.integers(2, 17)))
+                types = ['FP', 'Q', 'R'][-count:] if count <= 3 else ['FP'] * (count - 2) + ['Q', 'R']
+                sessions = [self.plan_session(session_type, drivers, day + timedelta(minutes=25 * index))
+                            for index, session_type in enumerate(types)]
+                championship['competitions'].append(self.plan_competition(None, rng.choice(tracks), day, sessions, False))
+                remaining -= count
+            league['championships'].insert(0, championship)
+            leagues.append(league)
+
+        return leagues
+
+    def plan_championship(self, league: Dict, name: str, championship_type: str, tier: Optional[int],
+                          enrolled: Optional[np.ndarray], systems: List[str], fun: bool = False) -> Dict:
+        return {
+            'name': f"{league['name']} - {name}",
+            'type': championship_type,
+            'tier': tier,
+            'enrolled': enrolled,
+            'total_rounds': 0 if fun else self.rounds,
+            'points_system': systems[int(self.rng.integers(0, len(systems)))],
+            'competitions': [],
+        }
+
+    def plan_competition(self, round_number: Optional[int], track: str, date: datetime,
+                         sessions: List[Dict], time_attack: bool) -> Dict:
+        for session in sessions:
+            session['track'] = track
+        return {'round': round_number, 'track': track, 'date': date, 'sessions': sessions, 'time_attack': time_attack}
+
+    def plan_session(self, session_type: str, drivers: np.ndarray, date: datetime, time_attack: bool = False) -> Dict:
+        return {
+            'type': session_type,
+            'drivers': drivers,
+            'date': date,
+            'time_attack': time_attack,
+            'wet': bool(self.rng.random() < self.wet_ratio),
+        }
+
+    def unique_session_id(self, date: datetime, session_type: str) -> tuple:
+        """session_id nel formato dei file ACC (YYMMDD_HHMMSS_T), univoco"""
+        while True:
+            session_id = f"{date.strftime('%y%m%d_%H%M%S')}_{session_type}"
+            if session_id not in self.used_session_ids:
+                self.used_session_ids.add(session_id)
+                return session_id, date
+            date += timedelta(seconds=1)
+
+    # ==================== SESSIONI E GIRI ====================
+
+    def simulate_session(self, session: Dict, laps_scale: float) -> Dict:
+        """Genera giri e risultati di una sessione (vettoriale per tutti i piloti)"""
+        rng = self.rng
+        drivers = np.asarray(session['drivers'])
+        n = len(drivers)
+        session_type = session['type']
+        base_time, fractions = self.track_profiles[session['track']]
+        weight = SESSION_LAP_WEIGHT[session_type] * laps_scale
+
+        if session_type == 'R':
+            race_laps = max(2, int(round(weight * rng.uniform(0.8, 1.2))))
+            lap_counts = np.full(n, race_laps)
+            retired = rng.random(n) < 0.06
+            lap_counts[retired] = rng.integers(1, race_laps, size=retired.sum())
+        else:
+            lap_counts = np.maximum(1, rng.poisson(weight, size=n))
+
+        driver_index = np.repeat(np.arange(n), lap_counts)
+        lap_index = np.concatenate([np.arange(count) for count in lap_counts])
+        total = len(driver_index)
+
+        wet = WET_SLOWDOWN if session['wet'] else 0.0
+        times = base_time * (1 + self.pace[drivers][driver_index] + wet) * (1 + np.abs(rng.normal(0, 0.004, total)))
+        incident = rng.random(total) < (0.12 if session['wet'] else 0.07)
+        times *= 1 + incident * rng.uniform(0.03, 0.25, total)
+        # Primo giro: uscita box (prove/qualifica) o partenza da fermo (gara)
+        first = lap_index == 0
+        times *= 1 + first * (0.06 if session_type == 'R' else 0.12)
+        times = times.astype(np.int64)
+        valid = ~incident & (rng.random(total) > 0.05)
+        if session_type != 'R':
+            valid &= ~first
+
+        split_noise = rng.normal(0, 0.004, (total, 2))
+        split1 = (times * fractions[0] * (1 + split_noise[:, 0])).astype(np.int64)
+        split2 = (times * fractions[1] * (1 + split_noise[:, 1])).astype(np.int64)
+        split3 = times - split1 - split2
+
+        # lap_number: indice globale del giro nel file ACC (ordine di completamento)
+        elapsed = np.concatenate([chunk.cumsum() for chunk in np.split(times, np.cumsum(lap_counts)[:-1])])
+        lap_number = np.empty(total, dtype=np.int64)
+        lap_number[np.argsort(elapsed, kind='stable')] = np.arange(total)
+
+        # Miglior giro valido per pilota (ACC_INVALID_TIME se nessuno, come nei file ACC)
+        best = np.full(n, ACC_INVALID_TIME, dtype=np.int64)
+        best_row = np.full(n, -1)
+        valid_rows = np.flatnonzero(valid)
+        ordered = valid_rows[np.lexsort((times[valid_rows], driver_index[valid_rows]))]
+        with_best, first = np.unique(driver_index[ordered], return_index=True)
+        best_row[with_best] = ordered[first]
+        best[with_best] = times[ordered[first]]
+        total_time = np.bincount(driver_index, weights=times, minlength=n).astype(np.int64)
+
+        if session_type == 'R':
+            ranking = np.lexsort((total_time, -lap_counts))
+        else:
+            ranking = np.lexsort((np.arange(n), best))
+        positions = np.empty(n, dtype=int)
+        positions[ranking] = np.arange(1, n + 1)
+
+        return {
+            'drivers': drivers, 'lap_counts': lap_counts, 'driver_index': driver_index, 'times': times,
+            'valid': valid, 'split1': split1, 'split2': split2, 'split3': split3, 'lap_number': lap_number,
+            'best': best, 'best_row': best_row, 'total_time': total_time, 'positions': positions,
+        }
+
+    def write_session(self, conn: sqlite3.Connection, session: Dict, competition_id: int, server_name: str,
+                      session_order: int, result: Dict) -> str:
+        """Scrive sessione, giri, risultati, penalità e file sincronizzato"""
+        session_id, date = self.unique_session_id(session['date'], session['type'])
+        session['session_id'] = session_id
+        drivers = result['drivers']
+        car_ids = 1000 + np.arange(len(drivers))
+        overall = int(np.argmin(result['best'])) if len(drivers) else 0
+        best_row = result['best_row'][overall]
+        best_splits = (int(result['split1'][best_row]), int(result['split2'][best_row]), int(result['split3'][best_row])) \
+            if best_row >= 0 else (None, None, None)
+        date_str = date.strftime('%Y-%m-%dT%H:%M:%S')
+        processed_at = (date + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+
+        conn.execute('''
+            INSERT INTO sessions (session_id, filename, session_type, track_name, server_name, session_date,
+                best_lap_overall, best_split1, best_split2, best_split3, total_drivers, is_wet_session, metadata,
+                competition_id, session_order, is_autoassign_comp, processed_at, is_time_attack)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)
+        ''', (session_id, f"{session_id}.json", session['type'], session['track'], server_name, date_str,
+              int(result['best'][overall]) if best_row >= 0 else None, *best_splits, len(drivers), int(session['wet']),
+              session['track'], competition_id, session_order, processed_at, int(session['time_attack'])))
+
+        driver_ids = [self.driver_ids[d] for d in drivers]
+        row_driver = result['driver_index']
+        conn.executemany('''
+            INSERT INTO laps (session_id, driver_id, car_id, lap_time, is_valid_for_best, split1, split2, split3, lap_number)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', zip([session_id] * len(row_driver), [driver_ids[d] for d in row_driver], car_ids[row_driver].tolist(),
+                 result['times'].tolist(), result['valid'].astype(int).tolist(), result['split1'].tolist(),
+                 result['split2'].tolist(), result['split3'].tolist(), result['lap_number'].tolist()))
+
+        results = []
+        for index, driver in enumerate(drivers):
+            row = result['best_row'][index]
+            splits = (int(result['split1'][row]), int(result['split2'][row]), int(result['split3'][row])) if row >= 0 \
+                else (ACC_INVALID_TIME, ACC_INVALID_TIME, ACC_INVALID_TIME)
+            results.append((session_id, driver_ids[index], int(result['positions'][index]), int(car_ids[index]),
+                            int(self.race_number[driver]), int(self.car_model[driver]), 0, int(result['best'][index]),
+                            *splits, int(result['total_time'][index]), int(result['lap_counts'][index]), 0,
+                            0 if session['type'] == 'R' else -1))
+            self.total_sessions[driver] += 1
+            if self.first_seen[driver] is None or date_str < self.first_seen[driver]:
+                self.first_seen[driver] = date_str
+            if self.last_seen[driver] is None or date_str > self.last_seen[driver]:
+                self.last_seen[driver] = date_str
+        conn.executemany('''
+            INSERT INTO session_results (session_id, driver_id, position, car_id, race_number, car_model, cup_category,
+                best_lap, best_split1, best_split2, best_split3, total_time, lap_count, is_spectator, missing_mandatory_pitstop)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', results)
+
+        penalised = np.flatnonzero(self.rng.random(len(drivers)) < (0.06 if session['type'] == 'R' else 0.01))
+        penalties = []
+        for index in penalised:
+            reason, penalty_type, value = PENALTY_CATALOGUE[int(self.rng.integers(0, len(PENALTY_CATALOGUE)))]
+            violation = int(self.rng.integers(0, max(1, result['lap_counts'][index])))
+            penalties.append((session_id, driver_ids[index], int(car_ids[index]), reason, penalty_type, value,
+                              violation, violation + 1, int(penalty_type == 'PostRaceTime')))
+        conn.executemany('''
+            INSERT INTO penalties (session_id, driver_id, car_id, reason, penalty_type, penalty_value,
+                violation_lap, cleared_lap, is_post_race)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', penalties)
+
+        conn.execute('''
+            INSERT INTO synced_files (filename, file_hash, file_size, synced_at, processed_in_db, processed_at, processing_result)
+            VALUES (?, ?, ?, ?, 1, ?, ?)
+        ''', (f"{session_id}.json", hashlib.md5(session_id.encode()).hexdigest(), 2048 + 180 * len(row_driver),
+              processed_at, processed_at, f"processed: synthetic_{session['type']}_{len(drivers)}drivers_{len(row_driver)}laps"))
+
+        self.counts['laps'] = self.counts.get('laps', 0) + len(row_driver)
+        self.counts['sessions'] = self.counts.get('sessions', 0) + 1
+        return session_id
+
+    # ==================== CLASSIFICHE ====================
+
+    def competition_standings(self, competition: Dict, results: List[Dict], system: tuple) -> Dict[int, Dict]:
+        """Punti per competizione: time attack (tier), gara, pole e giro veloce"""
+        points_table, pole_points, fastest_points, _ = system
+        standings = {}
+
+        if competition['time_attack']:
+            best_ta = {}
+            for session, result in zip(competition['sessions'], results):
+                if not session['time_attack']:
+                    continue
+                for index, driver in enumerate(result['drivers']):
+                    if result['best'][index] < best_ta.get(driver, (ACC_INVALID_TIME,))[0]:
+                        best_ta[driver] = (int(result['best'][index]), session, result, int(result['best_row'][index]))
+            ranked = sorted(best_ta.items(), key=lambda item: (item[1][0], self.driver_ids[item[0]]))
+            for rank, (driver, (lap_time, session, result, row)) in enumerate(ranked):
+                points = TIME_ATTACK_POINTS[rank] if rank < len(TIME_ATTACK_POINTS) else 0
+                standings[driver] = self.standing_entry(float(points))
+                standings[driver]['time_attack'] = (lap_time, session, result, row)
+
+        for session, result in zip(competition['sessions'], results):
+            if session['time_attack']:
+                continue
+            if session['type'] == 'Q' and len(result['drivers']):
+                pole = result['drivers'][int(np.argmin(result['positions']))]
+                standings.setdefault(pole, self.standing_entry())
+                standings[pole]['pole'] = pole_points
+                standings[pole]['has_pole'] = True
+            if session['type'] == 'R':
+                for index, driver in enumerate(result['drivers']):
+                    position = int(result['positions'][index])
+                    entry = standings.setdefault(driver, self.standing_entry())
+                    entry['race_points'] = float(points_table[position - 1]) if position <= len(points_table) else 0.0
+                    entry['position'] = position
+                if result['best'].min() < ACC_INVALID_TIME:
+                    for index in np.flatnonzero(result['best'] == result['best'].min()):
+                        standings[result['drivers'][index]]['fastest'] = fastest_points
+                        standings[result['drivers'][index]]['has_fastest'] = True
+
+        for entry in standings.values():
+            entry['total'] = (entry['time_attack_points'] or 0.0) + entry['race_points'] + entry['pole'] + entry['fastest']
+        return standings
+
+    @staticmethod
+    def standing_entry(time_attack_points: Optional[float] = None) -> Dict:
+        return {'time_attack_points': time_attack_points, 'race_points': 0.0, 'pole': 0, 'fastest': 0,
+                'has_pole': False, 'has_fastest': False, 'position': None}
+
+    def write_competition_standings(self, conn: sqlite3.Connection, competition_id: int, standings: Dict[int, Dict]):
+        conn.executemany('''
+            INSERT INTO competition_standings (competition_id, driver_id, time_attack_points, race_points, pole_points,
+                fastest_lap_points, points_dropped, points_bonus, total_points, guests_beaten, beaten_by_guests,
+                created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, 0, 0, ?, 0, 0, ?, ?)
+        ''', [(competition_id, self.driver_ids[driver], entry['time_attack_points'], entry['race_points'], entry['pole'],
+               entry['fastest'], entry['total'], self.timestamp, self.timestamp) for driver, entry in standings.items()])
+
+        time_attack = [(driver, entry['time_attack']) for driver, entry in standings.items() if 'time_attack' in entry]
+        rows = []
+        for driver, (lap_time, session, result, row) in time_attack:
+            index = int(np.flatnonzero(result['drivers'] == driver)[0])
+            rows.append((competition_id, self.driver_ids[driver], lap_time, int(result['split1'][row]),
+                         int(result['split2'][row]), int(result['split3'][row]), standings[driver]['time_attack_points'],
+                         session['session_id'], int(result['lap_number'][row]), str(self.car_model[driver]),
+                         int(result['lap_counts'][index]), self.timestamp, self.timestamp))
+        conn.executemany('''
+            INSERT INTO time_attack_results (competition_id, driver_id, best_lap_time, best_split1, best_split2, best_split3,
+                points, session_id, lap_number, car_model, total_sessions, total_laps, created_at, updated_at, is_enrolled)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, 1)
+        ''', rows)
+
+    def write_championship_standings(self, conn: sqlite3.Connection, championship_id: int, total_rounds: int,
+                                     drops: int, rounds: List[Dict[int, Dict]], is_tier: bool):
+        """Classifica campionato: somma punti, scarti dei peggiori risultati, vittorie, podi, pole, giri veloci.
+        Nei tier vittorie e podi sono i piazzamenti nel totale di ogni competizione, come nel manager."""
+        if is_tier:
+            for standings in rounds:
+                totals = [entry['total'] for entry in standings.values()]
+                for entry in standings.values():
+                    entry['rank'] = 1 + sum(1 for total in totals if total > entry['total'])
+
+        drivers = {driver for standings in rounds for driver in standings}
+        rows = []
+        for driver in drivers:
+            entries = [standings[driver] for standings in rounds if driver in standings]
+            totals = sorted([entry['total'] for entry in entries] + [0.0] * max(0, total_rounds - len(entries)))
+            dropped = sum(totals[:drops]) if drops else 0.0
+            gross = sum(entry['total'] for entry in entries)
+            positions = [entry['position'] for entry in entries if entry['position']]
+            placings = [entry['rank'] for entry in entries] if is_tier else positions
+            cv = np.std(positions) / np.mean(positions) if len(positions) > 1 else 0.0
+            rows.append([driver, gross, dropped, gross - dropped, len(entries),
+                         sum(1 for p in placings if p == 1), sum(1 for p in placings if p <= 3),
+                         sum(1 for entry in entries if entry['has_pole']), sum(1 for entry in entries if entry['has_fastest']),
+                         float(np.mean(positions)) if positions else None, min(positions) if positions else None,
+                         round(max(0.0, 100 - cv * 100), 1)])
+        rows.sort(key=lambda row: (-round(row[3], 1), self.driver_ids[row[0]]))
+        conn.executemany('''
+            INSERT INTO championship_standings (championship_id, driver_id, gross_points, points_dropped, base_points,
+                participation_multiplier, participation_bonus, total_points, position, competitions_participated,
+                wins, podiums, poles, fastest_laps, average_position, best_position, consistency_rating, last_updated)
+            VALUES (?, ?, ?, ?, ?, 1.0, 0, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(championship_id, self.driver_ids[row[0]], round(row[1], 1), round(row[2], 1), round(row[3], 1),
+               round(row[3], 1), position, *row[4:], self.timestamp) for position, row in enumerate(rows, start=1)])
+
+    # ==================== GENERAZIONE ====================
+
+    def generate(self) -> Dict[str, int]:
+        """Crea il database sintetico completo"""
+        start = time.perf_counter()
+        if Path(self.output_path).exists():
+            os.remove(self.output_path)
+
+        template = sqlite3.connect(f"file:{self.template_path}?mode=ro", uri=True)
+        conn = sqlite3.connect(self.output_path)
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        try:
+            self.create_schema(conn, template)
+            self.track_profiles = load_track_profiles(template)
+            self.points_systems = self.load_points_systems(conn)
+            car_models = [row[0] for row in conn.execute('SELECT car_model FROM car_models')] or [32, 35]
+            self.create_drivers(car_models)
+            leagues = self.plan()
+
+            # Giri per pilota scalati per avvicinare il totale richiesto
+            weighted = sum(SESSION_LAP_WEIGHT[session['type']] * len(session['drivers'])
+                           for league in leagues for champ in league['championships']
+                           for comp in champ['competitions'] for session in comp['sessions'])
+            laps_scale = self.target_laps / weighted if weighted else 1.0
+
+            for league in leagues:
+                self.write_league(conn, league, laps_scale)
+                conn.commit()
+
+            self.write_drivers(conn)
+            bump_data_version(conn)
+            conn.commit()
+            for table in ('drivers', 'leagues', 'championships', 'competitions', 'session_results', 'time_attack_results',
+                          'competition_standings', 'championship_standings', 'penalties'):
+                self.counts[table] = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            conn.execute('ANALYZE')
+        finally:
+            conn.close()
+            template.close()
+
+        self.counts['elapsed'] = time.perf_counter() - start
+        return self.counts
+
+    def write_league(self, conn: sqlite3.Connection, league: Dict, laps_scale: float):
+        cursor = conn.execute('''
+            INSERT INTO leagues (name, season, description, start_date, end_date, total_tiers, is_completed, created_at)
+            VALUES (?, ?, 'Synthetic load-test league', ?, ?, ?, ?, ?)
+        ''', (league['name'], league['season'], league['start'].strftime('%Y-%m-%d'), league['end'].strftime('%Y-%m-%d'),
+              self.tiers, league['is_completed'], league['start'].strftime('%Y-%m-%d %H:%M:%S')))
+        league_id = cursor.lastrowid
+        # Timestamp fissi (niente CURRENT_TIMESTAMP) per un contenuto riproducibile
+        self.timestamp = league['start'].strftime('%Y-%m-%d %H:%M:%S')
+        server_name = f"{league['name']} Server"
+
+        for championship in league['championships']:
+            system = self.points_systems[championship['points_system']]
+            cursor = conn.execute('''
+                INSERT INTO championships (league_id, tier_number, championship_type, name, description, season,
+                    start_date, end_date, total_rounds, is_completed, created_at)
+                VALUES (?, ?, ?, ?, 'Synthetic', ?, ?, ?, ?, ?, ?)
+            ''', (league_id, championship['tier'], championship['type'], championship['name'], league['season'],
+                  league['start'].strftime('%Y-%m-%d'), league['end'].strftime('%Y-%m-%d'), championship['total_rounds'],
+                  league['is_completed'], league['start'].strftime('%Y-%m-%d %H:%M:%S')))
+            championship_id = cursor.lastrowid
+            if championship['type'] == 'tier':
+                conn.executemany('INSERT INTO championship_enrollments (championship_id, driver_id, enrolled_at) VALUES (?, ?, ?)',
+                                 [(championship_id, self.driver_ids[driver], self.timestamp) for driver in championship['enrolled']])
+
+            rounds = []
+            for number, competition in enumerate(championship['competitions'], start=1):
+                name = f"Round {competition['round']} - {competition['track'].title()}" if competition['round'] \
+                    else f"{competition['track'].title()} 4Fun #{number}"
+                day = competition['date'].strftime('%Y-%m-%d')
+                cursor = conn.execute('''
+                    INSERT INTO competitions (championship_id, name, round_number, track_name, date_start, date_end,
+                        weekend_format, points_system_json, is_completed, notes, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, 'sprint', ?, ?, 'Synthetic', ?)
+                ''', (championship_id, name, competition['round'], competition['track'], day, day,
+                      championship['points_system'], int(league['is_completed'] or competition['round'] != self.rounds),
+                      competition['date'].strftime('%Y-%m-%d %H:%M:%S')))
+                competition_id = cursor.lastrowid
+                tag = f"(id_ta={competition_id})" if competition['time_attack'] else f"(id_race={competition_id})"
+
+                competition['sessions'].sort(key=lambda session: session['date'])
+                results = []
+                for order, session in enumerate(competition['sessions'], start=1):
+                    result = self.simulate_session(session, laps_scale)
+                    self.write_session(conn, session, competition_id, f"{server_name} {tag}", order, result)
+                    results.append(result)
+
+                standings = self.competition_standings(competition, results, system)
+                self.write_competition_standings(conn, competition_id, standings)
+                rounds.append(standings)
+
+            if championship['total_rounds']:
+                self.write_championship_standings(conn, championship_id, championship['total_rounds'], system[3], rounds,
+                                                  championship['type'] == 'tier')
+
+    def write_drivers(self, conn: sqlite3.Connection):
+        conn.executemany('''
+            INSERT INTO drivers (driver_id, last_name, short_name, preferred_race_number, first_seen, last_seen,
+                total_sessions, bad_driver_reports, trust_level)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)
+        ''', [(self.driver_ids[i], self.driver_names[i], self.driver_names[i][:3].upper(), int(self.race_number[i]),
+               self.first_seen[i], self.last_seen[i], int(self.total_sessions[i]), int(self.trust[i]))
+              for i in range(self.num_drivers)])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Genera un database ACC sintetico per i test di carico")
+    parser.add_argument('--output', required=True, help="Database da creare (sovrascritto se esiste)")
+    parser.add_argument('--template', default=os.getenv('ACC_DATABASE_PATH', 'acc_stats.db'),
+                        help="Database modello per schema, tabelle di riferimento e tempi per pista")
+    parser.add_argument('--seed', type=int, default=42, help="Seed per risultati riproducibili")
+    parser.add_argument('--sessions', type=int, default=40000, help="Sessioni da generare")
+    parser.add_argument('--laps', type=int, default=3000000, help="Giri da generare (circa)")
+    parser.add_argument('--drivers', type=int, default=5000, help="Piloti")
+    parser.add_argument('--leagues', type=int, default=20, help="Leghe")
+    parser.add_argument('--tiers', type=int, default=3, help="Campionati a tier per lega")
+    parser.add_argument('--rounds', type=int, default=6, help="Round per campionato")
+    parser.add_argument('--wet-ratio', type=float, default=0.06, help="Quota di sessioni sul bagnato")
+    args = parser.parse_args()
+
+    if not Path(args.template).exists():
+        print(f"❌ Template database not found: {args.template}")
+        return 1
+    if Path(args.output).resolve() == Path(args.template).resolve():
+        print("❌ Output and template must be different databases")
+        return 1
+
+    generator = SyntheticDatabaseGenerator(
+        args.output, args.template, seed=args.seed, sessions=args.sessions, laps=args.laps, drivers=args.drivers,
+        leagues=args.leagues, tiers=args.tiers, rounds=args.rounds, wet_ratio=args.wet_ratio
+    )
+    counts = generator.generate()
+    print(f"✅ Generated {args.output} in {counts['elapsed']:.1f}s")
+    for table in ('laps', 'sessions', 'drivers', 'leagues', 'championships', 'competitions', 'session_results',
+                  'time_attack_results', 'competition_standings', 'championship_standings', 'penalties'):
+        print(f"   {table}: {counts.get(table, 0)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
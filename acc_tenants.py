@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+ACC Tenants - Più community servite dallo stesso processo del dashboard
+Il registro (acc_tenants.json, o il file indicato da ACC_TENANTS_FILE) elenca le community
+ospitate. Ogni community ha un file di configurazione nello stesso formato di acc_config.json
+(community, social, database, cache...) e/o sezioni inline che lo completano:
+
+    {
+        "default": "tfl",
+        "tenants": {
+            "tfl": {"config": "tenants/tfl.json"},
+            "gt3": {"config": "tenants/gt3.json", "cache": {"max_mb": 64}}
+        }
+    }
+
+I percorsi relativi (file di configurazione, database.path, database.archive_path) sono
+risolti rispetto alla cartella del registro. La community si sceglie con ?community=<id>
+nell'URL; senza parametro si usa "default". Import, pool e cache sono del processo, ma
+ogni community ha i propri database, pool di connessioni e budget di cache.
+
+Uso:
+    python acc_tenants.py [--registry acc_tenants.json]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TENANTS_FILE = 'acc_tenants.json'
+TENANT_QUERY_PARAM = 'community'
+
+# Chiavi di percorso dentro la sezione database di una community
+PATH_KEYS = ('path', 'archive_path')
+
+# Registro già letto, per percorso e mtime del file
+_registry_cache: Dict[str, tuple] = {}
+
+
+class TenantError(Exception):
+    """Registro non valido o community sconosciuta"""
+
+
+def get_registry_path() -> Optional[Path]:
+    """Percorso del registro se esiste (modalità multi-community), altrimenti None"""
+    path = Path(os.getenv('ACC_TENANTS_FILE') or TENANTS_FILE)
+    return path if path.exists() else None
+
+
+def load_registry(path: Path) -> Dict:
+    """Registro delle community (riletto solo se il file è cambiato)"""
+    mtime = path.stat().st_mtime_ns
+    cached = _registry_cache.get(str(path))
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            registry = json.load(f)
+    except (OSError, ValueError) as e:
+        raise TenantError(f"invalid tenants registry {path}: {e}")
+
+    tenants = registry.get('tenants')
+    if not isinstance(tenants, dict) or not tenants:
+        raise TenantError(f"no tenants defined in {path}")
+    default = registry.get('default') or next(iter(tenants))
+    if default not in tenants:
+        raise TenantError(f"default tenant '{default}' not defined in {path}")
+
+    registry = {'default': default, 'tenants': tenants, 'base_dir': path.resolve().parent}
+    _registry_cache[str(path)] = (mtime, registry)
+    return registry
+
+
+def list_tenants(registry: Dict) -> List[str]:
+    return list(registry['tenants'])
+
+
+def get_tenant_layers(registry: Dict, tenant_id: str) -> List[Dict]:
+    """Configurazioni della community da unire sopra quella base: file, poi sezioni inline"""
+    if tenant_id not in registry['tenants']:
+        raise TenantError(f"unknown community '{tenant_id}'")
+    # Copia: i livelli vengono uniti (e modificati) nella configurazione del dashboard
+    entry = copy.deepcopy(registry['tenants'][tenant_id])
+
+    base_dir = registry['base_dir']
+    layers = []
+    config_file = entry.get('config')
+    if config_file:
+        config_path = base_dir / config_file
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                layers.append(json.load(f))
+        except (OSError, ValueError) as e:
+            raise TenantError(f"invalid config for community '{tenant_id}' ({config_path}): {e}")
+    layers.append({key: value for key, value in entry.items() if key != 'config'})
+
+    for layer in layers:
+        database = layer.get('database')
+        if isinstance(database, dict):
+            for key in PATH_KEYS:
+                if database.get(key):
+                    database[key] = str(base_dir / database[key])
+    return layers
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Verifica il registro delle community ospitate")
+    parser.add_argument('--registry', default=os.getenv('ACC_TENANTS_FILE', TENANTS_FILE), help="Registro delle community")
+    args = parser.parse_args()
+
+    if not Path(args.registry).exists():
+        print(f"❌ Registry not found: {args.registry}")
+        return 1
+
+    try:
+        registry = load_registry(Path(args.registry))
+        status = 0
+        for tenant_id in list_tenants(registry):
+            config = {}
+            for layer in get_tenant_layers(registry, tenant_id):
+                for section, values in layer.items():
+                    if isinstance(values, dict):
+                        config.setdefault(section, {}).update(values)
+                    else:
+                        config[section] = values
+            name = config.get('community', {}).get('name', tenant_id)
+            db_path = config.get('database', {}).get('path')
+            cache_mb = config.get('cache', {}).get('max_mb', 'default')
+            exists = bool(db_path) and Path(db_path).exists()
+            status = status or (0 if exists else 1)
+            marker = " (default)" if tenant_id == registry['default'] else ""
+            print(f"{'✅' if exists else '❌'} {tenant_id}{marker}: {name} | db: {db_path or 'not configured'} | cache: {cache_mb} MB")
+        return status
+    except TenantError as e:
+        print(f"❌ {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+ACC Standings Verifier - Ricalcolo classifiche dai risultati grezzi
+Ricalcola competition_standings e championship_standings da session_results,
+time_attack_results, points_systems e manual_penalties e confronta i valori
+scritti dal manager esterno. Un campionato per processo worker.
+
+Uso:
+    python acc_verify.py [--db acc_stats.db] [--championship ID] [--workers N] [--csv report.csv]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from acc_analytics import parse_position_points
+
+# Tolleranza sui punti (il manager arrotonda a un decimale)
+POINTS_TOLERANCE = 0.05
+
+COMPETITION_COLUMNS = ['race_points', 'pole_points', 'fastest_lap_points', 'time_attack_points',
+                       'points_bonus', 'total_points']
+CHAMPIONSHIP_COLUMNS = ['gross_points', 'points_dropped', 'base_points', 'total_points', 'position',
+                        'competitions_participated', 'wins', 'podiums', 'poles', 'fastest_laps']
+REPORT_COLUMNS = ['championship_id', 'scope', 'competition_id', 'driver_id', 'driver', 'column',
+                  'stored', 'expected']
+
+
+def load_championship_data(conn: sqlite3.Connection, championship_id: int) -> Dict[str, pd.DataFrame]:
+    """Carica con poche query indicizzate tutto ciò che serve a ricalcolare un campionato"""
+    params = [championship_id]
+
+    data = {
+        'championship': pd.read_sql_query('''
+            SELECT championship_id, championship_type, COALESCE(total_rounds, 0) as total_rounds
+            FROM championships
+            WHERE championship_id = ?
+        ''', conn, params=params),
+        'competitions': pd.read_sql_query('''
+            SELECT
+                c.competition_id,
+                c.points_system_json as system_name,
+                ps.position_points_json,
+                COALESCE(ps.pole_position_points, 0) as pole_position_points,
+                COALESCE(ps.fastest_lap_points, 0) as fastest_lap_points,
+                COALESCE(ps.drop_worst_results, 0) as drop_worst_results,
+                COALESCE(ps.guest_bonus_value, 0) as guest_bonus_value
+            FROM competitions c
+            LEFT JOIN points_systems ps ON c.points_system_json = ps.name
+            WHERE c.championship_id = ?
+        ''', conn, params=params),
+        'session_results': pd.read_sql_query('''
+            SELECT
+                s.competition_id,
+                s.session_id,
+                s.session_type,
+                s.best_lap_overall,
+                sr.driver_id,
+                sr.position,
+                sr.best_lap,
+                CASE WHEN ce.driver_id IS NOT NULL THEN 1 ELSE 0 END as is_enrolled
+            FROM sessions s
+            JOIN competitions c ON s.competition_id = c.competition_id
+            JOIN session_results sr ON sr.session_id = s.session_id
+            LEFT JOIN championship_enrollments ce
+                   ON ce.driver_id = sr.driver_id AND ce.championship_id = c.championship_id
+            WHERE c.championship_id = ?
+              AND (s.is_time_attack IS NULL OR s.is_time_attack = 0)
+              AND sr.position IS NOT NULL
+        ''', conn, params=params),
+        'time_attack': pd.read_sql_query('''
+            SELECT tar.competition_id, tar.driver_id, tar.points
+            FROM time_attack_results tar
+            JOIN competitions c ON tar.competition_id = c.competition_id
+            WHERE c.championship_id = ?
+        ''', conn, params=params),
+        'competition_standings': pd.read_sql_query('''
+            SELECT cs.competition_id, cs.driver_id, d.last_name as driver,
+                   cs.race_points, cs.pole_points, cs.fastest_lap_points, cs.time_attack_points,
+                   cs.points_bonus, cs.points_dropped, cs.total_points,
+                   cs.guests_beaten, cs.beaten_by_guests
+            FROM competition_standings cs
+            JOIN competitions c ON cs.competition_id = c.competition_id
+            JOIN drivers d ON cs.driver_id = d.driver_id
+            WHERE c.championship_id = ?
+        ''', conn, params=params),
+        'championship_standings': pd.read_sql_query('''
+            SELECT cs.driver_id, d.last_name as driver,
+                   cs.gross_points, cs.points_dropped, cs.base_points, cs.participation_multiplier,
+                   cs.participation_bonus, cs.total_points, cs.position, cs.competitions_participated,
+                   cs.wins, cs.podiums, cs.poles, cs.fastest_laps
+            FROM championship_standings cs
+            JOIN drivers d ON cs.driver_id = d.driver_id
+            WHERE cs.championship_id = ?
+        ''', conn, params=params),
+        'penalties': pd.read_sql_query('''
+            SELECT driver_id, SUM(penalty_points) as penalty_points
+            FROM manual_penalties
+            WHERE championship_id = ? AND is_active = 1
+            GROUP BY driver_id
+        ''', conn, params=params),
+    }
+    return data
+
+
+def session_ranks(results: pd.DataFrame, is_tier: bool) -> pd.DataFrame:
+    """Aggiunge rank di arrivo e di giro veloce per sessione (nei tier contano solo gli iscritti)"""
+    ranked = results[results['is_enrolled'] == 1].copy() if is_tier else results.copy()
+    by_session = ranked.groupby('session_id')
+    ranked['finish_rank'] = by_session['position'].rank(method='min')
+    best_lap = ranked['best_lap'].where(ranked['best_lap'] > 0)
+    ranked['is_fastest_lap'] = (best_lap == best_lap.groupby(ranked['session_id']).transform('min')).astype(int)
+    ranked['is_race'] = ranked['session_type'].str.startswith('R').astype(int)
+    ranked['is_qualy'] = ranked['session_type'].str.startswith('Q').astype(int)
+    return ranked
+
+
+def recompute_competition_standings(data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Ricalcola i punti di ogni pilota in ogni competizione del campionato"""
+    stored = data['competition_standings']
+    competitions = data['competitions']
+    is_tier = (data['championship']['championship_type'] == 'tier').any()
+
+    expected = stored[['competition_id', 'driver_id', 'driver', 'points_dropped',
+                       'guests_beaten', 'beaten_by_guests', 'race_points']].merge(
+        competitions, on='competition_id', how='left'
+    )
+
+    # Punti posizione: tabella lunga (sistema, posizione, punti) unita agli arrivi in gara
+    position_tables = [
+        pd.DataFrame({'system_name': name, 'position': list(table), 'position_points': list(table.values())})
+        for name, table in (
+            (name, parse_position_points(points_json))
+            for name, points_json in competitions[['system_name', 'position_points_json']]
+            .drop_duplicates('system_name').itertuples(index=False)
+        )
+        if table
+    ]
+    results = data['session_results'].merge(competitions[['competition_id', 'system_name']], on='competition_id')
+    races = results[results['session_type'].str.startswith('R')]
+    if position_tables:
+        races = races.merge(pd.concat(position_tables), on=['system_name', 'position'], how='left')
+        race_points = races.groupby(['competition_id', 'driver_id'])['position_points'].sum(min_count=1)
+        expected = expected.join(race_points.rename('race_points_calc'), on=['competition_id', 'driver_id'])
+    else:
+        expected['race_points_calc'] = np.nan
+
+    # Sistemi a formula (tier senza tabella posizioni): race_points non ricalcolabile
+    has_table = expected['position_points_json'].fillna('').str.len() > 0
+    expected['race_points_verifiable'] = has_table
+    expected['race_points'] = np.where(has_table, expected['race_points_calc'].fillna(0), expected['race_points'])
+
+    # Pole (P1 in qualifica) e giro veloce in gara
+    ranked = session_ranks(data['session_results'], is_tier)
+    ranked['pole'] = ranked['is_qualy'] * (ranked['finish_rank'] == 1)
+    ranked['fastest'] = ranked['is_race'] * ranked['is_fastest_lap']
+    counts = ranked.groupby(['competition_id', 'driver_id'])[['pole', 'fastest']].sum()
+    expected = expected.join(counts, on=['competition_id', 'driver_id'])
+    expected[['pole', 'fastest']] = expected[['pole', 'fastest']].fillna(0)
+    expected['pole_points'] = expected['pole'] * expected['pole_position_points']
+    expected['fastest_lap_points'] = expected['fastest'] * expected['fastest_lap_points']
+
+    ta_points = data['time_attack'].set_index(['competition_id', 'driver_id'])['points']
+    expected['time_attack_points'] = expected.join(ta_points.rename('ta'), on=['competition_id', 'driver_id'])['ta']
+
+    expected['points_bonus'] = expected['guest_bonus_value'].fillna(0) * (
+        expected['guests_beaten'].fillna(0) - expected['beaten_by_guests'].fillna(0)
+    )
+    # Il malus ospiti entra nel totale solo per chi ha preso punti in gara
+    applied_bonus = expected['points_bonus'].where(
+        (expected['points_bonus'] >= 0) | (expected['race_points'].fillna(0) > 0), 0
+    )
+    expected['total_points'] = (
+        expected['race_points'].fillna(0) + expected['pole_points'] + expected['fastest_lap_points']
+        + expected['time_attack_points'].fillna(0) + applied_bonus
+        - expected['points_dropped'].fillna(0)
+    )
+    return expected
+
+
+def recompute_championship_standings(data: Dict[str, pd.DataFrame], competition_df: pd.DataFrame) -> pd.DataFrame:
+    """Ricalcola la classifica campionato dai totali competizione ricalcolati"""
+    stored = data['championship_standings']
+    championship = data['championship'].iloc[0]
+    is_tier = championship['championship_type'] == 'tier'
+    drop_worst = int(data['competitions']['drop_worst_results'].max()) if not data['competitions'].empty else 0
+
+    # Matrice piloti x round dei totali competizione (round mancanti = 0 punti)
+    drivers = pd.Index(stored['driver_id'])
+    totals = competition_df.pivot_table(index='driver_id', columns='competition_id',
+                                        values='total_points', aggfunc='sum').reindex(drivers)
+    n_rounds = max(int(championship['total_rounds']), totals.shape[1])
+    matrix = np.zeros((len(drivers), n_rounds))
+    matrix[:, :totals.shape[1]] = totals.fillna(0).to_numpy()
+
+    worst_first = np.sort(matrix, axis=1)
+    expected = stored[['driver_id', 'driver', 'participation_multiplier', 'participation_bonus']].copy()
+    expected['gross_points'] = matrix.sum(axis=1)
+    expected['points_dropped'] = worst_first[:, :min(drop_worst, n_rounds)].sum(axis=1)
+    expected['base_points'] = expected['gross_points'] - expected['points_dropped']
+
+    penalties = data['penalties'].set_index('driver_id')['penalty_points']
+    expected['total_points'] = (
+        expected['base_points'] * expected['participation_multiplier'].fillna(1.0)
+        + expected['participation_bonus'].fillna(0)
+        - expected['driver_id'].map(penalties).fillna(0)
+    )
+    # A pari punti lo spareggio del manager non è ricostruibile: vale qualsiasi posizione nel gruppo
+    rounded_total = expected['total_points'].round(1)
+    best_rank = rounded_total.rank(method='min', ascending=False)
+    worst_rank = rounded_total.rank(method='max', ascending=False)
+    expected['position'] = stored['position'].clip(best_rank, worst_rank).fillna(best_rank)
+    expected['competitions_participated'] = expected['driver_id'].map(
+        competition_df.groupby('driver_id')['competition_id'].nunique()
+    ).fillna(0)
+
+    ranked = session_ranks(data['session_results'], is_tier)
+    ranked['win'] = ranked['is_race'] * (ranked['finish_rank'] == 1)
+    ranked['podium'] = ranked['is_race'] * (ranked['finish_rank'] <= 3)
+    ranked['pole'] = ranked['is_qualy'] * (ranked['finish_rank'] == 1)
+    ranked['fastest'] = ranked['is_race'] * ranked['is_fastest_lap']
+    counts = ranked.groupby('driver_id')[['win', 'podium', 'pole', 'fastest']].sum()
+    if is_tier:
+        # Nei tier vittorie e podi sono i piazzamenti nel totale di ogni competizione
+        competition_rank = competition_df.groupby('competition_id')['total_points'].rank(method='min', ascending=False)
+        # Un pilota compare in più competizioni: senza unique() l'unione duplicherebbe le sue righe
+        counts = counts.reindex(counts.index.union(pd.Index(competition_df['driver_id'].unique()))).fillna(0)
+        counts['win'] = (competition_rank == 1).groupby(competition_df['driver_id']).sum()
+        counts['podium'] = (competition_rank <= 3).groupby(competition_df['driver_id']).sum()
+    counts.columns = ['wins', 'podiums', 'poles', 'fastest_laps']
+    expected = expected.join(counts, on='driver_id')
+    expected[list(counts.columns)] = expected[list(counts.columns)].fillna(0)
+
+    return expected
+
+
+def diff_standings(stored: pd.DataFrame, expected: pd.DataFrame, keys: List[str], columns: List[str]) -> pd.DataFrame:
+    """Confronta colonna per colonna e ritorna una riga per ogni differenza"""
+    merged = stored.merge(expected, on=keys, how='outer', suffixes=('_stored', '_expected'), indicator=True)
+    diffs = []
+
+    for column in columns:
+        stored_values = merged[f'{column}_stored'].astype(float).fillna(0)
+        expected_values = merged[f'{column}_expected'].astype(float).fillna(0)
+        mismatch = (stored_values - expected_values).abs() > POINTS_TOLERANCE
+        if column == 'race_points' and 'race_points_verifiable' in merged:
+            mismatch &= merged['race_points_verifiable'].fillna(True).astype(bool)
+        if mismatch.any():
+            rows = merged.loc[mismatch, keys].copy()
+            rows['driver'] = merged.loc[mismatch, 'driver_stored'].fillna(merged.loc[mismatch, 'driver_expected'])
+            rows['column'] = column
+            rows['stored'] = merged.loc[mismatch, f'{column}_stored']
+            rows['expected'] = expected_values[mismatch].round(2)
+            diffs.append(rows)
+
+    if not diffs:
+        return pd.DataFrame(columns=keys + ['driver', 'column', 'stored', 'expected'])
+    return pd.concat(diffs, ignore_index=True)
+
+
+def verify_championship(db_path: str, championship_id: int) -> pd.DataFrame:
+    """Ricalcola un campionato e ritorna il report differenze (eseguibile in un processo worker)"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        data = load_championship_data(conn, championship_id)
+    finally:
+        conn.close()
+
+    if data['championship'].empty:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+
+    competition_df = recompute_competition_standings(data)
+    championship_df = recompute_championship_standings(data, competition_df)
+
+    competition_diff = diff_standings(
+        data['competition_standings'][['competition_id', 'driver_id', 'driver'] + COMPETITION_COLUMNS],
+        competition_df[['competition_id', 'driver_id', 'driver', 'race_points_verifiable'] + COMPETITION_COLUMNS],
+        ['competition_id', 'driver_id'], COMPETITION_COLUMNS
+    )
+    competition_diff['scope'] = 'competition'
+
+    championship_diff = diff_standings(
+        data['championship_standings'][['driver_id', 'driver'] + CHAMPIONSHIP_COLUMNS],
+        championship_df[['driver_id', 'driver'] + CHAMPIONSHIP_COLUMNS],
+        ['driver_id'], CHAMPIONSHIP_COLUMNS
+    )
+    championship_diff['scope'] = 'championship'
+    championship_diff['competition_id'] = None
+
+    report = pd.concat([competition_diff, championship_diff], ignore_index=True)
+    report['championship_id'] = championship_id
+    return report.reindex(columns=REPORT_COLUMNS)
+
+
+def verify_all(db_path: str, championship_ids: Optional[List[int]] = None, workers: Optional[int] = None) -> pd.DataFrame:
+    """Verifica tutti i campionati in parallelo su un pool di processi"""
+    if championship_ids is None:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        championship_ids = [row[0] for row in conn.execute('SELECT championship_id FROM championships ORDER BY championship_id')]
+        conn.close()
+
+    if not championship_ids:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+
+    workers = workers or min(len(championship_ids), os.cpu_count() or 1)
+    if workers <= 1:
+        reports = [verify_championship(db_path, champ_id) for champ_id in championship_ids]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            reports = list(executor.map(verify_championship, [db_path] * len(championship_ids), championship_ids))
+
+    return pd.concat(reports, ignore_index=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Verifica classifiche ricalcolandole dai risultati grezzi")
+    parser.add_argument('--db', default=os.getenv('ACC_DATABASE_PATH', 'acc_stats.db'), help="Percorso database")
+    parser.add_argument('--championship', type=int, action='append', help="Campionato da verificare (ripetibile)")
+    parser.add_argument('--workers', type=int, default=None, help="Processi worker (default: CPU disponibili)")
+    parser.add_argument('--csv', help="Salva il report differenze in CSV")
+    args = parser.parse_args()
+
+    report = verify_all(args.db, args.championship, args.workers)
+
+    if report.empty:
+        print("✅ Standings match the raw results")
+        return 0
+
+    summary = report.groupby(['championship_id', 'scope', 'column']).size().rename('mismatches')
+    print(summary.to_string())
+    print(f"\n❌ {len(report)} mismatches across {report['championship_id'].nunique()} championships")
+
+    if args.csv:
+        report.to_csv(args.csv, index=False)
+        print(f"📄 Report saved to {args.csv}")
+
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
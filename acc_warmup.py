@@ -0,0 +1,85 @@
+"""
+ACC Warmup - Preriscaldamento delle cache in background
+Un thread daemon controlla a intervalli la versione dati del database e, all'avvio e a ogni
+cambio di versione, esegue la funzione di warm-up (le viste di default delle pagine), così
+il primo visitatore dopo un deploy o un aggiornamento trova le cache già popolate.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# Secondi tra due controlli della versione dati
+WARMUP_INTERVAL = 30.0
+
+
+class CacheWarmer:
+    """Esegue warm(version) in background per ogni nuova versione dati restituita da version()"""
+
+    def __init__(self, version: Callable[[], str], warm: Callable[[str], Dict[str, Optional[str]]],
+                 interval: float = WARMUP_INTERVAL):
+        self.version = version
+        self.warm = warm
+        self.interval = interval
+        self.warmed_version = None
+        self.running_version = None
+        self.last_duration = None
+        self.last_finished = None
+        # Esito dell'ultimo warm-up per vista: None se riuscita, altrimenti il messaggio d'errore
+        self.last_results: Dict[str, Optional[str]] = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Avvia il thread (una sola volta per istanza); ritorna True se è stato avviato ora"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='acc-cache-warmup', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> bool:
+        """Warm-up della versione corrente se non è già stata preriscaldata; True se eseguito"""
+        version = self.version()
+        if version == self.warmed_version:
+            return False
+
+        self.running_version = version
+        start = time.perf_counter()
+        try:
+            results = self.warm(version)
+        except Exception as e:
+            results = {'warmup': str(e)}
+        finally:
+            self.running_version = None
+        self.last_duration = time.perf_counter() - start
+        self.last_finished = time.time()
+        self.last_results = results
+        self.warmed_version = version
+        return True
+
+    def status(self) -> Dict:
+        return {
+            'warmed_version': self.warmed_version,
+            'running': self.running_version is not None,
+            'last_duration': self.last_duration,
+            'last_finished': self.last_finished,
+            'failed': {view: error for view, error in self.last_results.items() if error},
+        }
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                # Versione dati illeggibile (es. database in sostituzione): si riprova al giro dopo
+                pass
+            self._stop.wait(self.interval)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark backend analitici - SQLite vs DuckDB
+Esegue i metodi aggregati di ACCWebDashboard (senza runtime Streamlit) con ciascun
+backend su uno o più database, verifica che i risultati coincidano e riporta i tempi.
+
+Uso:
+    python bench_backends.py [--db acc_stats.db] [--db synthetic.db] [--repeat 5]
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+import streamlit as st
+import streamlit.logger
+from streamlit import config as streamlit_config
+
+import acc_cache
+
+
+def load_dashboard(db_path: str):
+    """Istanzia il dashboard in modalità headless sul database indicato"""
+    os.environ['ACC_DATABASE_PATH'] = db_path
+    # Senza runtime Streamlit i logger di cache e script runner avvisano a ogni chiamata:
+    # la configurazione va letta prima, altrimenti al parsing ripristina il livello di default
+    streamlit_config.get_option('logger.level')
+    streamlit.logger.set_log_level('ERROR')
+    import dashboard_acc
+
+    dashboard = dashboard_acc.ACCWebDashboard()
+    dashboard.db_path = db_path
+    return dashboard
+
+
+def benchmark_cases(db_path: str, dashboard) -> List[Tuple[str, Callable]]:
+    """Metodi da misurare, con argomenti presi dal database (pista e pilota con più giri)"""
+    conn = sqlite3.connect(db_path)
+    track = conn.execute('''
+        SELECT s.track_name FROM laps l JOIN sessions s ON l.session_id = s.session_id
+        GROUP BY s.track_name ORDER BY COUNT(*) DESC LIMIT 1
+    ''').fetchone()[0]
+    driver = conn.execute('''
+        SELECT l.driver_id FROM laps l JOIN drivers d ON l.driver_id = d.driver_id
+        WHERE d.trust_level = 2 GROUP BY l.driver_id ORDER BY COUNT(*) DESC LIMIT 1
+    ''').fetchone()[0]
+    conn.close()
+
+    return [
+        ('get_all_tracks_summary', lambda: dashboard.get_all_tracks_summary()),
+        ('get_all_tracks_summary(friends)', lambda: dashboard.get_all_tracks_summary(include_friends=True)),
+        ('get_hall_of_fame', lambda: dashboard.get_hall_of_fame()),
+        ('get_driver_best_times', lambda: dashboard.get_driver_best_times(driver)),
+        (f'get_track_statistics({track})', lambda: dashboard.get_track_statistics(track)),
+    ]
+
+
+def same_result(left, right) -> bool:
+    """Confronto risultati tra backend (tipi numerici normalizzati)"""
+    if isinstance(left, dict):
+        return left.keys() == right.keys() and all(same_result(left[key], right[key]) for key in left)
+    if isinstance(left, pd.DataFrame):
+        if list(left.columns) != list(right.columns) or len(left) != len(right):
+            return False
+        left = left.reset_index(drop=True).astype(object).where(left.notna(), None)
+        right = right.reset_index(drop=True).astype(object).where(right.notna(), None)
+        return all(
+            all(a == b or (isinstance(a, (int, float)) and isinstance(b, (int, float)) and abs(a - b) < 1e-6)
+                for a, b in zip(left[column], right[column]))
+            for column in left.columns
+        )
+    return left == right
+
+
+def run(db_path: str, backends: List[str], repeat: int) -> pd.DataFrame:
+    """Misura ogni metodo con ogni backend sul database indicato"""
+    dashboard = load_dashboard(db_path)
+    cases = benchmark_cases(db_path, dashboard)
+    rows = []
+    reference = {}
+
+    for backend in backends:
+        dashboard.config.setdefault('analytics', {})['backend'] = backend
+
+        # Prima chiamata separata: per DuckDB include il caricamento delle tabelle
+        start = time.perf_counter()
+        dashboard.analytics_query('SELECT 1')
+        warmup_ms = (time.perf_counter() - start) * 1000
+
+        for name, call in cases:
+            timings = []
+            result = None
+            for _ in range(repeat):
+                # I metodi sono in cache e la chiave non contiene il backend: senza svuotarla
+                # il secondo backend misurerebbe i risultati del primo
+                st.cache_data.clear()
+                acc_cache.clear_all()
+                start = time.perf_counter()
+                result = call()
+                timings.append((time.perf_counter() - start) * 1000)
+
+            if backend == backends[0]:
+                reference[name] = result
+            rows.append({
+                'database': os.path.basename(db_path),
+                'backend': backend,
+                'method': name,
+                'median_ms': round(statistics.median(timings), 2),
+                'min_ms': round(min(timings), 2),
+                'load_ms': round(warmup_ms, 1),
+                'matches': same_result(reference[name], result),
+            })
+
+    return pd.DataFrame(rows)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Confronta i backend analitici SQLite e DuckDB")
+    parser.add_argument('--db', action='append', help="Database da misurare (ripetibile)")
+    parser.add_argument('--backend', action='append', help="Backend da misurare (default: sqlite e duckdb)")
+    parser.add_argument('--repeat', type=int, default=5, help="Ripetizioni per metodo")
+    args = parser.parse_args()
+
+    databases = args.db or [os.getenv('ACC_DATABASE_PATH', 'acc_stats.db')]
+    backends = args.backend or ['sqlite', 'duckdb']
+
+    results = pd.concat([run(db_path, backends, args.repeat) for db_path in databases], ignore_index=True)
+
+    pivot = results.pivot_table(index=['database', 'method'], columns='backend', values='median_ms')
+    if {'sqlite', 'duckdb'} <= set(pivot.columns):
+        pivot['speedup'] = (pivot['sqlite'] / pivot['duckdb']).round(1)
+    print(pivot.to_string())
+    print()
+    print(results.groupby(['database', 'backend'])['load_ms'].first().rename('first query (load) ms').to_string())
+
+    mismatches = results[~results['matches']]
+    if not mismatches.empty:
+        print(f"\n❌ Results differ between backends: {', '.join(mismatches['method'].unique())}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
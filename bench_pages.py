@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Benchmark pagine - Rendering completo del dashboard con AppTest di Streamlit
+Esegue dashboard_acc.py in modalità headless, apre ogni pagina con valori dei widget
+rappresentativi (campionato più recente, competizione più grande, pista più usata,
+pilota più attivo) e misura il tempo dell'intero script run, il picco di memoria
+e la dimensione dell'output (messaggi protobuf degli elementi) per pagina.
+A differenza di bench_queries.py include formattazione DataFrame, Styler e serializzazione Plotly.
+
+Uso:
+    python bench_pages.py [--db acc_stats.db] [--db synthetic.db] [--repeat 3] [--page Drivers]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import streamlit.logger
+from streamlit import config as streamlit_config
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+
+import acc_cache
+
+DASHBOARD_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard_acc.py')
+
+
+def pick_targets(db_path: str) -> Dict:
+    """Valori rappresentativi dei widget, presi dal database"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        def row(query: str) -> Optional[tuple]:
+            return conn.execute(query).fetchone()
+
+        latest_championship = row('''
+            SELECT ch.name, l.name FROM championships ch LEFT JOIN leagues l ON ch.league_id = l.league_id
+            WHERE ch.total_rounds > 0
+            ORDER BY ch.start_date DESC, ch.championship_id DESC LIMIT 1
+        ''')
+        latest_time_attack = row('''
+            SELECT ch.name FROM championships ch
+            JOIN competitions c ON c.championship_id = ch.championship_id
+            JOIN time_attack_results tar ON tar.competition_id = c.competition_id
+            ORDER BY ch.start_date DESC, ch.championship_id DESC LIMIT 1
+        ''')
+        biggest_competition = row('''
+            SELECT ch.name, c.name, c.track_name FROM competitions c
+            JOIN championships ch ON c.championship_id = ch.championship_id
+            JOIN sessions s ON s.competition_id = c.competition_id
+            JOIN session_results sr ON sr.session_id = s.session_id
+            GROUP BY c.competition_id ORDER BY COUNT(*) DESC LIMIT 1
+        ''')
+        track = row('''
+            SELECT s.track_name FROM laps l JOIN sessions s ON l.session_id = s.session_id
+            GROUP BY s.track_name ORDER BY COUNT(*) DESC LIMIT 1
+        ''')
+        driver = row('''
+            SELECT d.last_name FROM laps l JOIN drivers d ON l.driver_id = d.driver_id
+            WHERE d.trust_level = 2 GROUP BY l.driver_id ORDER BY COUNT(*) DESC LIMIT 1
+        ''')
+        last_date = row('SELECT MAX(session_date) FROM sessions')[0]
+        last_day = datetime.fromisoformat(last_date[:10]).date()
+        week_start = last_day - timedelta(days=7)
+        session = conn.execute('''
+            SELECT l.session_id FROM laps l JOIN sessions s ON l.session_id = s.session_id
+            WHERE DATE(s.session_date) BETWEEN ? AND ? AND s.session_type LIKE 'R%'
+            GROUP BY l.session_id ORDER BY COUNT(*) DESC LIMIT 1
+        ''', (week_start.isoformat(), last_day.isoformat())).fetchone()
+    finally:
+        conn.close()
+
+    return {
+        'championship': latest_championship[0] if latest_championship else None,
+        'league': latest_championship[1] if latest_championship else None,
+        'time_attack_championship': latest_time_attack[0] if latest_time_attack else None,
+        'competition_championship': biggest_competition[0] if biggest_competition else None,
+        'competition': f"{biggest_competition[1]} - {biggest_competition[2]}" if biggest_competition else None,
+        'track': track[0] if track else None,
+        'driver': driver[0] if driver else None,
+        'week': (week_start, last_day),
+        'session': session[0] if session else None,
+    }
+
+
+def page_scenarios(targets: Dict) -> List[Tuple[str, List[Tuple[str, str, object]]]]:
+    """Pagina del menu e widget da impostare (tipo, key, valore) per ogni scenario"""
+    return [
+        ("🏠 Homepage", []),
+        ("⏱️ Time Attack", [('selectbox', 'ta_championship_select', targets['time_attack_championship'])]),
+        ("🏁 Competitions", [('selectbox', 'race_championship_select', targets['competition_championship']),
+                            ('selectbox', 'race_results_competition_select', targets['competition'])]),
+        ("🏆 Standings", [('selectbox', 'league_selector', targets['league'])]),
+        ("📅 All Sessions", [('date_input', 'sessions_date_from', targets['week'][0]),
+                            ('date_input', 'sessions_date_to', targets['week'][1]),
+                            ('selectbox', 'session_select', targets['session'])]),
+        ("⚡ Best Laps", [('selectbox', 'track_select', targets['track'])]),
+        ("👥 Drivers", [('selectbox', 'driver_select', targets['driver'])]),
+        ("📈 Statistics", []),
+    ]
+
+
+def choose_option(options: List[str], text: Optional[str]) -> Optional[int]:
+    """Indice dell'opzione: uguale al testo, poi che inizia con il testo, poi che lo contiene"""
+    if not text:
+        return None
+    for match in (lambda option: option == text, lambda option: option.startswith(text), lambda option: text in option):
+        for index, option in enumerate(options):
+            if match(str(option)):
+                return index
+    return None
+
+
+def open_page(page: str, steps: List[Tuple[str, str, object]], timeout: float) -> Tuple[AppTest, List[str]]:
+    """Avvia l'app, seleziona la pagina e imposta i widget; ritorna l'app e i widget non impostati"""
+    at = AppTest.from_file(DASHBOARD_SCRIPT, default_timeout=timeout)
+    at.run()
+    at.sidebar.selectbox[0].set_value(page).run()
+    skipped = []
+
+    for kind, key, value in steps:
+        try:
+            if kind == 'selectbox':
+                widget = at.selectbox(key=key)
+                index = choose_option(widget.options, value)
+                if index is None:
+                    skipped.append(key)
+                    continue
+                widget.select_index(index).run()
+            elif kind == 'date_input':
+                at.date_input(key=key).set_value(value).run()
+        except KeyError:
+            # Widget non presente (pagina senza dati): si misura la pagina così com'è
+            skipped.append(key)
+    return at, skipped
+
+
+def payload_size(node) -> Tuple[int, int]:
+    """Byte dei protobuf e numero di elementi nell'albero di output"""
+    total = 0
+    elements = 0
+    proto = getattr(node, 'proto', None)
+    if proto is not None and hasattr(proto, 'ByteSize'):
+        total += proto.ByteSize()
+        elements += 1
+    for child in getattr(node, 'children', {}).values():
+        child_total, child_elements = payload_size(child)
+        total += child_total
+        elements += child_elements
+    return total, elements
+
+
+def measure_page(page: str, steps: List[Tuple[str, str, object]], repeat: int, warm: bool, timeout: float) -> Dict:
+    """Tempo dello script run con i widget impostati, picco di memoria e dimensione output"""
+    at, skipped = open_page(page, steps, timeout)
+
+    timings = []
+    for _ in range(repeat):
+        if not warm:
+            st.cache_data.clear()
+            acc_cache.clear_all()
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Memoria misurata in un run separato: tracemalloc rallenta l'esecuzione.
+    # AppTest ricompila lo script a ogni run (~12 MB per il parsing di dashboard_acc.py):
+    # il picco viene azzerato dopo la compilazione per misurare solo la pagina
+    if not warm:
+        st.cache_data.clear()
+        acc_cache.clear_all()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def get_bytecode_and_reset_peak(cache, script_path):
+        bytecode = get_bytecode(cache, script_path)
+        tracemalloc.reset_peak()
+        return bytecode
+
+    with mock.patch.object(ScriptCache, 'get_bytecode', get_bytecode_and_reset_peak):
+        tracemalloc.start()
+        at.run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    payload, elements = payload_size(at._tree)
+    return {
+        'page': page,
+        'p50_ms': round(float(np.percentile(timings, 50)), 1),
+        'p95_ms': round(float(np.percentile(timings, 95)), 1),
+        'max_ms': round(max(timings), 1),
+        'peak_mb': round(peak / 1024 / 1024, 1),
+        'payload_kb': round(payload / 1024, 1),
+        'elements': elements,
+        'errors': len(at.exception) + len(at.error),
+        'skipped_widgets': ', '.join(skipped),
+    }
+
+
+def run(db_path: str, repeat: int, pages: List[str], warm: bool, timeout: float) -> pd.DataFrame:
+    """Misura ogni pagina sul database indicato"""
+    os.environ['ACC_DATABASE_PATH'] = db_path
+    # Niente warm-up in background: falserebbe le misure a freddo
+    os.environ['ACC_CACHE_WARMUP'] = '0'
+    targets = pick_targets(db_path)
+    rows = []
+
+    for page, steps in page_scenarios(targets):
+        if pages and not any(name.lower() in page.lower() for name in pages):
+            continue
+        print(f"⏱️ {os.path.basename(db_path)} {page}", file=sys.stderr, flush=True)
+        rows.append({'database': os.path.basename(db_path), **measure_page(page, steps, repeat, warm, timeout)})
+
+    return pd.DataFrame(rows)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Misura il rendering completo delle pagine del dashboard")
+    parser.add_argument('--db', action='append', help="Database da misurare (ripetibile)")
+    parser.add_argument('--repeat', type=int, default=3, help="Script run misurati per pagina")
+    parser.add_argument('--page', action='append', help="Misura solo le pagine che contengono il testo (ripetibile)")
+    parser.add_argument('--backend', help="Backend analitico (sqlite o duckdb)")
+    parser.add_argument('--warm', action='store_true', help="Non svuotare la cache dati tra i run")
+    parser.add_argument('--timeout', type=float, default=600, help="Timeout di uno script run (secondi)")
+    args = parser.parse_args()
+
+    if args.backend:
+        os.environ['ACC_ANALYTICS_BACKEND'] = args.backend
+    # Come in bench_backends: senza runtime i logger di Streamlit avvisano a ogni run
+    streamlit_config.get_option('logger.level')
+    streamlit.logger.set_log_level('ERROR')
+    databases = [os.path.abspath(db_path) for db_path in args.db or [os.getenv('ACC_DATABASE_PATH', 'acc_stats.db')]]
+    # Config, logo e immagini del dashboard sono cercati con percorsi relativi
+    os.chdir(os.path.dirname(DASHBOARD_SCRIPT))
+    results = pd.concat([run(db_path, args.repeat, args.page, args.warm, args.timeout) for db_path in databases],
+                        ignore_index=True)
+    print(results.to_string(index=False))
+
+    failed = results[results['errors'] > 0]
+    if not failed.empty:
+        print(f"\n❌ Errors rendering: {', '.join(failed['page'])}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
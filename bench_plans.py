@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Audit piani SQL - EXPLAIN QUERY PLAN di tutte le query del dashboard
+Esegue i metodi dati di ACCWebDashboard (gli stessi casi di bench_queries.py, e con --pages
+anche le pagine via AppTest come bench_pages.py) con una connessione che traccia ogni
+statement, poi analizza il piano di ciascuno e segnala scansioni complete delle tabelle
+grandi (laps, session_results), ordinamenti e raggruppamenti su B-tree temporanei,
+indici automatici e subquery correlate. Il report è ordinato per gravità con il metodo chiamante.
+Con --save-baseline salva le scansioni note; con --check termina con errore se ne compare una nuova.
+plan_baseline.json (versionato) contiene le scansioni note su acc_stats.db e test_bench_plans.py
+fa lo stesso controllo sotto pytest.
+
+Uso:
+    python bench_plans.py [--db acc_stats.db] [--pages] [--verbose]
+                          [--save-baseline | --check [--baseline plan_baseline.json]]
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Set, Tuple
+from unittest import mock
+
+import pandas as pd
+import streamlit as st
+
+import acc_cache
+from bench_backends import load_dashboard
+from bench_queries import benchmark_cases, pick_arguments
+
+DEFAULT_BASELINE = 'plan_baseline.json'
+LARGE_TABLES = ('laps', 'session_results')
+DASHBOARD_FILE = 'dashboard_acc.py'
+# Metodi di servizio: il chiamante riportato è il primo metodo del dashboard sopra di loro
+HELPER_FUNCTIONS = {'safe_sql_query', 'analytics_query', 'connect', 'has_table', 'run_parallel'}
+
+TABLE_ALIAS_RE = re.compile(r'\b(?:FROM|JOIN)\s+(?:\w+\.)?(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|INNER\b|GROUP\b|ORDER\b|LIMIT\b|UNION\b)(\w+))?', re.IGNORECASE)
+SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?')
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+# Peso dei problemi per l'ordinamento del report
+SEVERITY = {'full scan': 100, 'correlated subquery': 20, 'automatic index': 10, 'temp b-tree': 5}
+
+
+class StatementTracer:
+    """Raccoglie gli statement eseguiti dalle connessioni aperte durante l'audit, con il metodo chiamante"""
+
+    def __init__(self):
+        self.statements = defaultdict(lambda: {'calls': 0, 'sql': None})
+        self._connect = sqlite3.connect
+
+    def caller(self) -> str:
+        """Primo metodo del dashboard nello stack (esclusi i metodi di servizio)"""
+        frame = sys._getframe(1)
+        while frame is not None:
+            code = frame.f_code
+            # Le lambda eseguite sul pool di query sono attribuite al metodo che le definisce
+            name = getattr(code, 'co_qualname', code.co_name).split('.<locals>')[0].split('.')[-1]
+            if code.co_filename.endswith(DASHBOARD_FILE) and name not in HELPER_FUNCTIONS:
+                return name
+            frame = frame.f_back
+        return '<outside dashboard>'
+
+    def record(self, statement: str):
+        """Callback di trace: conserva solo le letture (SELECT/WITH)"""
+        sql = statement.strip()
+        if not sql.upper().startswith(('SELECT', 'WITH')):
+            return
+        key = (self.caller(), normalize_statement(sql))
+        entry = self.statements[key]
+        entry['calls'] += 1
+        entry['sql'] = entry['sql'] or sql
+
+    def connect(self, *args, **kwargs) -> sqlite3.Connection:
+        conn = self._connect(*args, **kwargs)
+        conn.set_trace_callback(self.record)
+        return conn
+
+    def patch(self):
+        """Sostituisce sqlite3.connect per tutto il processo (dashboard e funzioni in cache)"""
+        return mock.patch.object(sqlite3, 'connect', self.connect)
+
+
+def normalize_statement(sql: str) -> str:
+    """Statement senza valori letterali e spazi ridondanti (chiave di raggruppamento)"""
+    return ' '.join(LITERAL_RE.sub('?', sql).split())
+
+
+def table_aliases(sql: str) -> Dict[str, Set[str]]:
+    """Tabelle referenziate da ogni alias (e da ogni nome di tabella) nello statement"""
+    aliases = defaultdict(set)
+    for table, alias in TABLE_ALIAS_RE.findall(sql):
+        aliases[table.lower()].add(table.lower())
+        if alias:
+            aliases[alias.lower()].add(table.lower())
+    return aliases
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[str]:
+    """Righe del piano (indentate secondo la gerarchia di EXPLAIN QUERY PLAN)"""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    depth = {0: -1}
+    plan = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        plan.append('  ' * depth[node_id] + detail)
+    return plan
+
+
+def plan_issues(sql: str, plan: List[str], large_tables: Tuple[str, ...]) -> List[str]:
+    """Problemi del piano: scansioni complete di tabelle grandi, B-tree temporanei, subquery correlate"""
+    aliases = table_aliases(sql)
+    issues = []
+    for line in plan:
+        detail = line.strip()
+        scan = SCAN_RE.match(detail)
+        if scan:
+            name = (scan.group(2) or scan.group(1)).lower()
+            for table in sorted(aliases.get(name, {scan.group(1).lower()})):
+                if table in large_tables:
+                    issues.append(f"full scan {table}")
+        if detail.startswith('USE TEMP B-TREE'):
+            issues.append(f"temp b-tree {detail[len('USE TEMP B-TREE FOR '):].lower()}")
+        if 'AUTOMATIC' in detail and 'INDEX' in detail:
+            issues.append(f"automatic index {detail.split()[1]}")
+        if detail.startswith('CORRELATED'):
+            issues.append('correlated subquery')
+    return issues
+
+
+def severity(issues: List[str]) -> int:
+    return sum(weight for issue in issues for kind, weight in SEVERITY.items() if issue.startswith(kind))
+
+
+def audit_cases(db_path: str, pages: bool, skip: List[str], timeout: float) -> List[Tuple[str, Callable]]:
+    """Metodi dati del dashboard (backend SQLite) e, con pages, le pagine aperte via AppTest.
+    Gli argomenti sono scelti qui, fuori dal tracciamento, per non riportare le query di servizio"""
+    dashboard = load_dashboard(db_path)
+    dashboard.config.setdefault('analytics', {})['backend'] = 'sqlite'
+    cases = [
+        (name, call) for name, call in benchmark_cases(dashboard, pick_arguments(db_path))
+        if not (skip and any(method in name for method in skip))
+    ]
+
+    if pages:
+        import bench_pages
+
+        os.environ['ACC_ANALYTICS_BACKEND'] = 'sqlite'
+        os.environ['ACC_CACHE_WARMUP'] = '0'
+        for page, steps in bench_pages.page_scenarios(bench_pages.pick_targets(db_path)):
+            cases.append((page, lambda page=page, steps=steps: bench_pages.open_page(page, steps, timeout)))
+    return cases
+
+
+def audit(db_path: str, pages: bool, skip: List[str], large_tables: Tuple[str, ...], timeout: float) -> pd.DataFrame:
+    """Statement eseguiti dal dashboard con il relativo piano e i problemi trovati"""
+    cases = audit_cases(db_path, pages, skip, timeout)
+    tracer = StatementTracer()
+    with tracer.patch():
+        for name, call in cases:
+            print(f"🔎 {os.path.basename(db_path)} {name}", file=sys.stderr, flush=True)
+            st.cache_data.clear()
+            acc_cache.clear_all()
+            call()
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    rows = []
+    try:
+        for (method, statement), entry in tracer.statements.items():
+            try:
+                plan = explain(conn, entry['sql'])
+            except sqlite3.Error as e:
+                # Es. viste temporanee dell'archivio, non presenti su questa connessione
+                plan = [f"EXPLAIN failed: {e}"]
+            issues = plan_issues(entry['sql'], plan, large_tables)
+            rows.append({
+                'database': os.path.basename(db_path),
+                'method': method,
+                'calls': entry['calls'],
+                'score': severity(issues),
+                'issues': ', '.join(dict.fromkeys(issues)),
+                'statement': statement,
+                'plan': plan,
+            })
+    finally:
+        conn.close()
+
+    report = pd.DataFrame(rows, columns=['database', 'method', 'calls', 'score', 'issues', 'statement', 'plan'])
+    return report.sort_values(['score', 'calls', 'method'], ascending=[False, False, True], ignore_index=True)
+
+
+def full_scans(report: pd.DataFrame) -> Set[str]:
+    """Scansioni complete delle tabelle grandi, come 'metodo: full scan tabella'"""
+    return {
+        f"{row.method}: {issue}"
+        for row in report.itertuples(index=False)
+        for issue in row.issues.split(', ') if issue.startswith('full scan')
+    }
+
+
+def print_report(report: pd.DataFrame, verbose: bool):
+    flagged = report[report['score'] > 0]
+    print(f"🔎 {len(report)} statements, {len(flagged)} with plan issues\n")
+    if flagged.empty:
+        return
+
+    table = flagged[['database', 'method', 'calls', 'score', 'issues']].copy()
+    table.insert(0, 'rank', range(1, len(table) + 1))
+    print(table.to_string(index=False))
+
+    if verbose:
+        for rank, row in enumerate(flagged.itertuples(index=False), start=1):
+            print(f"\n#{rank} {row.method} ({row.issues})")
+            print(f"   {row.statement[:400]}")
+            for line in row.plan:
+                print(f"   | {line}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Analizza i piani di esecuzione di tutte le query del dashboard")
+    parser.add_argument('--db', action='append', help="Database su cui eseguire l'audit (ripetibile)")
+    parser.add_argument('--pages', action='store_true', help="Traccia anche le pagine del dashboard via AppTest")
+    parser.add_argument('--skip', action='append', help="Salta i metodi che contengono il testo (ripetibile)")
+    parser.add_argument('--large-table', action='append', help="Tabella grande da segnalare se scansionata (ripetibile)")
+    parser.add_argument('--verbose', action='store_true', help="Stampa statement e piano dei casi segnalati")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Scansioni note (JSON)")
+    parser.add_argument('--save-baseline', action='store_true', help="Salva le scansioni attuali come note")
+    parser.add_argument('--check', action='store_true', help="Errore se compare una scansione completa non nota")
+    parser.add_argument('--timeout', type=float, default=600, help="Timeout di uno script run con --pages (secondi)")
+    args = parser.parse_args()
+
+    large_tables = tuple(LARGE_TABLES) + tuple(args.large_table or [])
+    databases = [os.path.abspath(db_path) for db_path in args.db or [os.getenv('ACC_DATABASE_PATH', 'acc_stats.db')]]
+    if args.pages:
+        # Config e immagini del dashboard sono cercati con percorsi relativi
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    report = pd.concat([audit(db_path, args.pages, args.skip, large_tables, args.timeout) for db_path in databases],
+                       ignore_index=True)
+    report = report.sort_values(['score', 'calls', 'method'], ascending=[False, False, True], ignore_index=True)
+    print_report(report, args.verbose)
+    scans = full_scans(report)
+
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps({
+            'full_scans': sorted(scans),
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+        }, indent=2), encoding='utf-8')
+        print(f"\n💾 {len(scans)} known full scans saved to {args.baseline}")
+
+    if args.check:
+        known = set()
+        if Path(args.baseline).exists():
+            known = set(json.loads(Path(args.baseline).read_text(encoding='utf-8')).get('full_scans', []))
+        new_scans = sorted(scans - known)
+        for scan in sorted(known - scans):
+            print(f"✅ Fixed: {scan}")
+        if new_scans:
+            print(f"\n❌ {len(new_scans)} new full scans over large tables:")
+            for scan in new_scans:
+                print(f"   {scan}")
+            return 1
+        print("\n✅ No new full scans over large tables")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
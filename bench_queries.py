@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Benchmark query - Metodi dati di ACCWebDashboard
+Esegue ogni metodo dati del dashboard (senza runtime Streamlit) su uno o più database,
+con argomenti scelti dal database stesso (sessione, competizione, campionato, pista e
+pilota con più dati), e riporta latenza p50/p95 e righe restituite.
+Con --save-baseline salva i risultati; con --baseline li confronta e termina con errore
+se un metodo è più lento della soglia o restituisce un numero di righe diverso.
+
+Uso:
+    python bench_queries.py [--db acc_stats.db] [--db synthetic.db] [--repeat 5]
+                            [--save-baseline | --baseline bench_baseline.json] [--threshold 0.25]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import acc_cache
+from bench_backends import load_dashboard
+
+DEFAULT_BASELINE = 'bench_baseline.json'
+
+
+def pick_arguments(db_path: str) -> Dict:
+    """Argomenti realistici per i metodi: le entità con più dati nel database"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        def scalar(query: str):
+            row = conn.execute(query).fetchone()
+            return row[0] if row else None
+
+        args = {
+            'session_id': scalar('''
+                SELECT l.session_id FROM laps l JOIN sessions s ON l.session_id = s.session_id
+                WHERE s.session_type LIKE 'R%' GROUP BY l.session_id ORDER BY COUNT(*) DESC LIMIT 1
+            '''),
+            'competition_id': scalar('''
+                SELECT s.competition_id FROM session_results sr JOIN sessions s ON sr.session_id = s.session_id
+                WHERE s.competition_id IS NOT NULL GROUP BY s.competition_id ORDER BY COUNT(*) DESC LIMIT 1
+            '''),
+            'championship_id': scalar('''
+                SELECT championship_id FROM championship_standings
+                GROUP BY championship_id ORDER BY COUNT(*) DESC LIMIT 1
+            '''),
+            'track_name': scalar('''
+                SELECT s.track_name FROM laps l JOIN sessions s ON l.session_id = s.session_id
+                GROUP BY s.track_name ORDER BY COUNT(*) DESC LIMIT 1
+            '''),
+            'driver_id': scalar('''
+                SELECT l.driver_id FROM laps l JOIN drivers d ON l.driver_id = d.driver_id
+                WHERE d.trust_level = 2 GROUP BY l.driver_id ORDER BY COUNT(*) DESC LIMIT 1
+            '''),
+            'last_date': scalar('SELECT MAX(session_date) FROM sessions'),
+            'first_date': scalar('SELECT MIN(session_date) FROM sessions'),
+        }
+        args['driver_track'] = conn.execute('''
+            SELECT s.track_name FROM laps l JOIN sessions s ON l.session_id = s.session_id
+            WHERE l.driver_id = ? GROUP BY s.track_name ORDER BY COUNT(*) DESC LIMIT 1
+        ''', (args['driver_id'],)).fetchone()[0]
+    finally:
+        conn.close()
+
+    last_day = datetime.fromisoformat(args['last_date'][:10]).date()
+    args['week'] = (last_day - timedelta(days=7), last_day)
+    args['all_dates'] = (datetime.fromisoformat(args['first_date'][:10]).date(), last_day)
+    return args
+
+
+def benchmark_cases(dashboard, args: Dict) -> List[Tuple[str, Callable]]:
+    """Metodi dati del dashboard con i relativi argomenti"""
+    return [
+        ('get_database_stats', lambda: dashboard.get_database_stats()),
+        ('get_session_results', lambda: dashboard.get_session_results(args['session_id'])),
+        ('get_session_info', lambda: dashboard.get_session_info(args['session_id'])),
+        ('get_race_trace', lambda: dashboard.get_race_trace(args['session_id'])),
+        ('get_competition_results', lambda: dashboard.get_competition_results(args['competition_id'])),
+        ('get_competition_sessions', lambda: dashboard.get_competition_sessions(args['competition_id'])),
+        ('get_championship_standings', lambda: dashboard.get_championship_standings(args['championship_id'])),
+        ('get_points_simulation', lambda: dashboard.get_points_simulation(args['championship_id'])),
+        ('get_sessions_statistics(week)', lambda: dashboard.get_sessions_statistics(*args['week'])),
+        ('get_sessions_statistics(all)', lambda: dashboard.get_sessions_statistics(*args['all_dates'])),
+        ('get_sessions_list_with_details(week)', lambda: dashboard.get_sessions_list_with_details(*args['week'])),
+        ('get_tracks_list', lambda: dashboard.get_tracks_list()),
+        ('get_all_tracks_summary', lambda: dashboard.get_all_tracks_summary()),
+        ('get_all_tracks_summary(friends)', lambda: dashboard.get_all_tracks_summary(include_friends=True)),
+        ('get_track_statistics', lambda: dashboard.get_track_statistics(args['track_name'])),
+        ('get_track_leaderboard', lambda: dashboard.get_track_leaderboard(args['track_name'])),
+        ('get_track_leaderboard(friends)', lambda: dashboard.get_track_leaderboard(args['track_name'], include_friends=True)),
+        ('get_hall_of_fame', lambda: dashboard.get_hall_of_fame()),
+        ('get_drivers_list', lambda: dashboard.get_drivers_list()),
+        ('get_driver_statistics', lambda: dashboard.get_driver_statistics(args['driver_id'])),
+        ('get_driver_best_times', lambda: dashboard.get_driver_best_times(args['driver_id'])),
+        ('get_driver_tracks_list', lambda: dashboard.get_driver_tracks_list(args['driver_id'])),
+        ('get_driver_lap_trend', lambda: dashboard.get_driver_lap_trend(args['driver_id'], args['driver_track'])),
+    ]
+
+
+def count_rows(result) -> int:
+    """Righe restituite (per i dizionari di DataFrame la somma delle righe)"""
+    if result is None:
+        return 0
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], pd.DataFrame):
+        return len(result[0])
+    if isinstance(result, dict):
+        frames = [value for value in result.values() if isinstance(value, pd.DataFrame)]
+        return sum(len(frame) for frame in frames) if frames else len(result)
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 1
+
+
+def run(db_path: str, repeat: int, backend: str, methods: List[str], skip: List[str], warm: bool) -> pd.DataFrame:
+    """Misura ogni metodo sul database indicato (cache dati svuotata prima di ogni chiamata)"""
+    dashboard = load_dashboard(db_path)
+    dashboard.config.setdefault('analytics', {})['backend'] = backend
+    args = pick_arguments(db_path)
+    rows = []
+
+    for name, call in benchmark_cases(dashboard, args):
+        if methods and not any(method in name for method in methods):
+            continue
+        if skip and any(method in name for method in skip):
+            continue
+
+        print(f"⏱️ {os.path.basename(db_path)} {name}", file=sys.stderr, flush=True)
+        call()  # riscaldamento: connessioni, backend analitico, cache di processo
+        timings = []
+        result = None
+        for _ in range(repeat):
+            if not warm:
+                st.cache_data.clear()
+                acc_cache.clear_all()
+            start = time.perf_counter()
+            result = call()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        rows.append({
+            'database': os.path.basename(db_path),
+            'method': name,
+            'rows': count_rows(result),
+            'p50_ms': round(float(np.percentile(timings, 50)), 2),
+            'p95_ms': round(float(np.percentile(timings, 95)), 2),
+            'max_ms': round(max(timings), 2),
+        })
+
+    return pd.DataFrame(rows)
+
+
+def compare_with_baseline(results: pd.DataFrame, baseline: Dict, threshold: float, min_delta_ms: float) -> pd.DataFrame:
+    """Confronta p50 e righe con il baseline: regressione oltre soglia relativa e minimo assoluto"""
+    thresholds = baseline.get('thresholds', {})
+    stored = baseline.get('results', {})
+    status = []
+
+    for row in results.itertuples(index=False):
+        reference = stored.get(row.database, {}).get(row.method)
+        if reference is None:
+            status.append(('new', None))
+            continue
+        limit = thresholds.get(row.method, threshold)
+        ratio = row.p50_ms / reference['p50_ms'] if reference['p50_ms'] else 1.0
+        if row.rows != reference['rows']:
+            status.append((f"rows {reference['rows']} → {row.rows}", ratio))
+        elif ratio > 1 + limit and row.p50_ms - reference['p50_ms'] > min_delta_ms:
+            status.append(('slower', ratio))
+        elif ratio < 1 / (1 + limit) and reference['p50_ms'] - row.p50_ms > min_delta_ms:
+            status.append(('faster', ratio))
+        else:
+            status.append(('ok', ratio))
+
+    compared = results.copy()
+    compared['vs_baseline'] = [f"{ratio:.2f}x" if ratio is not None else '' for _, ratio in status]
+    compared['status'] = [label for label, _ in status]
+    return compared
+
+
+def save_baseline(results: pd.DataFrame, path: str):
+    """Salva i risultati come baseline (mantiene soglie e database non rimisurati)"""
+    baseline = json.loads(Path(path).read_text(encoding='utf-8')) if Path(path).exists() else {}
+    stored = baseline.setdefault('results', {})
+    for row in results.itertuples(index=False):
+        stored.setdefault(row.database, {})[row.method] = {'p50_ms': row.p50_ms, 'p95_ms': row.p95_ms, 'rows': row.rows}
+    baseline.setdefault('thresholds', {})
+    baseline['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    Path(path).write_text(json.dumps(baseline, indent=2, sort_keys=True), encoding='utf-8')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Misura latenza e righe dei metodi dati del dashboard")
+    parser.add_argument('--db', action='append', help="Database da misurare (ripetibile)")
+    parser.add_argument('--repeat', type=int, default=5, help="Chiamate misurate per metodo")
+    parser.add_argument('--backend', default='sqlite', help="Backend analitico (sqlite o duckdb)")
+    parser.add_argument('--method', action='append', help="Misura solo i metodi che contengono il testo (ripetibile)")
+    parser.add_argument('--skip', action='append', help="Salta i metodi che contengono il testo (ripetibile)")
+    parser.add_argument('--warm', action='store_true', help="Non svuotare la cache dati tra le chiamate")
+    parser.add_argument('--baseline', help="Baseline JSON con cui confrontare i risultati")
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, help="Salva i risultati come baseline")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Rallentamento relativo tollerato (0.25 = +25%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help="Rallentamento assoluto minimo per segnalare una regressione")
+    args = parser.parse_args()
+
+    databases = args.db or [os.getenv('ACC_DATABASE_PATH', 'acc_stats.db')]
+    results = pd.concat([run(db_path, args.repeat, args.backend, args.method, args.skip, args.warm) for db_path in databases],
+                        ignore_index=True)
+
+    exit_code = 0
+    if args.baseline:
+        if not Path(args.baseline).exists():
+            print(f"❌ Baseline not found: {args.baseline}")
+            return 1
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        results = compare_with_baseline(results, baseline, args.threshold, args.min_delta_ms)
+        regressions = results[results['status'].isin(['slower']) | results['status'].str.startswith('rows')]
+        if not regressions.empty:
+            exit_code = 1
+
+    print(results.to_string(index=False))
+
+    if args.baseline:
+        if exit_code:
+            print(f"\n❌ {len(regressions)} regressions vs baseline: {', '.join(regressions['method'])}")
+        else:
+            print("\n✅ No regressions vs baseline")
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+        print(f"💾 Baseline saved to {args.save_baseline}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,7 +15,23 @@ from zoneinfo import ZoneInfo
 from pathlib import Path
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import Optional, Dict, List, Tuple
+from typing import Any, Callable, Optional, Dict, List, Tuple
+
+from acc_analytics import build_race_trace, DimensionIndex, LapPercentileTable, TimeAttackLeaderboard, simulate_points_systems
+from acc_verify import verify_championship
+from acc_search import DriverSearchIndex
+from acc_db import get_data_version, get_file_identity, get_analytics_backend, in_query_worker, MemoryReplica, QueryExecutor, REQUIRED_TABLES
+from acc_export import has_export, load_driver_lap_trend
+from acc_archive import resolve_archive_path, attach_archive
+from acc_cache import FrameCache
+from acc_warmup import CacheWarmer
+from acc_tenants import TENANT_QUERY_PARAM, TenantError, get_registry_path, get_tenant_layers, list_tenants, load_registry
+import copy
+import functools
+import inspect
+import threading
+import time
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Configurazione pagina
 st.set_page_config(
@@ -25,22 +41,209 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Repliche in memoria attive per percorso del database (database.memory_replica)
+_memory_replicas: Dict[str, MemoryReplica] = {}
+
+# Worker del pool per le query indipendenti di una pagina (una connessione in lettura ciascuno)
+QUERY_WORKERS = 4
+
+# Tentativi di apertura del database prima di mostrare la pagina di errore
+DATABASE_CHECK_ATTEMPTS = 3
+DATABASE_CHECK_DELAY = 0.5
+
+
+def connect_database(db_path: str) -> sqlite3.Connection:
+    """Connessione in lettura: dalla replica in memoria se attiva per il database, altrimenti dal file"""
+    replica = _memory_replicas.get(db_path)
+    return replica.connect() if replica is not None else sqlite3.connect(db_path)
+
+
+@st.cache_resource(show_spinner=False)
+def get_memory_replica(db_path: str, max_bytes: int) -> MemoryReplica:
+    """Replica in memoria condivisa tra sessioni (si riallinea da sola alla versione dati)"""
+    return MemoryReplica(db_path, max_bytes)
+
+
+@st.cache_resource(show_spinner=False)
+def get_frame_cache(tenant: str, max_bytes: int, policy: str, namespace_limits: Tuple[Tuple[str, int], ...]) -> FrameCache:
+    """Cache dei risultati dei metodi dati, condivisa tra sessioni e limitata in byte (config cache).
+    In modalità multi-community ogni community ha la sua, con il proprio budget"""
+    return FrameCache(max_bytes, policy, dict(namespace_limits))
+
+
+def is_cacheable(result) -> bool:
+    """Risultati vuoti (anche quelli dovuti a errori gestiti) non vanno in cache"""
+    if result is None:
+        return False
+    if isinstance(result, pd.DataFrame):
+        return not result.empty
+    if isinstance(result, (dict, list)):
+        return bool(result)
+    if isinstance(result, tuple):
+        return bool(result) and is_cacheable(result[0])
+    return True
+
+
+def frame_cached(namespace: str, cacheable: Callable[[Any], bool] = is_cacheable):
+    """Metodo dati in cache nel namespace indicato, per argomenti, archivio e versione dati.
+    La connessione eventualmente passata (conn) non fa parte della chiave. Dai worker del pool
+    di query non si attende un calcolo concorrente della stessa chiave: potrebbe aspettare quel worker"""
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = tuple((name, value) for name, value in bound.arguments.items() if name not in ('self', 'conn'))
+            key = (self.db_path, self.use_archive, get_data_version(self.db_path), method.__name__, arguments)
+            return self.get_frame_cache().get_or_compute(
+                namespace, key, lambda: method(self, *args, **kwargs), cacheable=cacheable, wait=not in_query_worker()
+            )
+        return wrapper
+    return decorator
+
+
+@st.cache_resource(show_spinner=False)
+def get_cache_warmer(tenant: str, db_path: str, interval: float, _dashboard: 'ACCWebDashboard') -> CacheWarmer:
+    """Warm-up in background condiviso tra sessioni (un thread per community e database).
+    Lavora su una copia del dashboard: il flag use_archive delle pagine non lo influenza"""
+    warmup_dashboard = copy.copy(_dashboard)
+    warmup_dashboard.use_archive = False
+    return CacheWarmer(lambda: get_data_version(db_path), lambda version: warmup_dashboard.warm_caches(), interval)
+
+
+def resolve_tenant() -> Optional[str]:
+    """Community richiesta con ?community=<id>, o quella di default del registro;
+    None senza registro (una sola community, configurazione classica)"""
+    registry_path = get_registry_path()
+    if registry_path is None:
+        return None
+    registry = load_registry(registry_path)
+    tenant = st.query_params.get(TENANT_QUERY_PARAM) or registry['default']
+    if tenant not in registry['tenants']:
+        raise TenantError(f"unknown community '{tenant}' (available: {', '.join(list_tenants(registry))})")
+    return tenant
+
+
+def first_with_results(rows: List[Tuple], has_results: Callable[[Tuple], bool]) -> int:
+    """Indice della prima riga (nell'ordine delle selectbox) con risultati, altrimenti 0"""
+    return next((idx for idx, row in enumerate(rows) if has_results(row)), 0)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_dimension_index(db_path: str, data_version: str, archive_path: Optional[str] = None) -> DimensionIndex:
+    """Piloti, auto, competizioni, campionati e leghe in memoria, ricaricati quando cambia la versione dati
+    (con archive_path anche competizioni e campionati archiviati)"""
+    conn = connect_database(db_path)
+    try:
+        if archive_path:
+            attach_archive(conn, archive_path)
+        return DimensionIndex(conn)
+    finally:
+        conn.close()
+
+
+def load_race_trace(db_path: str, session_id: str, data_version: str, archive_path: Optional[str] = None) -> pd.DataFrame:
+    """Race trace di una sessione (in cache tramite ACCWebDashboard.get_race_trace)"""
+    conn = connect_database(db_path)
+    try:
+        if archive_path:
+            attach_archive(conn, archive_path)
+        # Due letture per session_id sugli indici acc_db.QUERY_INDEXES (creati dall'importer e aggiunti
+        # da acc_swap al database pubblicato): la JOIN su session_results rileggeva la tabella a ogni giro
+        laps_df = pd.read_sql_query('''
+            SELECT driver_id, lap_number, lap_time
+            FROM laps
+            WHERE session_id = ?
+              AND lap_time > 0
+        ''', conn, params=[session_id])
+        totals_df = pd.read_sql_query('''
+            SELECT driver_id, total_time
+            FROM session_results
+            WHERE session_id = ?
+        ''', conn, params=[session_id])
+    finally:
+        conn.close()
+
+    laps_df = laps_df.merge(totals_df.drop_duplicates('driver_id'), on='driver_id', how='left')
+
+    # Nome pilota dall'indice in memoria; i giri di piloti sconosciuti sono esclusi come con la JOIN
+    laps_df.insert(1, 'driver', get_dimension_index(db_path, data_version).lookup('drivers', laps_df['driver_id'], 'last_name'))
+    return build_race_trace(laps_df[laps_df['driver'].notna()])
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_lap_percentile_store(db_path: str, file_identity: str) -> Tuple[LapPercentileTable, threading.Lock]:
+    """Tabella percentili condivisa tra sessioni (aggiornata incrementalmente a ogni accesso,
+    ricreata quando il file del database viene sostituito)"""
+    return LapPercentileTable(), threading.Lock()
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def get_time_attack_store(db_path: str, file_identity: str, competition_id: int) -> Tuple[TimeAttackLeaderboard, threading.Lock]:
+    """Classifica Time Attack condivisa tra sessioni: chi la consulta in live legge solo il watermark"""
+    return TimeAttackLeaderboard(competition_id), threading.Lock()
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_driver_search_index(db_path: str, data_version: str) -> DriverSearchIndex:
+    """Indice di ricerca su tutti i piloti, ricostruito solo quando cambia la versione dati"""
+    conn = connect_database(db_path)
+    try:
+        drivers_df = pd.read_sql_query('''
+            SELECT driver_id, last_name, short_name, preferred_race_number, trust_level
+            FROM drivers
+            WHERE last_name IS NOT NULL AND last_name != ''
+        ''', conn)
+    finally:
+        conn.close()
+    return DriverSearchIndex(drivers_df)
+
+
+@st.cache_resource(show_spinner=False)
+def get_query_executor(db_path: str, archive_path: Optional[str]) -> QueryExecutor:
+    """Pool di lettura condiviso tra sessioni; con archive_path i worker vedono anche l'archivio"""
+    def connect() -> sqlite3.Connection:
+        conn = connect_database(db_path)
+        if archive_path:
+            attach_archive(conn, archive_path)
+        return conn
+
+    return QueryExecutor(connect, max_workers=QUERY_WORKERS)
+
+
+@st.cache_resource(show_spinner=False)
+def get_analytics_engine(db_path: str, backend_name: str):
+    """Backend analitico condiviso tra sessioni (DuckDB ricarica da solo i dati cambiati)"""
+    return get_analytics_backend(db_path, backend_name)
+
+
 class ACCWebDashboard:
     """Classe principale per il dashboard web ACC"""
     
 
     # ==================== SEZIONE 1: METODI CORE (CONDIVISI) ====================
 
-    def __init__(self):
-        """Inizializza il dashboard con gestione ambiente"""
+    def __init__(self, tenant: Optional[str] = None):
+        """Inizializza il dashboard con gestione ambiente (tenant: community del registro acc_tenants.json)"""
+        self.tenant = tenant
         self.config = self.load_config()
         self.db_path = self.get_database_path()
+        # Le variabili d'ambiente del processo non valgono per le singole community
+        self.archive_path = resolve_archive_path(
+            self.db_path, (None if tenant else os.getenv('ACC_ARCHIVE_PATH')) or self.config.get('database', {}).get('archive_path')
+        )
+        # Attivato dalla pagina Standings quando si consulta una lega archiviata
+        self.use_archive = False
         #self.is_github_deployment = self.detect_github_deployment()
         
         # Verifica esistenza database
         if not self.check_database():
             self.show_database_error()
             st.stop()
+
+        self.setup_memory_replica()
         
         # CSS personalizzato
         self.inject_custom_css()
@@ -64,6 +267,10 @@ class ACCWebDashboard:
     
     def get_database_path(self) -> str:
         """Ottiene il percorso del database considerando l'ambiente"""
+        # In modalità multi-community il database è quello della community
+        if self.tenant:
+            return self.config.get('database', {}).get('path') or 'acc_stats.db'
+
         # Priorità: variabile d'ambiente > config file > default
         db_path = (
             os.getenv('ACC_DATABASE_PATH') or 
@@ -88,7 +295,20 @@ class ACCWebDashboard:
                 "slogan": os.getenv('ACC_COMMUNITY_SLOGAN', "Where passion meets competition")
             },
             "database": {
-                "path": os.getenv('ACC_DATABASE_PATH', "acc_stats.db")
+                "path": os.getenv('ACC_DATABASE_PATH', "acc_stats.db"),
+                "memory_replica": os.getenv('ACC_MEMORY_REPLICA', '').lower() in ('1', 'true', 'yes'),
+                "memory_replica_max_mb": float(os.getenv('ACC_MEMORY_REPLICA_MAX_MB', 256))
+            },
+            "cache": {
+                "max_mb": float(os.getenv('ACC_CACHE_MAX_MB', 256)),
+                "policy": os.getenv('ACC_CACHE_POLICY', "lru"),
+                "namespaces": {},
+                "warmup": os.getenv('ACC_CACHE_WARMUP', 'true').lower() in ('1', 'true', 'yes'),
+                "warmup_interval": float(os.getenv('ACC_CACHE_WARMUP_INTERVAL', 30))
+            },
+            "analytics": {
+                "backend": os.getenv('ACC_ANALYTICS_BACKEND', "sqlite"),
+                "parquet_dir": os.getenv('ACC_PARQUET_DIR', "")
             }
         }
         
@@ -106,14 +326,22 @@ class ACCWebDashboard:
                     # 🎯 IMPOSTA IL FLAG BASANDOSI SUL FILE CARICATO
                     self.is_github_deployment = (config_file == 'acc_config_d.json')
                     
-                    return merged_config
+                    return self.apply_tenant_config(merged_config)
                     
                 except Exception as e:
                     continue
         
         # Se nessun file trovato, assume cloud per sicurezza
         self.is_github_deployment = True
-        return default_config
+        return self.apply_tenant_config(default_config)
+
+    def apply_tenant_config(self, config: dict) -> dict:
+        """Unisce sopra la configurazione base quella della community selezionata (file e sezioni inline)"""
+        if not self.tenant:
+            return config
+        for layer in get_tenant_layers(load_registry(get_registry_path()), self.tenant):
+            self._deep_merge(config, layer)
+        return config
     
     def _deep_merge(self, base_dict: dict, update_dict: dict):
         """Merge ricorsivo di dizionari"""
@@ -124,7 +352,18 @@ class ACCWebDashboard:
                 base_dict[key] = value
     
     def check_database(self) -> bool:
-        """Verifica esistenza e validità del database"""
+        """Verifica esistenza e validità del database.
+        Riprova brevemente prima di fallire: un aggiornamento non atomico del file
+        (copia diretta invece di acc_swap.py) può renderlo illeggibile per qualche istante"""
+        for attempt in range(DATABASE_CHECK_ATTEMPTS):
+            if attempt:
+                time.sleep(DATABASE_CHECK_DELAY)
+            if self._database_ready():
+                return True
+        return False
+
+    def _database_ready(self) -> bool:
+        """True se il database esiste e contiene le tabelle essenziali"""
         if not Path(self.db_path).exists():
             return False
         
@@ -134,8 +373,7 @@ class ACCWebDashboard:
             cursor = conn.cursor()
             
             # Verifica tabelle essenziali
-            required_tables = ['drivers', 'sessions', 'championships']
-            for table in required_tables:
+            for table in REQUIRED_TABLES:
                 cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'")
                 if not cursor.fetchone():
                     conn.close()
@@ -147,6 +385,25 @@ class ACCWebDashboard:
         except Exception:
             return False
 
+    def setup_memory_replica(self):
+        """Con database.memory_replica tutte le letture passano dalla copia in memoria del database"""
+        db_config = self.config.get('database', {})
+        if not db_config.get('memory_replica'):
+            return
+
+        try:
+            max_bytes = int(float(db_config.get('memory_replica_max_mb', 256)) * 1024 * 1024)
+            replica = get_memory_replica(self.db_path, max_bytes)
+            replica.refresh()
+        except Exception as e:
+            st.warning(f"⚠️ Memory replica unavailable, reading from disk: {e}")
+            _memory_replicas.pop(self.db_path, None)
+            return
+
+        _memory_replicas[self.db_path] = replica
+        if replica.fallback_reason:
+            st.warning(f"⚠️ Memory replica disabled, reading from disk: {replica.fallback_reason}")
+
     def inject_custom_css(self):
         """Inietta CSS personalizzato con miglioramenti per mobile"""
         st.markdown("""
@@ -274,10 +531,210 @@ class ACCWebDashboard:
         </style>
         """, unsafe_allow_html=True)
 
-    def safe_sql_query(self, query: str, params: List = None) -> pd.DataFrame:
-        """Esegue query SQL con gestione errori"""
+    def get_attached_archive(self, history: bool = False) -> Optional[str]:
+        """Archivio da collegare: per le leghe archiviate (use_archive) e per le viste all-time (history)"""
+        if (self.use_archive or history) and self.archive_path and Path(self.archive_path).exists():
+            return self.archive_path
+        return None
+
+    def connect(self, history: bool = False) -> sqlite3.Connection:
+        """Connessione al database; per le leghe archiviate e le viste all-time collega anche l'archivio"""
+        conn = connect_database(self.db_path)
+        archive_path = self.get_attached_archive(history)
+        if archive_path:
+            attach_archive(conn, archive_path)
+        return conn
+
+    def get_archived_leagues(self) -> set:
+        """Id delle leghe spostate nel database di archivio"""
+        if not self.has_table('archived_leagues'):
+            return set()
+        df = self.safe_sql_query("SELECT league_id FROM archived_leagues")
+        return set(df['league_id']) if not df.empty else set()
+
+    def has_table(self, table: str) -> bool:
+        """True se la tabella esiste nel database principale"""
+        conn = connect_database(self.db_path)
         try:
-            conn = sqlite3.connect(self.db_path)
+            return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+        finally:
+            conn.close()
+
+    def get_frame_cache(self) -> FrameCache:
+        """Cache dei risultati secondo la configurazione (cache.max_mb, cache.policy, cache.namespaces in MB)"""
+        cache_config = self.config.get('cache', {})
+        namespace_limits = tuple(sorted(
+            (namespace, int(float(limit_mb) * 1024 * 1024))
+            for namespace, limit_mb in cache_config.get('namespaces', {}).items()
+        ))
+        return get_frame_cache(self.tenant or '', int(float(cache_config.get('max_mb', 256)) * 1024 * 1024),
+                               cache_config.get('policy', 'lru'), namespace_limits)
+
+    def start_cache_warmup(self) -> Optional[CacheWarmer]:
+        """Avvia (una volta per processo) il warm-up in background delle viste di default (cache.warmup)"""
+        cache_config = self.config.get('cache', {})
+        if not cache_config.get('warmup', True):
+            return None
+        warmer = get_cache_warmer(self.tenant or '', self.db_path, float(cache_config.get('warmup_interval', 30)), self)
+        warmer.start()
+        return warmer
+
+    def warm_caches(self) -> Dict[str, Optional[str]]:
+        """Calcola le viste che ogni pagina mostra di default, popolando le cache prima dei visitatori.
+        Ritorna l'esito per vista: None se riuscita, altrimenti il messaggio d'errore"""
+
+        def check(result, what: str):
+            """I metodi dati non sollevano eccezioni (gli errori vanno a st.error, che fuori da uno script
+            run non mostra nulla) e ritornano vuoto: un risultato vuoto dove la pagina ha dati è un fallimento"""
+            empty = result.empty if isinstance(result, pd.DataFrame) else not result
+            if empty:
+                raise RuntimeError(f"{what}: no data")
+            return result
+
+        def homepage():
+            stats = self.get_database_stats()
+            check(any(stats.values()), "database statistics")
+
+        def time_attack():
+            conn = self.connect()
+            try:
+                cursor = conn.cursor()
+                championships, champ_default = self.get_time_attack_championships(cursor)
+                if not championships:
+                    return
+                competitions, default_index = self.get_time_attack_competitions(cursor, championships[champ_default][0])
+            finally:
+                conn.close()
+            if competitions:
+                competition = competitions[default_index]
+                rows = self.get_time_attack_leaderboard(competition[0])
+                # None solo in caso di errore; vuota è valida per una competizione senza risultati
+                if rows is None or competition[9] > 0:
+                    check(rows, f"time attack of competition {competition[0]}")
+
+        def competition_results():
+            conn = self.connect()
+            try:
+                cursor = conn.cursor()
+                championships, champ_default = self.get_results_championships(cursor)
+                if not championships:
+                    return
+                competitions, default_index = self.get_results_competitions(cursor, championships[champ_default][0])
+            finally:
+                conn.close()
+            if competitions:
+                competition = competitions[default_index]
+                results_df = self.get_competition_results(competition[0])
+                if competition[9] > 0:
+                    check(results_df, f"results of competition {competition[0]}")
+
+        def standings():
+            conn = self.connect()
+            try:
+                leagues = self.get_leagues(conn.cursor())
+            finally:
+                conn.close()
+            if not leagues:
+                return
+            # Come la pagina Standings: prima lega, dall'archivio se archiviata
+            league_id = leagues[0][0]
+            self.use_archive = league_id in self.get_archived_leagues()
+            try:
+                conn = self.connect()
+                try:
+                    tiers, tier_default = self.get_league_tiers(conn.cursor(), league_id)
+                finally:
+                    conn.close()
+                if tiers:
+                    tier = tiers[tier_default]
+                    standings_df = self.get_championship_standings(tier[0])
+                    if tier[8] > 0:
+                        check(standings_df, f"standings of championship {tier[0]}")
+                    if not standings_df.empty:
+                        simulation_df, _ = self.get_points_simulation(tier[0])
+                        check(simulation_df, f"points simulation of championship {tier[0]}")
+            finally:
+                self.use_archive = False
+
+        def sessions():
+            date_from, date_to = self.get_default_sessions_period()
+            # {} solo in caso di errore: un periodo senza sessioni ha tutti i contatori a zero
+            check(self.get_sessions_statistics(date_from, date_to), "sessions statistics")
+            self.get_sessions_list_with_details(date_from, date_to)
+
+        def best_laps():
+            check(self.get_all_tracks_summary(include_friends=False), "tracks summary")
+
+        def drivers():
+            check(self.get_driver_search(), "driver search index")
+            check(self.get_drivers_list(), "drivers list")
+            hall_of_fame = self.get_hall_of_fame()
+            check(any(not df.empty for df in hall_of_fame.values()), "hall of fame")
+
+        views = {
+            'homepage': homepage,
+            'time_attack': time_attack,
+            'competitions': competition_results,
+            'standings': standings,
+            'sessions': sessions,
+            'best_laps': best_laps,
+            'drivers': drivers,
+        }
+        results = {}
+        for view, warm in views.items():
+            try:
+                warm()
+                results[view] = None
+            except Exception as e:
+                results[view] = str(e)
+        return results
+
+    def show_cache_stats(self):
+        """Occupazione e hit rate della cache dei risultati per namespace"""
+        cache = self.get_frame_cache()
+        stats = cache.stats()
+        with st.expander(f"🗄️ Data cache: {cache.total_bytes / 1024 / 1024:.1f} / {cache.max_bytes / 1024 / 1024:.0f} MB ({cache.policy.upper()})"):
+            self.show_warmup_status()
+            if stats.empty:
+                st.caption("No cached queries yet")
+                return
+            stats['MB'] = (stats['bytes'] / 1024 / 1024).round(2)
+            stats['limit MB'] = (stats['limit_bytes'] / 1024 / 1024).round(0)
+            stats['hit rate'] = (stats['hit_rate'] * 100).round(1).astype(str) + '%'
+            # coalesced: miss concorrenti serviti dall'esecuzione già in corso (query risparmiate)
+            st.caption(f"⚡ {int(stats['coalesced'].sum())} query executions saved by coalescing concurrent requests")
+            st.dataframe(
+                stats[['namespace', 'entries', 'MB', 'limit MB', 'hits', 'misses', 'hit rate', 'coalesced', 'evictions', 'rejected']],
+                hide_index=True, width='stretch'
+            )
+
+    def show_warmup_status(self):
+        """Esito dell'ultimo warm-up in background delle cache"""
+        cache_config = self.config.get('cache', {})
+        if not cache_config.get('warmup', True):
+            st.caption("🔥 Background warm-up disabled")
+            return
+        status = get_cache_warmer(self.tenant or '', self.db_path, float(cache_config.get('warmup_interval', 30)), self).status()
+        if status['running']:
+            st.caption("🔥 Warm-up in progress...")
+        elif status['last_finished']:
+            finished = datetime.fromtimestamp(status['last_finished'], ZoneInfo("Europe/Rome")).strftime('%H:%M:%S')
+            st.caption(f"🔥 Last warm-up at {finished} in {status['last_duration']:.1f}s")
+        for view, error in status['failed'].items():
+            st.warning(f"⚠️ Warm-up of {view} failed: {error}")
+
+    def get_dimensions(self, history: bool = False) -> DimensionIndex:
+        """Indice in memoria delle tabelle piccole per la versione dati corrente"""
+        return get_dimension_index(self.db_path, get_data_version(self.db_path), self.get_attached_archive(history))
+
+    def safe_sql_query(self, query: str, params: List = None, conn: Optional[sqlite3.Connection] = None,
+                       history: bool = False) -> pd.DataFrame:
+        """Esegue query SQL con gestione errori (su conn se indicata, es. la connessione di un worker).
+        Con history le tabelle includono anche le leghe archiviate"""
+        try:
+            if conn is not None:
+                return pd.read_sql_query(query, conn, params=params or [])
+            conn = self.connect(history)
             df = pd.read_sql_query(query, conn, params=params or [])
             conn.close()
             return df
@@ -285,6 +742,48 @@ class ACCWebDashboard:
             st.error(f"❌ Errore nella query: {e}")
             return pd.DataFrame()
 
+    def analytics_query(self, query: str, params: List = None, conn: Optional[sqlite3.Connection] = None,
+                        history: bool = False) -> pd.DataFrame:
+        """Esegue una query aggregata sul backend analitico configurato (SQLite se non disponibile)"""
+        backend_name = self.config.get('analytics', {}).get('backend', 'sqlite')
+        # Il backend analitico copia solo il database principale, non l'archivio
+        if backend_name != 'sqlite' and not self.get_attached_archive(history):
+            try:
+                return get_analytics_engine(self.db_path, backend_name).query(query, params)
+            except Exception as e:
+                st.warning(f"⚠️ Analytics backend '{backend_name}' unavailable, using SQLite: {e}")
+        return self.safe_sql_query(query, params, conn, history)
+
+    def run_parallel(self, tasks: Dict[str, Callable[[sqlite3.Connection], Any]],
+                     history: bool = False) -> Dict[str, Any]:
+        """Esegue task indipendenti sul pool di lettura (ognuno riceve la connessione del worker).
+        Il contesto Streamlit è propagato ai worker, così avvisi ed errori dei metodi dati restano visibili.
+        Con history i worker vedono anche le leghe archiviate"""
+        archive_path = self.get_attached_archive(history)
+        executor = get_query_executor(self.db_path, archive_path)
+        ctx = get_script_run_ctx(suppress_warning=True)
+
+        def with_context(task):
+            def run_task(conn):
+                previous = get_script_run_ctx(suppress_warning=True)
+                add_script_run_ctx(threading.current_thread(), ctx)
+                try:
+                    return task(conn)
+                finally:
+                    add_script_run_ctx(threading.current_thread(), previous)
+            return run_task
+
+        # I worker riaprono la connessione se il database (o l'archivio) è stato sostituito
+        # o se la replica in memoria è stata ricopiata
+        file_identity = get_file_identity(self.db_path)
+        replica = _memory_replicas.get(self.db_path)
+        if replica is not None:
+            replica.check()
+            file_identity += f"|{replica.uri or 'disk'}"
+        if archive_path:
+            file_identity += f"|{get_file_identity(archive_path)}"
+        return executor.run({name: with_context(task) for name, task in tasks.items()}, file_identity=file_identity)
+
     def format_lap_time(self, lap_time_ms: Optional[int]) -> str:
         """Converte tempo giro da millisecondi a formato MM:SS.sss"""
         if not lap_time_ms or lap_time_ms <= 0:
@@ -298,10 +797,11 @@ class ACCWebDashboard:
         seconds = (lap_time_ms % 60000) / 1000
         return f"{minutes}:{seconds:06.3f}"
     
+    @frame_cached('homepage', cacheable=lambda stats: any(stats.values()))
     def get_database_stats(self) -> Dict:
         """Ottiene statistiche generali dal database con gestione errori migliorata"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connect()
             cursor = conn.cursor()
             
             # Statistiche base con fallback
@@ -373,7 +873,7 @@ class ACCWebDashboard:
                 sr.position
         """
 
-        return self.safe_sql_query(query, [session_id])
+        return self.safe_sql_query(query, [session_id], history=True)
 
     def format_session_date(self, session_date: str) -> str:
         """Formatta data sessione per visualizzazione"""
@@ -400,6 +900,23 @@ class ACCWebDashboard:
 
     # ==================== HOMEPAGE ====================
 
+    def show_tenant_selector(self):
+        """Selettore della community in sidebar quando il processo ne ospita più di una"""
+        if not self.tenant:
+            return
+        tenants = list_tenants(load_registry(get_registry_path()))
+        if len(tenants) < 2:
+            return
+        selected = st.sidebar.selectbox(
+            "🌐 Community:",
+            options=tenants,
+            index=tenants.index(self.tenant),
+            key="tenant_select"
+        )
+        if selected != self.tenant:
+            st.query_params[TENANT_QUERY_PARAM] = selected
+            st.rerun()
+
     def show_environment_indicator(self):
         """Mostra indicatore ambiente (solo in sviluppo locale)"""
         if not self.is_github_deployment:
@@ -532,6 +1049,7 @@ class ACCWebDashboard:
             - Verifica che il file `acc_stats.db` sia presente nel repository
             - Controlla che il file non sia danneggiato
             - Assicurati che contenga le tabelle necessarie
+            - Pubblica i nuovi database con `python acc_swap.py nuovo.db` (sostituzione atomica)
             """)
         else:
             st.markdown(f"""
@@ -676,43 +1194,25 @@ class ACCWebDashboard:
         st.header("Time Attack")
 
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connect()
             cursor = conn.cursor()
 
-            # Ottieni campionati con sessioni Time Attack (TIER e STANDARD)
-            cursor.execute("""
-                SELECT ch.championship_id, ch.name, ch.is_completed, ch.start_date,
-                       COUNT(DISTINCT tar.competition_id) as ta_results_count
-                FROM championships ch
-                LEFT JOIN competitions c ON c.championship_id = ch.championship_id
-                LEFT JOIN time_attack_results tar ON tar.competition_id = c.competition_id
-                GROUP BY ch.championship_id
-                ORDER BY
-                    CASE WHEN ch.start_date IS NULL THEN 1 ELSE 0 END,
-                    ch.start_date DESC,
-                    ch.championship_id DESC
-            """)
-            championships = cursor.fetchall()
+            # Campionati con sessioni Time Attack (TIER e STANDARD), default: più recente con risultati
+            championships, champ_default = self.get_time_attack_championships(cursor)
 
             if not championships:
                 st.warning("❌ No championships found in database")
                 conn.close()
                 return
 
-            # Prepara opzioni campionato, default: più recente con risultati Time Attack
+            # Prepara opzioni campionato
             champ_options = []
             champ_map = {}
-            champ_default = 0
-            first_with_results = None
-            for idx, (champ_id, champ_name, is_completed, start_date, ta_results_count) in enumerate(championships):
+            for champ_id, champ_name, is_completed, start_date, ta_results_count in championships:
                 status_str = " ❌" if is_completed == -1 else (" ✅" if is_completed == 1 else " 🔄")
                 display = f"{champ_name}{status_str}"
                 champ_options.append(display)
                 champ_map[display] = champ_id
-                if ta_results_count > 0 and first_with_results is None:
-                    first_with_results = idx
-            if first_with_results is not None:
-                champ_default = first_with_results
 
             selected_championship = st.selectbox(
                 "🏆 Select Championship:",
@@ -722,35 +1222,8 @@ class ACCWebDashboard:
             )
             selected_champ_id = champ_map[selected_championship]
 
-            # Ottieni competizioni del campionato selezionato
-            cursor.execute("""
-                SELECT
-                    c.competition_id,
-                    c.name,
-                    c.track_name,
-                    c.round_number,
-                    c.date_start,
-                    c.date_end,
-                    c.weekend_format,
-                    c.is_completed,
-                    (SELECT COUNT(*) FROM sessions WHERE competition_id = c.competition_id AND is_time_attack = 1) as session_count,
-                    (SELECT COUNT(*) FROM time_attack_results WHERE competition_id = c.competition_id) as results_count,
-                    l.name as league_name,
-                    ch.tier_number,
-                    ch.name as tier_name,
-                    ch.championship_type
-                FROM competitions c
-                LEFT JOIN championships ch ON c.championship_id = ch.championship_id
-                LEFT JOIN leagues l ON ch.league_id = l.league_id
-                WHERE c.championship_id = ?
-                GROUP BY c.competition_id
-                ORDER BY
-                    CASE WHEN c.date_start IS NULL THEN 1 ELSE 0 END,
-                    c.date_start DESC,
-                    c.round_number DESC
-            """, (selected_champ_id,))
-
-            competitions = cursor.fetchall()
+            # Competizioni del campionato selezionato, default: prima con dati Time Attack
+            competitions, default_index = self.get_time_attack_competitions(cursor, selected_champ_id)
 
             if not competitions:
                 st.warning("❌ No competitions found for this championship")
@@ -760,9 +1233,8 @@ class ACCWebDashboard:
             # Prepara opzioni per selectbox competizione
             competition_options = []
             competition_map = {}
-            default_index = 0
 
-            for idx, (comp_id, name, track, round_num, date_start, date_end, weekend_format, is_completed, session_count, results_count, league_name, tier_number, tier_name, championship_type) in enumerate(competitions):
+            for comp_id, name, track, round_num, date_start, date_end, weekend_format, is_completed, session_count, results_count, league_name, tier_number, tier_name, championship_type in competitions:
                 round_str = f"R{round_num} - " if round_num else ""
                 status_str = " ✅" if is_completed else " 🔄"
                 date_str = f" ({date_start[:10]})" if date_start else ""
@@ -770,12 +1242,6 @@ class ACCWebDashboard:
                 competition_options.append(display_name)
                 competition_map[display_name] = (comp_id, name, track, round_num, date_start, date_end, weekend_format, is_completed, session_count, results_count, league_name, tier_number, tier_name, championship_type)
 
-            # Default: prima competizione con dati Time Attack
-            for idx, (comp_id, name, track, round_num, date_start, date_end, weekend_format, is_completed, session_count, results_count, league_name, tier_number, tier_name, championship_type) in enumerate(competitions):
-                if session_count > 0 or results_count > 0:
-                    default_index = idx
-                    break
-
             # Selectbox competizione
             selected_competition = st.selectbox(
                 "🏁 Select Competition:",
@@ -816,184 +1282,245 @@ class ACCWebDashboard:
                 </div>
                 """, unsafe_allow_html=True)
 
-                # Query Time Attack results
-                cursor.execute("""
-                    SELECT
-                        d.last_name,
-                        tar.best_lap_time,
-                        tar.best_split1,
-                        tar.best_split2,
-                        tar.best_split3,
-                        tar.points,
-                        s.session_date,
-                        COALESCE(cm.car_name, tar.car_model) as car_name,
-                        tar.is_enrolled
-                    FROM time_attack_results tar
-                    JOIN drivers d ON tar.driver_id = d.driver_id
-                    LEFT JOIN sessions s ON tar.session_id = s.session_id
-                    LEFT JOIN car_models cm ON tar.car_model = cm.car_model
-                    WHERE tar.competition_id = ?
-                        AND tar.best_lap_time IS NOT NULL
-                        AND tar.best_lap_time > 30000
-                        AND tar.best_lap_time < 3600000
-                    ORDER BY tar.best_lap_time ASC
-                """, (comp_id,))
-
-                ta_results = cursor.fetchall()
                 conn.close()
 
-                if not ta_results:
-                    st.info("ℹ️ No Time Attack results recorded for this competition")
-                    return
+                # Modalità live: solo la classifica viene rieseguita a intervalli (fragment),
+                # senza rileggere campionati e competizioni
+                live_col, interval_col = st.columns([1, 3])
+                with live_col:
+                    live = st.toggle("🔴 Live", key="ta_live", help="Auto-refresh the leaderboard while the time attack is running")
+                with interval_col:
+                    interval = st.selectbox(
+                        "Refresh every",
+                        options=[10, 30, 60],
+                        index=1,
+                        format_func=lambda seconds: f"{seconds}s",
+                        key="ta_live_interval",
+                        disabled=not live,
+                        label_visibility="collapsed"
+                    )
+
+                if live and hasattr(st, 'fragment'):
+                    st.fragment(self.show_time_attack_leaderboard, run_every=interval)(comp_id, is_tier, date_end, live=True)
+                else:
+                    self.show_time_attack_leaderboard(comp_id, is_tier, date_end)
 
-                # Formatta risultati per visualizzazione
-                st.subheader("⏱️ Time Attack Leaderboard")
+        except Exception as e:
+            st.error(f"❌ Error loading Time Attack data: {e}")
 
-                # Determina se la competizione è scaduta (data sistema >= date_end, usando timezone italiano)
-                from datetime import datetime, timedelta
+    def get_time_attack_championships(self, cursor: sqlite3.Cursor) -> Tuple[List[Tuple], int]:
+        """Campionati con numero di competizioni con risultati Time Attack e indice di default
+        (il più recente con risultati, altrimenti il primo)"""
+        cursor.execute("""
+            SELECT ch.championship_id, ch.name, ch.is_completed, ch.start_date,
+                   COUNT(DISTINCT tar.competition_id) as ta_results_count
+            FROM championships ch
+            LEFT JOIN competitions c ON c.championship_id = ch.championship_id
+            LEFT JOIN time_attack_results tar ON tar.competition_id = c.competition_id
+            GROUP BY ch.championship_id
+            ORDER BY
+                CASE WHEN ch.start_date IS NULL THEN 1 ELSE 0 END,
+                ch.start_date DESC,
+                ch.championship_id DESC
+        """)
+        championships = cursor.fetchall()
+        return championships, first_with_results(championships, lambda row: row[4] > 0)
+
+    def get_time_attack_competitions(self, cursor: sqlite3.Cursor, championship_id: int) -> Tuple[List[Tuple], int]:
+        """Competizioni del campionato con conteggi Time Attack e indice di default
+        (la prima con sessioni o risultati Time Attack)"""
+        cursor.execute("""
+            SELECT
+                c.competition_id,
+                c.name,
+                c.track_name,
+                c.round_number,
+                c.date_start,
+                c.date_end,
+                c.weekend_format,
+                c.is_completed,
+                (SELECT COUNT(*) FROM sessions WHERE competition_id = c.competition_id AND is_time_attack = 1) as session_count,
+                (SELECT COUNT(*) FROM time_attack_results WHERE competition_id = c.competition_id) as results_count,
+                l.name as league_name,
+                ch.tier_number,
+                ch.name as tier_name,
+                ch.championship_type
+            FROM competitions c
+            LEFT JOIN championships ch ON c.championship_id = ch.championship_id
+            LEFT JOIN leagues l ON ch.league_id = l.league_id
+            WHERE c.championship_id = ?
+            GROUP BY c.competition_id
+            ORDER BY
+                CASE WHEN c.date_start IS NULL THEN 1 ELSE 0 END,
+                c.date_start DESC,
+                c.round_number DESC
+        """, (championship_id,))
+        competitions = cursor.fetchall()
+        return competitions, first_with_results(competitions, lambda row: row[8] > 0 or row[9] > 0)
+
+    def get_time_attack_leaderboard(self, competition_id: int) -> Optional[List[Tuple]]:
+        """Classifica Time Attack della competizione, riletta solo se il watermark è cambiato"""
+        leaderboard, lock = get_time_attack_store(self.db_path, get_file_identity(self.db_path), competition_id)
+        try:
+            with lock:
+                conn = self.connect()
+                leaderboard.refresh(conn)
+                conn.close()
+                return leaderboard.rows()
+        except Exception as e:
+            st.error(f"❌ Error loading Time Attack data: {e}")
+            return None
+
+    def show_time_attack_leaderboard(self, comp_id: int, is_tier: bool, date_end: Optional[str], live: bool = False):
+        """Classifica Time Attack e grafico degli scostamenti (in modalità live rieseguita a intervalli)"""
+        ta_results = self.get_time_attack_leaderboard(comp_id)
+        if ta_results is None:
+            return
+
+        if live:
+            st.caption(f"🔴 Live · updated {datetime.now(ZoneInfo('Europe/Rome')).strftime('%H:%M:%S')}")
+
+        if not ta_results:
+            st.info("ℹ️ No Time Attack results recorded for this competition")
+            return
+
+        # Formatta risultati per visualizzazione
+        st.subheader("⏱️ Time Attack Leaderboard")
+
+        # Determina se la competizione è scaduta (data sistema >= date_end, usando timezone italiano)
+        is_expired = False
+        if date_end:
+            try:
+                end_date = datetime.strptime(date_end, '%Y-%m-%d')
+                now_italy = datetime.now(ZoneInfo("Europe/Rome")).replace(tzinfo=None)
+                is_expired = now_italy >= end_date
+            except:
                 is_expired = False
-                if date_end:
-                    try:
-                        end_date = datetime.strptime(date_end, '%Y-%m-%d')
-                        now_italy = datetime.now(ZoneInfo("Europe/Rome")).replace(tzinfo=None)
-                        is_expired = now_italy >= end_date
-                    except:
-                        is_expired = False
-
-                # Crea DataFrame
-                data = []
-                prev_time = None
-                for idx, (driver, lap_time, split1, split2, split3, points, session_date, car_name, is_enrolled) in enumerate(ta_results, 1):
-                    # Calcola gap rispetto al pilota che precede
-                    if idx > 1 and prev_time is not None:
-                        gap_ms = lap_time - prev_time
-                        gap_seconds = gap_ms / 1000.0
-                        gap_str = f"+{gap_seconds:.3f}s"
-                    else:
-                        gap_str = "-"
-                    prev_time = lap_time
 
-                    # Formatta splits (da milliseconds a secondi)
-                    def format_split(split_ms):
-                        if split_ms is None or split_ms == 0:
-                            return "-"
-                        return f"{split_ms / 1000:.3f}s"
+        # Crea DataFrame
+        data = []
+        for idx, (driver, lap_time, split1, split2, split3, points, session_date, car_name, is_enrolled, gap_ms) in enumerate(ta_results, 1):
+            # Gap rispetto al pilota che precede (mantenuto dalla classifica incrementale)
+            gap_str = f"+{gap_ms / 1000.0:.3f}s" if gap_ms is not None else "-"
 
-                    split1_str = format_split(split1)
-                    split2_str = format_split(split2)
-                    split3_str = format_split(split3)
+            # Formatta splits (da milliseconds a secondi)
+            def format_split(split_ms):
+                if split_ms is None or split_ms == 0:
+                    return "-"
+                return f"{split_ms / 1000:.3f}s"
 
-                    # Formatta data con ora
-                    if session_date:
-                        try:
-                            from datetime import datetime
-                            date_obj = datetime.fromisoformat(session_date.replace('Z', '+00:00'))
-                            date_str = date_obj.strftime('%d/%m/%Y %H:%M')
-                        except:
-                            date_str = session_date[:16] if len(session_date) >= 16 else session_date[:10] if session_date else 'N/A'
-                    else:
-                        date_str = 'N/A'
-
-                    data.append({
-                        "Pos": str(idx),
-                        "Driver": driver,
-                        "Type": "👤" if is_enrolled else "👻",
-                        "Points": f"{points:.1f}" if not is_tier else (f"{points:.1f}" if (points and points > 0) or is_enrolled else "-"),
-                        "Best Lap": self.format_lap_time(lap_time),
-                        "Gap": gap_str,
-                        "S1": split1_str,
-                        "S2": split2_str,
-                        "S3": split3_str,
-                        "Date": date_str,
-                        "Car": car_name if car_name else "-"
-                    })
-
-                df = pd.DataFrame(data)
-
-                # Calcola altezza per mostrare almeno 15 piloti senza scroll
-                # ~35px per riga + ~38px per header
-                min_rows = 15
-                row_height = 35
-                header_height = 38
-                num_rows = len(df)
-                display_rows = max(min_rows, num_rows)
-                table_height = (display_rows * row_height) + header_height
-
-                # Applica colore alla colonna Points: verde se scaduta (punti definitivi), rosso altrimenti (punti provvisori)
-                points_style = 'color: #44BB44; font-weight: bold' if is_expired else 'color: #FF4444; font-weight: bold'
-                styled_df = df.style.map(lambda x: points_style, subset=['Points'])
-
-                st.dataframe(
-                    styled_df,
-                    width='stretch',
-                    hide_index=True,
-                    height=table_height,
-                    column_config={
-                        "Pos": st.column_config.TextColumn("Pos", width="small"),
-                        "Type": st.column_config.TextColumn("Type", width="small"),
-                    }
-                )
+            split1_str = format_split(split1)
+            split2_str = format_split(split2)
+            split3_str = format_split(split3)
 
-                # Grafico scostamento dal tempo medio
-                st.markdown("---")
+            # Formatta data con ora
+            if session_date:
+                try:
+                    date_obj = datetime.fromisoformat(session_date.replace('Z', '+00:00'))
+                    date_str = date_obj.strftime('%d/%m/%Y %H:%M')
+                except:
+                    date_str = session_date[:16] if len(session_date) >= 16 else session_date[:10] if session_date else 'N/A'
+            else:
+                date_str = 'N/A'
+
+            data.append({
+                "Pos": str(idx),
+                "Driver": driver,
+                "Type": "👤" if is_enrolled else "👻",
+                "Points": f"{points:.1f}" if not is_tier else (f"{points:.1f}" if (points and points > 0) or is_enrolled else "-"),
+                "Best Lap": self.format_lap_time(lap_time),
+                "Gap": gap_str,
+                "S1": split1_str,
+                "S2": split2_str,
+                "S3": split3_str,
+                "Date": date_str,
+                "Car": car_name if car_name else "-"
+            })
+
+        df = pd.DataFrame(data)
+
+        # Calcola altezza per mostrare almeno 15 piloti senza scroll
+        # ~35px per riga + ~38px per header
+        min_rows = 15
+        row_height = 35
+        header_height = 38
+        num_rows = len(df)
+        display_rows = max(min_rows, num_rows)
+        table_height = (display_rows * row_height) + header_height
+
+        # Applica colore alla colonna Points: verde se scaduta (punti definitivi), rosso altrimenti (punti provvisori)
+        points_style = 'color: #44BB44; font-weight: bold' if is_expired else 'color: #FF4444; font-weight: bold'
+        styled_df = df.style.map(lambda x: points_style, subset=['Points'])
 
-                import plotly.graph_objects as go
+        st.dataframe(
+            styled_df,
+            width='stretch',
+            hide_index=True,
+            height=table_height,
+            column_config={
+                "Pos": st.column_config.TextColumn("Pos", width="small"),
+                "Type": st.column_config.TextColumn("Type", width="small"),
+            }
+        )
 
-                # Calcola tempo medio
-                avg_time = sum(r[1] for r in ta_results) / len(ta_results) / 1000  # in secondi
-                avg_time_str = self.format_lap_time(int(avg_time * 1000))
+        # Grafico scostamento dal tempo medio
+        st.markdown("---")
 
-                st.subheader(f"📊 Deviation from Average Lap Time ({avg_time_str})")
+        import plotly.graph_objects as go
 
-                # Prepara dati piloti con scostamento (ordinati dal più veloce al più lento)
-                pilot_data = []
-                for driver, lap_time, split1, split2, split3, points, session_date, car_name, is_enrolled in ta_results:
-                    time_sec = lap_time / 1000
-                    deviation = time_sec - avg_time
-                    pilot_data.append({'driver': driver, 'deviation': deviation})
+        # Calcola tempo medio
+        avg_time = sum(r[1] for r in ta_results) / len(ta_results) / 1000  # in secondi
+        avg_time_str = self.format_lap_time(int(avg_time * 1000))
 
-                # Ordina dal più lento (in alto) al più veloce (in basso) per visualizzazione
-                pilot_data.reverse()
+        st.subheader(f"📊 Deviation from Average Lap Time ({avg_time_str})")
 
-                drivers = [p['driver'] for p in pilot_data]
-                deviations = [p['deviation'] for p in pilot_data]
-                colors = ['#44BB44' if d < 0 else '#FF4444' for d in deviations]
+        # Prepara dati piloti con scostamento (ordinati dal più veloce al più lento)
+        pilot_data = []
+        for driver, lap_time, split1, split2, split3, points, session_date, car_name, is_enrolled, _ in ta_results:
+            time_sec = lap_time / 1000
+            deviation = time_sec - avg_time
+            pilot_data.append({'driver': driver, 'deviation': deviation})
 
-                fig = go.Figure()
+        # Ordina dal più lento (in alto) al più veloce (in basso) per visualizzazione
+        pilot_data.reverse()
 
-                fig.add_trace(go.Bar(
-                    y=drivers,
-                    x=deviations,
-                    orientation='h',
-                    marker_color=colors,
-                    text=[f"{d:+.3f}s" for d in deviations],
-                    textposition='outside',
-                    textfont=dict(color='white', size=11),
-                    hovertemplate='%{y}<br>%{x:+.3f}s<extra></extra>'
-                ))
-
-                fig.update_layout(
-                    xaxis_title='Deviation from Average (seconds)',
-                    yaxis_title='',
-                    height=max(400, len(drivers) * 30 + 100),
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    showlegend=False,
-                    xaxis=dict(zeroline=True, zerolinewidth=2, zerolinecolor='white'),
-                    bargap=0.3
-                )
+        drivers = [p['driver'] for p in pilot_data]
+        deviations = [p['deviation'] for p in pilot_data]
+        colors = ['#44BB44' if d < 0 else '#FF4444' for d in deviations]
 
-                st.plotly_chart(fig, width='stretch')
+        fig = go.Figure()
 
-                st.caption("🟢 Faster than avg | 🔴 Slower than avg")
+        fig.add_trace(go.Bar(
+            y=drivers,
+            x=deviations,
+            orientation='h',
+            marker_color=colors,
+            text=[f"{d:+.3f}s" for d in deviations],
+            textposition='outside',
+            textfont=dict(color='white', size=11),
+            hovertemplate='%{y}<br>%{x:+.3f}s<extra></extra>'
+        ))
 
-        except Exception as e:
-            st.error(f"❌ Error loading Time Attack data: {e}")
+        fig.update_layout(
+            xaxis_title='Deviation from Average (seconds)',
+            yaxis_title='',
+            height=max(400, len(drivers) * 30 + 100),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='white'),
+            showlegend=False,
+            xaxis=dict(zeroline=True, zerolinewidth=2, zerolinecolor='white'),
+            bargap=0.3
+        )
+
+        st.plotly_chart(fig, width='stretch')
+
+        st.caption("🟢 Faster than avg | 🔴 Slower than avg")
 
 
     # ==================== RACE RESULTS ====================
 
+    @frame_cached('standings')
     def get_competition_results(self, competition_id: int) -> pd.DataFrame:
         """Ottiene risultati competizione con dettagli completi"""
         query = """
@@ -1037,7 +1564,7 @@ class ACCWebDashboard:
     def get_competition_sessions(self, competition_id: int) -> List[Tuple]:
         """Ottiene sessioni della competizione con nome del pilota che ha fatto il best lap"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connect()
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -1069,48 +1596,80 @@ class ACCWebDashboard:
             st.error(f"❌ Errore nel recupero sessioni: {e}")
             return []
     
+    def get_results_championships(self, cursor: sqlite3.Cursor) -> Tuple[List[Tuple], int]:
+        """Campionati con numero di competizioni con risultati calcolati e indice di default
+        (il più recente con risultati, altrimenti il primo)"""
+        cursor.execute("""
+            SELECT ch.championship_id, ch.name, ch.is_completed, ch.start_date,
+                   COUNT(DISTINCT cs.competition_id) as results_count
+            FROM championships ch
+            LEFT JOIN competition_standings cs ON cs.competition_id IN (
+                SELECT competition_id FROM competitions WHERE championship_id = ch.championship_id
+            )
+            GROUP BY ch.championship_id
+            ORDER BY
+                CASE WHEN ch.start_date IS NULL THEN 1 ELSE 0 END,
+                ch.start_date DESC,
+                ch.championship_id DESC
+        """)
+        championships = cursor.fetchall()
+        return championships, first_with_results(championships, lambda row: row[4] > 0)
+
+    def get_results_competitions(self, cursor: sqlite3.Cursor, championship_id: int) -> Tuple[List[Tuple], int]:
+        """Competizioni del campionato con conteggi race e indice di default
+        (la prima con sessioni race o risultati calcolati)"""
+        cursor.execute("""
+            SELECT
+                c.competition_id,
+                c.name,
+                c.track_name,
+                c.round_number,
+                c.date_start,
+                c.date_end,
+                c.weekend_format,
+                c.is_completed,
+                (SELECT COUNT(*) FROM sessions WHERE competition_id = c.competition_id AND (is_time_attack = 0 OR is_time_attack IS NULL)) as session_count,
+                (SELECT COUNT(*) FROM competition_standings WHERE competition_id = c.competition_id) as results_count,
+                l.name as league_name,
+                ch.tier_number,
+                ch.name as tier_name
+            FROM competitions c
+            LEFT JOIN championships ch ON c.championship_id = ch.championship_id
+            LEFT JOIN leagues l ON ch.league_id = l.league_id
+            WHERE c.championship_id = ?
+            GROUP BY c.competition_id
+            ORDER BY
+                CASE WHEN c.date_start IS NULL THEN 1 ELSE 0 END,
+                c.date_start DESC,
+                c.round_number DESC
+        """, (championship_id,))
+        competitions = cursor.fetchall()
+        return competitions, first_with_results(competitions, lambda row: row[8] > 0 or row[9] > 0)
+
     def show_race_results(self):
         """Mostra il report Competition Results con selezione competizione"""
         st.header("Competition Results")
 
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connect()
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT ch.championship_id, ch.name, ch.is_completed, ch.start_date,
-                       COUNT(DISTINCT cs.competition_id) as results_count
-                FROM championships ch
-                LEFT JOIN competition_standings cs ON cs.competition_id IN (
-                    SELECT competition_id FROM competitions WHERE championship_id = ch.championship_id
-                )
-                GROUP BY ch.championship_id
-                ORDER BY
-                    CASE WHEN ch.start_date IS NULL THEN 1 ELSE 0 END,
-                    ch.start_date DESC,
-                    ch.championship_id DESC
-            """)
-            championships = cursor.fetchall()
+            # Campionati, default: più recente con risultati competizione calcolati
+            championships, champ_default = self.get_results_championships(cursor)
 
             if not championships:
                 st.warning("❌ No championships found in database")
                 conn.close()
                 return
 
-            # Prepara opzioni campionato, default: più recente con risultati competizione calcolati
+            # Prepara opzioni campionato
             champ_options = []
             champ_map = {}
-            champ_default = 0
-            first_with_results = None
-            for idx, (champ_id, champ_name, is_completed, start_date, results_count) in enumerate(championships):
+            for champ_id, champ_name, is_completed, start_date, results_count in championships:
                 status_str = " ❌" if is_completed == -1 else (" ✅" if is_completed == 1 else " 🔄")
                 display = f"{champ_name}{status_str}"
                 champ_options.append(display)
                 champ_map[display] = champ_id
-                if results_count > 0 and first_with_results is None:
-                    first_with_results = idx
-            if first_with_results is not None:
-                champ_default = first_with_results
 
             selected_championship = st.selectbox(
                 "🏆 Select Championship:",
@@ -1120,34 +1679,8 @@ class ACCWebDashboard:
             )
             selected_champ_id = champ_map[selected_championship]
 
-            # Ottieni competizioni del campionato selezionato
-            cursor.execute("""
-                SELECT
-                    c.competition_id,
-                    c.name,
-                    c.track_name,
-                    c.round_number,
-                    c.date_start,
-                    c.date_end,
-                    c.weekend_format,
-                    c.is_completed,
-                    (SELECT COUNT(*) FROM sessions WHERE competition_id = c.competition_id AND (is_time_attack = 0 OR is_time_attack IS NULL)) as session_count,
-                    (SELECT COUNT(*) FROM competition_standings WHERE competition_id = c.competition_id) as results_count,
-                    l.name as league_name,
-                    ch.tier_number,
-                    ch.name as tier_name
-                FROM competitions c
-                LEFT JOIN championships ch ON c.championship_id = ch.championship_id
-                LEFT JOIN leagues l ON ch.league_id = l.league_id
-                WHERE c.championship_id = ?
-                GROUP BY c.competition_id
-                ORDER BY
-                    CASE WHEN c.date_start IS NULL THEN 1 ELSE 0 END,
-                    c.date_start DESC,
-                    c.round_number DESC
-            """, (selected_champ_id,))
-
-            competitions = cursor.fetchall()
+            # Competizioni del campionato selezionato, default: prima con dati race
+            competitions, default_index = self.get_results_competitions(cursor, selected_champ_id)
 
             if not competitions:
                 st.warning("❌ No competitions found for this championship")
@@ -1157,9 +1690,8 @@ class ACCWebDashboard:
             # Prepara opzioni per selectbox competizione
             competition_options = []
             competition_map = {}
-            default_index = 0
 
-            for idx, (comp_id, name, track, round_num, date_start, date_end, weekend_format, is_completed, session_count, results_count, league_name, tier_number, tier_name) in enumerate(competitions):
+            for comp_id, name, track, round_num, date_start, date_end, weekend_format, is_completed, session_count, results_count, league_name, tier_number, tier_name in competitions:
                 round_str = f"R{round_num} - " if round_num else ""
                 status_str = " ✅" if is_completed else " 🔄"
                 date_str = f" ({date_start[:10]})" if date_start else ""
@@ -1167,12 +1699,6 @@ class ACCWebDashboard:
                 competition_options.append(display_name)
                 competition_map[display_name] = (comp_id, name, track, round_num, date_start, date_end, weekend_format, is_completed, session_count, results_count, league_name, tier_number, tier_name)
 
-            # Default: prima competizione con dati race
-            for idx, (comp_id, name, track, round_num, date_start, date_end, weekend_format, is_completed, session_count, results_count, league_name, tier_number, tier_name) in enumerate(competitions):
-                if session_count > 0 or results_count > 0:
-                    default_index = idx
-                    break
-
             # Selectbox competizione
             selected_competition = st.selectbox(
                 "🏁 Select Competition:",
@@ -1386,12 +1912,14 @@ class ACCWebDashboard:
 
     # ==================== STANDINGS ====================
 
+    @frame_cached('standings')
     def get_championship_standings(self, championship_id: int) -> pd.DataFrame:
         """Ottiene classifica campionato con tutti i dettagli"""
         query = """
             SELECT
                 cs.position,
                 d.last_name as driver,
+                cs.driver_id,
                 cs.total_points,
                 cs.competitions_participated,
                 cs.wins,
@@ -1418,33 +1946,185 @@ class ACCWebDashboard:
         
         return self.safe_sql_query(query, [championship_id])
     
+    @frame_cached('standings')
+    def get_points_simulation(self, championship_id: int) -> Tuple[pd.DataFrame, List[str]]:
+        """Ricalcola la classifica del campionato con tutti i sistemi punti (what-if)"""
+        race_results = self.safe_sql_query("""
+            SELECT
+                s.competition_id as round,
+                sr.driver_id,
+                sr.position
+            FROM session_results sr
+            JOIN sessions s ON sr.session_id = s.session_id
+            JOIN competitions c ON s.competition_id = c.competition_id
+            WHERE c.championship_id = ?
+              AND s.session_type LIKE 'R%'
+              AND (s.is_time_attack IS NULL OR s.is_time_attack = 0)
+              AND sr.position IS NOT NULL
+        """, [championship_id])
+
+        competition_results = self.safe_sql_query("""
+            SELECT
+                cs.competition_id as round,
+                cs.driver_id,
+                d.last_name as driver,
+                COALESCE(ss.poles, 0) as poles,
+                COALESCE(ss.fastest_laps, 0) as fastest_laps,
+                cs.time_attack_points,
+                cs.guests_beaten,
+                cs.beaten_by_guests
+            FROM competition_standings cs
+            JOIN competitions c ON cs.competition_id = c.competition_id
+            JOIN championships ch ON c.championship_id = ch.championship_id
+            JOIN drivers d ON cs.driver_id = d.driver_id
+            LEFT JOIN championship_enrollments ce
+                   ON cs.driver_id = ce.driver_id AND ce.championship_id = c.championship_id
+            LEFT JOIN (
+                SELECT
+                    s.competition_id,
+                    sr.driver_id,
+                    SUM(CASE WHEN s.session_type LIKE 'Q%' AND sr.position = 1 THEN 1 ELSE 0 END) as poles,
+                    SUM(CASE WHEN s.session_type LIKE 'R%' AND sr.best_lap = s.best_lap_overall THEN 1 ELSE 0 END) as fastest_laps
+                FROM session_results sr
+                JOIN sessions s ON sr.session_id = s.session_id
+                JOIN competitions c2 ON s.competition_id = c2.competition_id
+                WHERE c2.championship_id = ?
+                  AND (s.is_time_attack IS NULL OR s.is_time_attack = 0)
+                GROUP BY s.competition_id, sr.driver_id
+            ) ss ON ss.competition_id = cs.competition_id AND ss.driver_id = cs.driver_id
+            WHERE c.championship_id = ?
+              AND (ch.championship_type != 'tier' OR ce.driver_id IS NOT NULL)
+        """, [championship_id, championship_id])
+
+        systems = self.safe_sql_query("""
+            SELECT name, position_points_json, pole_position_points, fastest_lap_points,
+                   drop_worst_results, guest_bonus_value
+            FROM points_systems
+            ORDER BY system_id
+        """)
+
+        return simulate_points_systems(race_results, competition_results, systems)
+
+    def show_points_simulation(self, championship_id: int, standings_df: pd.DataFrame):
+        """Mostra il confronto classifiche con tutti i sistemi punti"""
+        with st.expander("🧮 What-if: standings under every points system", expanded=False):
+            start = time.perf_counter()
+            simulation_df, skipped = self.get_points_simulation(championship_id)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            if simulation_df.empty:
+                st.info("ℹ️ No competition results available for the simulation")
+                return
+
+            # Confronto per driver_id: piloti diversi possono avere lo stesso cognome
+            actual = standings_df[['driver_id', 'driver', 'position', 'total_points']].drop_duplicates('driver_id')
+            comparison = actual.merge(simulation_df.drop(columns='driver'), on='driver_id', how='left')
+
+            display_df = pd.DataFrame({
+                'Driver': comparison['driver'],
+                'Actual': comparison.apply(
+                    lambda row: f"P{int(row['position'])} · {row['total_points']:.1f}" if pd.notna(row['position']) else "-",
+                    axis=1
+                ),
+            })
+            system_names = [col[:-4] for col in simulation_df.columns if col.endswith(' pts')]
+            for name in system_names:
+                display_df[name] = comparison.apply(
+                    lambda row: f"P{int(row[f'{name} pos'])} · {row[f'{name} pts']:.1f}" if pd.notna(row[f'{name} pos']) else "-",
+                    axis=1
+                )
+
+            st.dataframe(display_df, width='stretch', hide_index=True, height=35 * min(25, len(display_df)) + 38)
+
+            caption = f"Race positions, poles and fastest laps rescored with each system in {elapsed_ms:.0f} ms. Time attack points and guest counts are kept as recorded."
+            if skipped:
+                caption += f" Skipped (formula-based, no position table): {', '.join(skipped)}"
+            st.caption(caption)
+
+    def show_standings_verification(self, championship_id: int):
+        """Ricalcola la classifica dai risultati grezzi e mostra le differenze (solo admin)"""
+        with st.expander("🔎 Verify standings against raw results", expanded=False):
+            if not st.button("▶️ Run verification", key=f"verify_standings_{championship_id}"):
+                st.caption("Recomputes competition and championship standings from session results, time attack results and points systems.")
+                return
+
+            start = time.perf_counter()
+            try:
+                report = verify_championship(self.db_path, championship_id)
+            except Exception as e:
+                st.error(f"Error verifying standings: {e}")
+                return
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            if report.empty:
+                st.success(f"✅ Standings match the raw results ({elapsed_ms:.0f} ms)")
+                return
+
+            st.warning(f"⚠️ {len(report)} mismatches found ({elapsed_ms:.0f} ms)")
+            display_df = report[['scope', 'competition_id', 'driver', 'column', 'stored', 'expected']].rename(columns={
+                'scope': 'Scope', 'competition_id': 'Competition', 'driver': 'Driver',
+                'column': 'Column', 'stored': 'Stored', 'expected': 'Expected'
+            })
+            st.dataframe(display_df, width='stretch', hide_index=True, height=35 * min(20, len(display_df)) + 38)
+            st.caption("Race points of formula-based systems are not recomputed. Run `python acc_verify.py` to check every championship in parallel.")
+
+    def get_leagues(self, cursor: sqlite3.Cursor) -> List[Tuple]:
+        """Leghe dalla più recente (la prima è quella di default della pagina Standings)"""
+        cursor.execute("""
+            SELECT
+                l.league_id,
+                l.name,
+                l.season,
+                l.start_date,
+                l.end_date,
+                l.total_tiers,
+                l.is_completed,
+                l.description
+            FROM leagues l
+            ORDER BY
+                CASE WHEN l.start_date IS NULL THEN 1 ELSE 0 END,
+                l.start_date DESC,
+                l.league_id DESC
+        """)
+        return cursor.fetchall()
+
+    def get_league_tiers(self, cursor: sqlite3.Cursor, league_id: int) -> Tuple[List[Tuple], int]:
+        """Championships (tier) della lega con conteggio standing e indice di default
+        (il più recente con classifica calcolata, altrimenti il primo)"""
+        cursor.execute("""
+            SELECT
+                c.championship_id,
+                c.name,
+                c.tier_number,
+                c.start_date,
+                c.end_date,
+                c.is_completed,
+                c.description,
+                c.championship_type,
+                COUNT(cs.driver_id) as standings_count
+            FROM championships c
+            LEFT JOIN championship_standings cs ON c.championship_id = cs.championship_id
+            WHERE c.league_id = ?
+              AND c.total_rounds > 0
+            GROUP BY c.championship_id
+            ORDER BY
+                CASE WHEN c.start_date IS NULL THEN 1 ELSE 0 END,
+                c.start_date DESC,
+                c.championship_id DESC
+        """, (league_id,))
+        tiers = cursor.fetchall()
+        return tiers, first_with_results(tiers, lambda row: row[8] > 0)
+
     def show_leagues_report(self):
         """Mostra il report leagues"""
         st.header("Standings")
 
         # Ottieni lista leagues con conteggio standing
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connect()
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT
-                    l.league_id,
-                    l.name,
-                    l.season,
-                    l.start_date,
-                    l.end_date,
-                    l.total_tiers,
-                    l.is_completed,
-                    l.description
-                FROM leagues l
-                ORDER BY
-                    CASE WHEN l.start_date IS NULL THEN 1 ELSE 0 END,
-                    l.start_date DESC,
-                    l.league_id DESC
-            """)
-
-            leagues = cursor.fetchall()
+            leagues = self.get_leagues(cursor)
 
             if not leagues:
                 st.warning("❌ No leagues found in database")
@@ -1474,8 +2154,16 @@ class ACCWebDashboard:
 
             selected_league_id = league_map[selected_league_display]
 
+            # Lega archiviata: campionati e risultati sono nel database di archivio
+            self.use_archive = selected_league_id in self.get_archived_leagues()
+            if self.use_archive:
+                if self.archive_path and Path(self.archive_path).exists():
+                    st.caption("🗄️ Archived season - loaded from the archive database")
+                else:
+                    st.warning(f"⚠️ This league is archived but the archive database was not found ({self.archive_path or 'not configured'})")
+
             # Ottieni dettagli league selezionata
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connect()
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -1526,38 +2214,15 @@ class ACCWebDashboard:
                 st.markdown("---")
                 st.subheader("Tiers")
 
-                # Ottieni championships (tier) della lega con conteggio standing
-                cursor.execute("""
-                    SELECT
-                        c.championship_id,
-                        c.name,
-                        c.tier_number,
-                        c.start_date,
-                        c.end_date,
-                        c.is_completed,
-                        c.description,
-                        c.championship_type,
-                        COUNT(cs.driver_id) as standings_count
-                    FROM championships c
-                    LEFT JOIN championship_standings cs ON c.championship_id = cs.championship_id
-                    WHERE c.league_id = ?
-                      AND c.total_rounds > 0
-                    GROUP BY c.championship_id
-                    ORDER BY
-                        CASE WHEN c.start_date IS NULL THEN 1 ELSE 0 END,
-                        c.start_date DESC,
-                        c.championship_id DESC
-                """, (selected_league_id,))
-
-                tier_championships = cursor.fetchall()
+                # Championships (tier) della lega con conteggio standing, default: più recente con classifica
+                tier_championships, tier_default = self.get_league_tiers(cursor, selected_league_id)
 
                 if tier_championships:
                     # Mostra sempre selectbox per selezione tier
                     tier_options = ["Select a tier..."]
                     tier_map = {}
-                    default_tier_index = 1  # Default al primo tier (dopo "Select a tier...")
 
-                    for idx, (champ_id, champ_name, tier_num, date_start, date_end, is_completed, desc, champ_type, standings_count) in enumerate(tier_championships):
+                    for champ_id, champ_name, tier_num, date_start, date_end, is_completed, desc, champ_type, standings_count in tier_championships:
                         # Formato display
                         status_str = " ❌" if is_completed == -1 else (" ✅" if is_completed == 1 else " 🔄")
                         date_str = f" ({date_start[:10]})" if date_start else ""
@@ -1569,25 +2234,11 @@ class ACCWebDashboard:
                         tier_options.append(display_name)
                         tier_map[display_name] = champ_id
 
-                    # Trova default index: più recente con classifica calcolata
-                    first_with_standings_idx = None
-
-                    for idx, (champ_id, champ_name, tier_num, date_start, date_end, is_completed, desc, champ_type, standings_count) in enumerate(tier_championships):
-                        if standings_count > 0 and first_with_standings_idx is None:
-                            first_with_standings_idx = idx + 1  # +1 per "Select a tier..."
-                            break
-
-                    # Seleziona il più recente con standing, altrimenti il primo in lista
-                    if first_with_standings_idx is not None:
-                        default_tier_index = first_with_standings_idx
-                    else:
-                        default_tier_index = 1  # Fallback al primo tier
-
-                    # Selectbox tier
+                    # Selectbox tier (+1 per "Select a tier...")
                     selected_tier = st.selectbox(
                         "🏆 Select a Tier:",
                         options=tier_options,
-                        index=default_tier_index,
+                        index=tier_default + 1,
                         key="tier_select"
                     )
 
@@ -1737,6 +2388,13 @@ class ACCWebDashboard:
                                 height=35 * len(standings_display) + 38
                             )
 
+                            # Simulazione con gli altri sistemi punti
+                            self.show_points_simulation(champ_id, standings_df)
+
+                            # Verifica classifica (solo in locale, non per le leghe archiviate)
+                            if not self.is_github_deployment and not self.use_archive:
+                                self.show_standings_verification(champ_id)
+
                         else:
                             st.warning("⚠️ Tier championship leaderboard not yet calculated")
 
@@ -1937,44 +2595,36 @@ class ACCWebDashboard:
         except:
             return session_date[:16] if session_date else 'N/A'
 
+    @frame_cached('sessions')
     def get_sessions_statistics(self, date_from: date, date_to: date) -> Dict:
         """Ottiene statistiche sessioni per il periodo specificato - VERSIONE CORRETTA"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Converti date in string per query SQL
             date_from_str = date_from.strftime('%Y-%m-%d')
             date_to_str = (date_to + timedelta(days=1)).strftime('%Y-%m-%d')  # Include tutto il giorno 'to'
             
             # CORREZIONE: Statistiche sessioni separate dai driver
             # 1. Statistiche sessioni (senza JOIN con session_results)
-            cursor.execute('''
+            sessions_query = '''
                 SELECT 
                     COUNT(*) as total_sessions,
                     COUNT(CASE WHEN competition_id IS NOT NULL THEN 1 END) as official_sessions,
                     COUNT(CASE WHEN competition_id IS NULL THEN 1 END) as non_official_sessions
                 FROM sessions s
                 WHERE DATE(s.session_date) >= ? AND DATE(s.session_date) < ?
-            ''', (date_from_str, date_to_str))
-            
-            session_result = cursor.fetchone()
-            total_sessions, official, non_official = session_result
+            '''
             
             # 2. Piloti unici separatamente
-            cursor.execute('''
+            drivers_query = '''
                 SELECT 
                     COUNT(DISTINCT sr.driver_id) as unique_drivers
                 FROM sessions s
                 JOIN session_results sr ON s.session_id = sr.session_id
                 WHERE DATE(s.session_date) >= ? AND DATE(s.session_date) < ?
-            ''', (date_from_str, date_to_str))
-            
-            driver_result = cursor.fetchone()
-            unique_drivers = driver_result[0] if driver_result else 0
+            '''
             
             # Circuito con più sessioni (rimane invariato)
-            cursor.execute('''
+            track_query = '''
                 SELECT 
                     track_name,
                     COUNT(*) as session_count
@@ -1983,14 +2633,10 @@ class ACCWebDashboard:
                 GROUP BY track_name
                 ORDER BY session_count DESC
                 LIMIT 1
-            ''', (date_from_str, date_to_str))
-            
-            track_result = cursor.fetchone()
-            most_used_track = track_result[0] if track_result else "N/A"
-            most_used_count = track_result[1] if track_result else 0
+            '''
             
             # Ultima sessione (rimane invariato)
-            cursor.execute('''
+            last_query = '''
                 SELECT 
                     track_name,
                     session_date,
@@ -1999,11 +2645,25 @@ class ACCWebDashboard:
                 WHERE DATE(s.session_date) >= ? AND DATE(s.session_date) < ?
                 ORDER BY s.session_date DESC
                 LIMIT 1
-            ''', (date_from_str, date_to_str))
-            
-            last_result = cursor.fetchone()
-            
-            conn.close()
+            '''
+
+            # Query indipendenti: eseguite in parallelo, una per worker
+            queries = {'sessions': sessions_query, 'drivers': drivers_query, 'track': track_query, 'last': last_query}
+            rows = self.run_parallel({
+                name: (lambda conn, query=query: conn.execute(query, (date_from_str, date_to_str)).fetchone())
+                for name, query in queries.items()
+            }, history=True)
+
+            total_sessions, official, non_official = rows['sessions']
+
+            driver_result = rows['drivers']
+            unique_drivers = driver_result[0] if driver_result else 0
+
+            track_result = rows['track']
+            most_used_track = track_result[0] if track_result else "N/A"
+            most_used_count = track_result[1] if track_result else 0
+
+            last_result = rows['last']
             
             return {
                 'total_sessions': total_sessions or 0,
@@ -2021,7 +2681,9 @@ class ACCWebDashboard:
             st.error(f"❌ Error retrieving sessions statistics: {e}")
             return {}
     
-    def get_sessions_list_with_details(self, date_from: date, date_to: date) -> pd.DataFrame:
+    @frame_cached('sessions')
+    def get_sessions_list_with_details(self, date_from: date, date_to: date,
+                                       conn: Optional[sqlite3.Connection] = None) -> pd.DataFrame:
         """Ottiene lista sessioni con dettagli per il periodo specificato"""
         date_from_str = date_from.strftime('%Y-%m-%d')
         date_to_str = (date_to + timedelta(days=1)).strftime('%Y-%m-%d')
@@ -2063,12 +2725,12 @@ class ACCWebDashboard:
             ORDER BY s.session_date DESC
         '''
         
-        return self.safe_sql_query(query, [date_from_str, date_to_str])
+        return self.safe_sql_query(query, [date_from_str, date_to_str], conn, history=True)
     
     def get_session_info(self, session_id: str) -> Optional[Tuple]:
         """Ottiene informazioni base della sessione"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connect(history=True)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -2094,13 +2756,16 @@ class ACCWebDashboard:
             st.error(f"❌ Error retrieving session info: {e}")
             return None
     
+    def get_default_sessions_period(self) -> Tuple[date, date]:
+        """Periodo di default della pagina Sessions: ultima settimana (timezone italiana)"""
+        today = datetime.now(ZoneInfo("Europe/Rome")).date()
+        return today - timedelta(days=7), today
+
     def show_sessions_report(self):
         """Mostra il report Sessions con filtri e statistiche"""
         st.header("📅 Sessions")
 
-        # Calcola date di default (ultima settimana) usando timezone italiana
-        today = datetime.now(ZoneInfo("Europe/Rome")).date()
-        week_ago = today - timedelta(days=7)
+        week_ago, today = self.get_default_sessions_period()
         
         # Filtri data in colonne
         col1, col2 = st.columns(2)
@@ -2124,16 +2789,20 @@ class ACCWebDashboard:
             st.error("❌ 'From Date' must be before or equal to 'To Date'")
             return
         
-        # Ottieni statistiche per il periodo selezionato
+        # Statistiche e lista sessioni del periodo, lette in parallelo
         st.markdown("---")
-        sessions_stats = self.get_sessions_statistics(date_from, date_to)
+        sessions_data = self.run_parallel({
+            'stats': lambda conn: self.get_sessions_statistics(date_from, date_to),
+            'list': lambda conn: self.get_sessions_list_with_details(date_from, date_to, conn),
+        }, history=True)
+        sessions_stats = sessions_data['stats']
 
         if not any(sessions_stats.values()):
             st.warning(f"⚠️ No sessions found in the selected period ({date_from} - {date_to})")
             return
         
-        # Ottieni lista sessioni per selezione
-        sessions_list = self.get_sessions_list_with_details(date_from, date_to)
+        # Lista sessioni per selezione
+        sessions_list = sessions_data['list']
         
         if sessions_list.empty:
             st.warning("⚠️ No sessions found for the selected period")
@@ -2383,6 +3052,10 @@ class ACCWebDashboard:
             # Grafici se ci sono abbastanza dati
             if len(session_results_df) > 3:
                 self.show_session_charts(session_results_df, session_type)
+
+            # Andamento giro per giro (solo gare)
+            if session_type and session_type.startswith('R'):
+                self.show_race_trace(session_id)
                 
         else:
             st.warning(f"⚠️ No results found for this session")
@@ -2528,6 +3201,74 @@ class ACCWebDashboard:
             st.plotly_chart(fig_hist, width='stretch')
     
 
+    @frame_cached('race_trace')
+    def get_race_trace(self, session_id: str) -> pd.DataFrame:
+        """Ottiene posizione e distacco dal leader giro per giro per una gara"""
+        try:
+            # Le sessioni delle leghe archiviate si aprono anche dalla pagina Sessions
+            return load_race_trace(self.db_path, session_id, get_data_version(self.db_path),
+                                   self.get_attached_archive(history=True))
+        except Exception as e:
+            st.error(f"❌ Error building race trace: {e}")
+            return pd.DataFrame()
+
+    def show_race_trace(self, session_id: str):
+        """Mostra grafico posizioni e race trace ricostruiti dalla tabella laps"""
+        trace_df = self.get_race_trace(session_id)
+
+        if trace_df.empty or trace_df['lap'].max() < 2:
+            return
+
+        st.markdown("---")
+        st.subheader("🏎️ Lap by Lap")
+
+        # Ordine legenda = ordine all'ultimo giro completato da ciascun pilota
+        final_order = (
+            trace_df.sort_values('lap')
+            .groupby('driver', sort=False).last()
+            .sort_values(['lap', 'position'], ascending=[False, True])
+            .index.tolist()
+        )
+
+        trace_df = trace_df.copy()
+        trace_df['lap_time_formatted'] = trace_df['lap_time'].apply(self.format_lap_time)
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            fig_pos = px.line(
+                trace_df,
+                x='lap',
+                y='position',
+                color='driver',
+                category_orders={'driver': final_order},
+                markers=True,
+                title="Position Chart",
+                hover_data={'lap_time_formatted': True, 'driver': True}
+            )
+            fig_pos.update_yaxes(autorange="reversed", dtick=1, title="Position")
+            fig_pos.update_xaxes(dtick=1, title="Lap")
+            fig_pos.update_layout(height=500, template='plotly_dark', legend_title_text='')
+            st.plotly_chart(fig_pos, width='stretch')
+
+        with col2:
+            fig_gap = px.line(
+                trace_df,
+                x='lap',
+                y='gap_to_leader',
+                color='driver',
+                category_orders={'driver': final_order},
+                title="Race Trace - Gap to Leader",
+                hover_data={'lap_time_formatted': True, 'position': True}
+            )
+            fig_gap.update_yaxes(autorange="reversed", title="Gap to Leader (seconds)")
+            fig_gap.update_xaxes(dtick=1, title="Lap")
+            fig_gap.update_layout(height=500, template='plotly_dark', legend_title_text='')
+            st.plotly_chart(fig_gap, width='stretch')
+
+        st.caption("Positions and gaps are rebuilt from the cumulative lap times of each driver")
+
+
     # ==================== BEST LAPS ====================
 
     def format_time_duration(self, milliseconds: int) -> str:
@@ -2542,9 +3283,9 @@ class ACCWebDashboard:
             return f"{seconds:.3f}"
     
     def get_tracks_list(self) -> List[str]:
-        """Ottiene lista piste disponibili nel database"""
+        """Ottiene lista piste disponibili nel database (anche delle leghe archiviate)"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connect(history=True)
             cursor = conn.cursor()
             
             cursor.execute('SELECT DISTINCT track_name FROM sessions ORDER BY track_name')
@@ -2557,140 +3298,202 @@ class ACCWebDashboard:
             st.error(f"❌ Errore nel recupero piste: {e}")
             return []
     
+    @frame_cached('tracks')
     def get_all_tracks_summary(self, include_friends: bool = False) -> pd.DataFrame:
         """Ottiene riepilogo record per tutte le piste (solo competizioni ufficiali e piloti TFL)"""
 
         trust_filter = "d.trust_level >= 1" if include_friends else "d.trust_level > 1"
 
+        # Record delle leghe archiviate: migliori giri precalcolati da acc_archive.py
+        archived_records = ""
+        archived_laps = ""
+        if self.has_table('archive_track_bests'):
+            archived_records = f"""
+                UNION ALL
+                SELECT a.track_name, MIN(a.best_lap) as best_lap
+                FROM archive_track_bests a
+                JOIN drivers d ON a.driver_id = d.driver_id
+                WHERE {trust_filter}
+                GROUP BY a.track_name
+            """
+            archived_laps = f"""
+                UNION ALL
+                SELECT
+                    tr.track_name, tr.best_lap, d.last_name, a.session_date, a.session_type, a.is_time_attack,
+                    a.competition_id, a.competition_name, a.championship_name, a.lap_id
+                FROM track_records tr
+                JOIN archive_track_bests a ON a.track_name = tr.track_name AND a.best_lap = tr.best_lap
+                JOIN drivers d ON a.driver_id = d.driver_id
+                WHERE {trust_filter}
+            """
+
         query = f'''
             WITH track_records AS (
+                SELECT track_name, MIN(best_lap) as best_lap
+                FROM (
+                    SELECT
+                        s.track_name,
+                        MIN(l.lap_time) as best_lap
+                    FROM laps l
+                    JOIN sessions s ON l.session_id = s.session_id
+                    JOIN drivers d ON l.driver_id = d.driver_id
+                    WHERE l.is_valid_for_best = 1
+                      AND l.lap_time > 0
+                      AND s.competition_id IS NOT NULL
+                      AND {trust_filter}
+                    GROUP BY s.track_name
+                    {archived_records}
+                )
+                GROUP BY track_name
+            ),
+            record_candidates AS (
                 SELECT
-                    s.track_name,
-                    MIN(l.lap_time) as best_lap
-                FROM laps l
-                JOIN sessions s ON l.session_id = s.session_id
+                    tr.track_name,
+                    tr.best_lap,
+                    d.last_name as driver_name,
+                    s.session_date,
+                    s.session_type,
+                    s.is_time_attack,
+                    s.competition_id,
+                    c.name as competition_name,
+                    ch.name as championship_name,
+                    l.id as lap_id
+                FROM track_records tr
+                JOIN laps l ON tr.best_lap = l.lap_time
+                JOIN sessions s ON l.session_id = s.session_id AND s.track_name = tr.track_name
                 JOIN drivers d ON l.driver_id = d.driver_id
+                LEFT JOIN competitions c ON s.competition_id = c.competition_id
+                LEFT JOIN championships ch ON c.championship_id = ch.championship_id
                 WHERE l.is_valid_for_best = 1
-                  AND l.lap_time > 0
                   AND s.competition_id IS NOT NULL
                   AND {trust_filter}
-                GROUP BY s.track_name
+                {archived_laps}
+            ),
+            record_laps AS (
+                -- A parità di tempo vale il primo che ha stabilito il record
+                SELECT
+                    *,
+                    ROW_NUMBER() OVER (PARTITION BY track_name ORDER BY session_date, lap_id) as record_rank
+                FROM record_candidates
             )
             SELECT
-                tr.track_name,
-                tr.best_lap,
-                d.last_name as driver_name,
-                s.session_date,
-                s.session_type,
-                s.is_time_attack,
-                s.competition_id,
-                c.name as competition_name,
-                ch.name as championship_name
-            FROM track_records tr
-            JOIN laps l ON tr.best_lap = l.lap_time
-            JOIN sessions s ON l.session_id = s.session_id AND s.track_name = tr.track_name
-            JOIN drivers d ON l.driver_id = d.driver_id
-            LEFT JOIN competitions c ON s.competition_id = c.competition_id
-            LEFT JOIN championships ch ON c.championship_id = ch.championship_id
-            WHERE l.is_valid_for_best = 1
-              AND s.competition_id IS NOT NULL
-              AND {trust_filter}
-            GROUP BY tr.track_name
-            ORDER BY tr.best_lap ASC
+                track_name,
+                best_lap,
+                driver_name,
+                session_date,
+                session_type,
+                is_time_attack,
+                competition_id,
+                competition_name,
+                championship_name
+            FROM record_laps
+            WHERE record_rank = 1
+            ORDER BY best_lap ASC
         '''
 
-        return self.safe_sql_query(query)
+        return self.analytics_query(query)
     
-    def get_track_statistics(self, track_name: str) -> Dict:
+    @frame_cached('tracks')
+    def get_track_statistics(self, track_name: str, conn: Optional[sqlite3.Connection] = None) -> Dict:
         """Ottiene statistiche generali per la pista (solo competizioni ufficiali e piloti TFL)"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+        empty_stats = {
+            'total_sessions': 0,
+            'unique_drivers': 0,
+            'total_laps': 0,
+            'best_time': None,
+            'avg_time': None,
+            'record_holder': 'N/A',
+            'record_date': None,
+            'last_session_date': None,
+            'official_sessions': 0
+        }
 
-            # Statistiche generali
-            query = '''
-                SELECT
-                    COUNT(DISTINCT s.session_id) as total_sessions,
-                    COUNT(DISTINCT l.driver_id) as unique_drivers,
-                    COUNT(l.id) as total_laps,
-                    MIN(l.lap_time) as best_time,
-                    AVG(CAST(l.lap_time AS REAL)) as avg_time,
-                    MAX(s.session_date) as last_session_date,
-                    COUNT(DISTINCT CASE WHEN s.competition_id IS NOT NULL THEN s.session_id END) as official_sessions
-                FROM sessions s
-                LEFT JOIN laps l ON s.session_id = l.session_id
-                LEFT JOIN drivers d ON l.driver_id = d.driver_id
-                WHERE s.track_name = ?
-                  AND l.is_valid_for_best = 1
-                  AND l.lap_time > 0
-                  AND s.competition_id IS NOT NULL
-                  AND d.trust_level > 1
-            '''
+        # Statistiche generali
+        query = '''
+            SELECT
+                COUNT(DISTINCT s.session_id) as total_sessions,
+                COUNT(DISTINCT l.driver_id) as unique_drivers,
+                COUNT(l.id) as total_laps,
+                MIN(l.lap_time) as best_time,
+                AVG(CAST(l.lap_time AS REAL)) as avg_time,
+                MAX(s.session_date) as last_session_date,
+                COUNT(DISTINCT CASE WHEN s.competition_id IS NOT NULL THEN s.session_id END) as official_sessions
+            FROM sessions s
+            LEFT JOIN laps l ON s.session_id = l.session_id
+            LEFT JOIN drivers d ON l.driver_id = d.driver_id
+            WHERE s.track_name = ?
+              AND l.is_valid_for_best = 1
+              AND l.lap_time > 0
+              AND s.competition_id IS NOT NULL
+              AND d.trust_level > 1
+        '''
 
-            cursor.execute(query, (track_name,))
-            result = cursor.fetchone()
+        stats_df = self.analytics_query(query, [track_name], conn, history=True)
+        if stats_df.empty:
+            return empty_stats
 
-            if result:
-                sessions, drivers, laps, best, avg, last_session, official_sessions = result
+        row = stats_df.iloc[0]
+        best = int(row['best_time']) if pd.notna(row['best_time']) else None
 
-                # Chi detiene il record e quando
-                record_query = '''
-                    SELECT d.last_name, s.session_date
-                    FROM laps l
-                    JOIN drivers d ON l.driver_id = d.driver_id
-                    JOIN sessions s ON l.session_id = s.session_id
-                    WHERE s.track_name = ?
-                      AND l.lap_time = ?
-                      AND l.is_valid_for_best = 1
-                      AND s.competition_id IS NOT NULL
-                      AND d.trust_level > 1
-                    LIMIT 1
-                '''
-
-                cursor.execute(record_query, (track_name, best))
-                record_result = cursor.fetchone()
-                if record_result:
-                    record_holder = record_result[0]
-                    record_date = record_result[1]
-                else:
-                    record_holder = "N/A"
-                    record_date = None
-                
-                stats = {
-                    'total_sessions': sessions or 0,
-                    'unique_drivers': drivers or 0,
-                    'total_laps': laps or 0,
-                    'best_time': best,
-                    'avg_time': int(avg) if avg else None,
-                    'record_holder': record_holder,
-                    'record_date': record_date,
-                    'last_session_date': last_session,
-                    'official_sessions': official_sessions or 0
-                }
-            else:
-                stats = {
-                    'total_sessions': 0,
-                    'unique_drivers': 0,
-                    'total_laps': 0,
-                    'best_time': None,
-                    'avg_time': None,
-                    'record_holder': 'N/A',
-                    'record_date': None,
-                    'last_session_date': None,
-                    'official_sessions': 0
-                }
-            
-            conn.close()
-            return stats
-            
-        except Exception as e:
-            st.error(f"❌ Errore nel recupero statistiche pista: {e}")
-            return {}
+        # Chi detiene il record e quando (il primo a stabilirlo)
+        record_query = '''
+            SELECT d.last_name, s.session_date
+            FROM laps l
+            JOIN drivers d ON l.driver_id = d.driver_id
+            JOIN sessions s ON l.session_id = s.session_id
+            WHERE s.track_name = ?
+              AND l.lap_time = ?
+              AND l.is_valid_for_best = 1
+              AND s.competition_id IS NOT NULL
+              AND d.trust_level > 1
+            ORDER BY s.session_date, l.id
+            LIMIT 1
+        '''
+
+        record_df = self.analytics_query(record_query, [track_name, best], conn, history=True) if best is not None else pd.DataFrame()
+        if not record_df.empty:
+            record_holder = record_df.iloc[0]['last_name']
+            record_date = record_df.iloc[0]['session_date']
+        else:
+            record_holder = "N/A"
+            record_date = None
+
+        return {
+            'total_sessions': int(row['total_sessions'] or 0),
+            'unique_drivers': int(row['unique_drivers'] or 0),
+            'total_laps': int(row['total_laps'] or 0),
+            'best_time': best,
+            'avg_time': int(row['avg_time']) if pd.notna(row['avg_time']) else None,
+            'record_holder': record_holder,
+            'record_date': record_date,
+            'last_session_date': row['last_session_date'] if pd.notna(row['last_session_date']) else None,
+            'official_sessions': int(row['official_sessions'] or 0)
+        }
     
-    def get_track_leaderboard(self, track_name: str, include_friends: bool = False) -> pd.DataFrame:
-        """Ottiene classifica best laps per pista (solo competizioni ufficiali e piloti TFL)"""
+    def get_lap_percentiles(self) -> Optional[LapPercentileTable]:
+        """Ottiene la tabella percentili dei giri validi, allineata al database"""
+        table, lock = get_lap_percentile_store(self.db_path, get_file_identity(self.db_path))
+        try:
+            with lock:
+                conn = self.connect()
+                table.refresh(conn)
+                conn.close()
+            return table
+        except Exception as e:
+            st.error(f"❌ Errore nel calcolo percentili: {e}")
+            return None
 
-        trust_filter = "d.trust_level >= 1" if include_friends else "d.trust_level > 1"
+    @frame_cached('tracks')
+    def get_track_leaderboard(self, track_name: str, include_friends: bool = False,
+                              conn: Optional[sqlite3.Connection] = None) -> pd.DataFrame:
+        """Ottiene classifica best laps per pista (solo competizioni ufficiali e piloti TFL).
+        I piloti ammessi sono una lista di id (o la JOIN su drivers se sono molti, vedi driver_filter)
+        e nomi di piloti, competizioni e campionati arrivano dall'indice delle dimensioni"""
+        columns = ['driver_name', 'short_name', 'best_lap', 'session_date', 'session_type', 'is_time_attack',
+                   'competition_id', 'competition_name', 'championship_name']
+
+        dims = self.get_dimensions(history=True)
+        driver_join, driver_filter, driver_params = dims.driver_filter('l.driver_id', 1 if include_friends else 2)
 
         query = f'''
             WITH driver_best_laps AS (
@@ -2699,40 +3502,40 @@ class ACCWebDashboard:
                     MIN(l.lap_time) as best_lap
                 FROM laps l
                 JOIN sessions s ON l.session_id = s.session_id
-                JOIN drivers d ON l.driver_id = d.driver_id
+                {driver_join}
                 WHERE s.track_name = ?
                   AND l.is_valid_for_best = 1
                   AND l.lap_time > 0
                   AND s.competition_id IS NOT NULL
-                  AND {trust_filter}
+                  AND {driver_filter}
                 GROUP BY l.driver_id
             )
             SELECT
-                d.last_name as driver_name,
-                d.short_name,
+                dbl.driver_id,
                 dbl.best_lap,
                 s.session_date,
                 s.session_type,
                 s.is_time_attack,
-                s.competition_id,
-                c.name as competition_name,
-                ch.name as championship_name
+                s.competition_id
             FROM driver_best_laps dbl
             JOIN laps l ON l.driver_id = dbl.driver_id AND l.lap_time = dbl.best_lap
             JOIN sessions s ON l.session_id = s.session_id
-            JOIN drivers d ON dbl.driver_id = d.driver_id
-            LEFT JOIN competitions c ON s.competition_id = c.competition_id
-            LEFT JOIN championships ch ON c.championship_id = ch.championship_id
             WHERE s.track_name = ?
               AND l.is_valid_for_best = 1
               AND s.competition_id IS NOT NULL
-              AND {trust_filter}
             GROUP BY dbl.driver_id
             ORDER BY dbl.best_lap ASC
             LIMIT 50
         '''
 
-        return self.safe_sql_query(query, [track_name, track_name])
+        df = self.safe_sql_query(query, [track_name, *driver_params, track_name], conn, history=True)
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+
+        df = dims.attach(df, 'driver_id', 'drivers', {'driver_name': 'last_name', 'short_name': 'short_name'})
+        df = dims.attach(df, 'competition_id', 'competitions', {'competition_name': 'name', 'championship_id': 'championship_id'})
+        df = dims.attach(df, 'championship_id', 'championships', {'championship_name': 'name'})
+        return df[columns]
     
     def show_best_laps_report(self):
         """Mostra il report Best Laps per pista"""
@@ -2770,7 +3573,7 @@ class ACCWebDashboard:
             st.markdown(f"""
             <div style="background: #f8f9fa; padding: 1rem; border-radius: 8px; border-left: 3px solid #6c757d; margin: 1rem 0;">
                 <p style="color: #495057; margin: 0 0 0.5rem 0; font-size: 0.95rem; font-weight: 500;">
-                    ℹ️ Only registered drivers shown - Join the TFL by registering on SimGrid or joining our Discord server
+                    ℹ️ Registered drivers listed by default, search to find any driver - Join the TFL by registering on SimGrid or joining our Discord server
                 </p>
                 <div style="text-align: center; margin-top: 0.8rem;">
                     {''.join(social_links)}
@@ -2916,8 +3719,12 @@ class ACCWebDashboard:
         </div>
         """, unsafe_allow_html=True)
 
-        # Ottieni statistiche generali
-        track_stats = self.get_track_statistics(track_name)
+        # Statistiche generali e classifica sono indipendenti: lette in parallelo
+        track_data = self.run_parallel({
+            'stats': lambda conn: self.get_track_statistics(track_name, conn),
+            'leaderboard': lambda conn: self.get_track_leaderboard(track_name, include_friends, conn),
+        }, history=True)
+        track_stats = track_data['stats']
 
         if not any(track_stats.values()):
             st.warning("⚠️ No data available for this track")
@@ -2927,7 +3734,7 @@ class ACCWebDashboard:
         st.markdown("---")
         st.subheader("🏆 Best Laps Leaderboard by Driver")
 
-        leaderboard_df = self.get_track_leaderboard(track_name, include_friends)
+        leaderboard_df = track_data['leaderboard']
 
         if not leaderboard_df.empty:
             # Prepara display leaderboard
@@ -2953,6 +3760,13 @@ class ACCWebDashboard:
             else:
                 leaderboard_display['Gap'] = "-"
 
+            # Piazzamento del best lap tra tutti i giri validi della pista (ricerca binaria)
+            percentile_table = self.get_lap_percentiles()
+            leaderboard_display['Top %'] = leaderboard_display['best_lap'].apply(
+                lambda x: self.format_top_percent(percentile_table.top_percent(track_name, int(x)))
+                if percentile_table is not None and pd.notna(x) else "-"
+            )
+
             # Formatta data
             leaderboard_display['Record Date'] = leaderboard_display['session_date'].apply(
                 lambda x: self.format_session_date(x) if pd.notna(x) else "N/A"
@@ -2979,12 +3793,13 @@ class ACCWebDashboard:
             )
 
             # Seleziona colonne finali (Type prima di Session)
-            columns_to_show = ['Pos', 'driver_name', 'Best Time', 'Gap', 'Type', 'Session', 'Record Date', 'Competition']
+            columns_to_show = ['Pos', 'driver_name', 'Best Time', 'Gap', 'Top %', 'Type', 'Session', 'Record Date', 'Competition']
             column_names = {
                 'Pos': 'Pos',
                 'driver_name': 'Driver',
                 'Best Time': 'Best Time',
                 'Gap': 'Gap',
+                'Top %': 'Top %',
                 'Type': 'Type',
                 'Session': 'Session',
                 'Record Date': 'Date',
@@ -3004,6 +3819,7 @@ class ACCWebDashboard:
                     'Pos':        st.column_config.TextColumn('Pos',      width='small'),
                     'Best Time':  st.column_config.TextColumn('Best Time',width='small'),
                     'Gap':        st.column_config.TextColumn('Gap',      width='small'),
+                    'Top %':      st.column_config.TextColumn('Top %',    width='small'),
                     'Type':       st.column_config.TextColumn('Type',     width='medium'),
                     'Session':    st.column_config.TextColumn('Session',  width='small'),
                     'Date':       st.column_config.TextColumn('Date',     width='small'),
@@ -3056,7 +3872,43 @@ class ACCWebDashboard:
         - 🎮 **Total Sessions:** {track_stats['total_sessions']}
         - 🏆 **Total Official Sessions:** {official_sessions}
         - 📅 **Last Session Date:** {last_text}
-        """)    
+        """)
+
+        # Distribuzione tempi (percentili su tutti i giri validi)
+        self.show_track_percentiles(track_name)
+
+    def format_top_percent(self, top_percent: Optional[float]) -> str:
+        """Formatta il piazzamento percentuale di un tempo (Top X%)"""
+        if top_percent is None:
+            return "-"
+        if top_percent < 1:
+            return f"Top {top_percent:.2f}%"
+        return f"Top {top_percent:.0f}%"
+
+    def show_track_percentiles(self, track_name: str):
+        """Mostra la tabella percentili dei giri validi per condizione e categoria pilota"""
+        percentile_table = self.get_lap_percentiles()
+        if percentile_table is None:
+            return
+
+        percentiles_df = percentile_table.percentiles(track_name)
+        if percentiles_df.empty:
+            return
+
+        st.markdown("---")
+        st.subheader("⏱️ Lap Time Percentiles")
+
+        trust_labels = {2: "👤 Registered", 1: "🤝 Friends", 0: "👻 Guests"}
+        display_df = pd.DataFrame({
+            'Conditions': percentiles_df['is_wet'].apply(lambda x: "🌧️ Wet" if x == 1 else "☀️ Dry"),
+            'Drivers': percentiles_df['trust_level'].map(trust_labels).fillna("N/A"),
+            'Laps': percentiles_df['laps'],
+        })
+        for p in LapPercentileTable.PERCENTILES:
+            display_df[f'p{p}'] = percentiles_df[f'p{p}'].apply(self.format_lap_time)
+
+        st.dataframe(display_df, width='stretch', hide_index=True)
+        st.caption("All valid laps at this track (official and unofficial sessions) - p50 is the median lap")
 
 
     # ==================== DRIVERS ====================
@@ -3095,7 +3947,7 @@ class ACCWebDashboard:
     def get_drivers_list(self) -> List[Dict]:
         """Ottiene lista piloti disponibili nel database ordinata alfabeticamente"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connect()
             cursor = conn.cursor()
             
             query = '''
@@ -3120,92 +3972,132 @@ class ACCWebDashboard:
             st.error(f"❌ Errore nel recupero piloti: {e}")
             return []
     
+    def get_driver_search(self) -> Optional[DriverSearchIndex]:
+        """Ottiene l'indice di ricerca piloti per la versione dati corrente"""
+        try:
+            return get_driver_search_index(self.db_path, get_data_version(self.db_path))
+        except Exception as e:
+            st.error(f"❌ Errore nel caricamento indice piloti: {e}")
+            return None
+
+    def format_driver_option(self, driver: Dict) -> str:
+        """Etichetta risultato ricerca: nome, numero di gara e categoria pilota"""
+        trust_labels = {2: "👤", 1: "🤝", 0: "👻"}
+        label = f"{trust_labels.get(driver.get('trust_level'), '👻')} {driver['last_name']}"
+        if pd.notna(driver.get('preferred_race_number')):
+            label += f" #{int(driver['preferred_race_number'])}"
+        if driver.get('short_name') and pd.notna(driver['short_name']):
+            label += f" ({driver['short_name']})"
+        return label
+
+    @frame_cached('hall_of_fame')
     def get_hall_of_fame(self) -> dict:
         """Ottiene i top driver per categoria per la Hall of Fame"""
+        has_archive = self.has_table('archive_driver_honours')
+
+        def ranking_query(driver_counts: str, archive_column: str) -> str:
+            """Top 5 piloti TFL; con leghe archiviate somma i conteggi precalcolati da acc_archive.py"""
+            if has_archive:
+                driver_counts += f"""
+                    UNION ALL
+                    SELECT driver_id, {archive_column} FROM archive_driver_honours WHERE {archive_column} > 0
+                """
+            return f'''
+                SELECT d.last_name as driver, SUM(x.count) as count
+                FROM ({driver_counts}) x
+                JOIN drivers d ON x.driver_id = d.driver_id
+                WHERE d.trust_level = 2
+                GROUP BY x.driver_id, d.last_name
+                ORDER BY count DESC, d.last_name
+                LIMIT 5
+            '''
 
         # 1. Più titoli vinti
-        titles_query = '''
-            SELECT d.last_name as driver, COUNT(*) as count
+        titles_query = ranking_query('''
+            SELECT cs.driver_id, COUNT(*) as count
             FROM championship_standings cs
             JOIN championships ch ON cs.championship_id = ch.championship_id
-            JOIN drivers d ON cs.driver_id = d.driver_id
-            WHERE cs.position = 1 AND ch.is_completed = 1 AND d.trust_level = 2
+            WHERE cs.position = 1 AND ch.is_completed = 1
             GROUP BY cs.driver_id
-            ORDER BY count DESC
-            LIMIT 5
-        '''
+        ''', 'titles')
 
-        # 2. Più record pista detenuti
-        records_query = '''
+        # 2. Più record pista detenuti (migliori giri archiviati inclusi)
+        track_bests = '''
+            SELECT s.track_name, l.driver_id, l.lap_time
+            FROM laps l
+            JOIN sessions s ON l.session_id = s.session_id
+            JOIN drivers d ON l.driver_id = d.driver_id
+            WHERE l.is_valid_for_best = 1 AND l.lap_time > 0 AND d.trust_level = 2
+        '''
+        if self.has_table('archive_track_bests'):
+            track_bests += '''
+                UNION ALL
+                SELECT a.track_name, a.driver_id, a.best_lap
+                FROM archive_track_bests a
+                JOIN drivers d ON a.driver_id = d.driver_id
+                WHERE d.trust_level = 2
+            '''
+        records_query = f'''
+            WITH track_bests AS ({track_bests})
             SELECT d.last_name as driver, COUNT(*) as count
             FROM (
-                SELECT s.track_name, MIN(l.lap_time) as record_time
-                FROM laps l
-                JOIN sessions s ON l.session_id = s.session_id
-                JOIN drivers d ON l.driver_id = d.driver_id
-                WHERE l.is_valid_for_best = 1 AND l.lap_time > 0 AND d.trust_level = 2
-                GROUP BY s.track_name
+                SELECT track_name, MIN(lap_time) as record_time
+                FROM track_bests
+                GROUP BY track_name
             ) tr
-            JOIN laps l ON l.lap_time = tr.record_time
-            JOIN sessions s ON l.session_id = s.session_id AND s.track_name = tr.track_name
-            JOIN drivers d ON l.driver_id = d.driver_id
-            WHERE d.trust_level = 2 AND l.is_valid_for_best = 1
-            GROUP BY l.driver_id
-            ORDER BY count DESC
+            JOIN track_bests tb ON tb.track_name = tr.track_name AND tb.lap_time = tr.record_time
+            JOIN drivers d ON tb.driver_id = d.driver_id
+            GROUP BY tb.driver_id, d.last_name
+            ORDER BY count DESC, d.last_name
             LIMIT 5
         '''
 
         # 3. Più competizioni ufficiali vinte
-        comp_wins_query = '''
-            SELECT d.last_name as driver, COUNT(*) as count
+        comp_wins_query = ranking_query('''
+            SELECT cst.driver_id, COUNT(*) as count
             FROM competition_standings cst
             JOIN competitions comp ON cst.competition_id = comp.competition_id
             JOIN championships ch ON comp.championship_id = ch.championship_id
-            JOIN drivers d ON cst.driver_id = d.driver_id
             WHERE comp.is_completed = 1
               AND ch.total_rounds > 0
               AND ch.is_completed != -1
-              AND d.trust_level = 2
               AND cst.total_points = (
                   SELECT MAX(cst2.total_points)
                   FROM competition_standings cst2
                   WHERE cst2.competition_id = cst.competition_id
               )
             GROUP BY cst.driver_id
-            ORDER BY count DESC
-            LIMIT 5
-        '''
+        ''', 'competition_wins')
 
         # 4. Più vittorie in gara (sessioni R ufficiali concluse)
-        race_wins_query = '''
-            SELECT d.last_name as driver, COUNT(*) as count
+        race_wins_query = ranking_query('''
+            SELECT sr.driver_id, COUNT(*) as count
             FROM session_results sr
             JOIN sessions s ON sr.session_id = s.session_id
             JOIN competitions comp ON s.competition_id = comp.competition_id
-            JOIN drivers d ON sr.driver_id = d.driver_id
             WHERE sr.position = 1
               AND s.session_type = 'R'
               AND comp.is_completed = 1
               AND (s.is_time_attack IS NULL OR s.is_time_attack = 0)
-              AND d.trust_level = 2
             GROUP BY sr.driver_id
-            ORDER BY count DESC
-            LIMIT 5
-        '''
-
-        return {
-            'titles':    self.safe_sql_query(titles_query),
-            'records':   self.safe_sql_query(records_query),
-            'comp_wins': self.safe_sql_query(comp_wins_query),
-            'race_wins': self.safe_sql_query(race_wins_query),
+        ''', 'race_wins')
+
+        # Classifiche indipendenti: una per worker, la latenza è quella della più lenta
+        queries = {
+            'titles':    titles_query,
+            'records':   records_query,
+            'comp_wins': comp_wins_query,
+            'race_wins': race_wins_query,
         }
+        return self.run_parallel({
+            name: (lambda conn, query=query: self.analytics_query(query, conn=conn))
+            for name, query in queries.items()
+        })
     
+    @frame_cached('drivers')
     def get_driver_statistics(self, driver_id: int) -> Dict:
         """Ottiene statistiche complete per un pilota"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Query per statistiche base
             stats_query = '''
                 SELECT
@@ -3220,17 +4112,6 @@ class ACCWebDashboard:
                 WHERE l.driver_id = ?
             '''
 
-            cursor.execute(stats_query, [driver_id])
-            row = cursor.fetchone()
-
-            stats = {
-                'total_sessions': row[0] if row[0] else 0,
-                'official_sessions': row[1] if row[1] else 0,
-                'num_tracks': row[2] if row[2] else 0,
-                'trust_level': row[3] if row[3] is not None else 'N/A',
-                'total_valid_laps': row[4] if row[4] else 0,
-            }
-            
             # Query per titoli vinti da championship_standings (solo campionati completati)
             results_query = '''
                 SELECT
@@ -3240,10 +4121,6 @@ class ACCWebDashboard:
                 WHERE cs.driver_id = ?
             '''
 
-            cursor.execute(results_query, [driver_id])
-            row = cursor.fetchone()
-            stats['championships'] = row[0] if row and row[0] else 0
-
             # Query per competizioni vinte (primo posto in competition_standings per total_points)
             comp_wins_query = '''
                 SELECT
@@ -3261,11 +4138,6 @@ class ACCWebDashboard:
                   )
             '''
 
-            cursor.execute(comp_wins_query, [driver_id])
-            comp_row = cursor.fetchone()
-            stats['official_comp_wins'] = comp_row[0] if comp_row and comp_row[0] else 0
-            stats['fun_comp_wins']      = comp_row[1] if comp_row and comp_row[1] else 0
-
             # Query per wins/poles/podiums/fastest laps da sessioni ufficiali concluse
             session_stats_query = '''
                 SELECT
@@ -3281,16 +4153,6 @@ class ACCWebDashboard:
                   AND (s.is_time_attack IS NULL OR s.is_time_attack = 0)
             '''
 
-            cursor.execute(session_stats_query, [driver_id])
-            sess_row = cursor.fetchone()
-            if sess_row:
-                stats['wins']         = sess_row[0] if sess_row[0] else 0
-                stats['poles']        = sess_row[1] if sess_row[1] else 0
-                stats['podiums']      = sess_row[2] if sess_row[2] else 0
-                stats['fastest_laps'] = sess_row[3] if sess_row[3] else 0
-            else:
-                stats['wins'] = stats['poles'] = stats['podiums'] = stats['fastest_laps'] = 0
-
             # Query per time attack vinti (best_lap_time minimo per competizione conclusa)
             ta_wins_query = '''
                 SELECT COUNT(*)
@@ -3304,29 +4166,72 @@ class ACCWebDashboard:
                   )
             '''
 
-            cursor.execute(ta_wins_query, [driver_id])
-            ta_row = cursor.fetchone()
-            stats['ta_wins'] = ta_row[0] if ta_row and ta_row[0] else 0
-            
             # Query per bad reports
             bad_reports_query = '''
                 SELECT bad_driver_reports FROM drivers WHERE driver_id = ?
             '''
-            cursor.execute(bad_reports_query, [driver_id])
-            bad_row = cursor.fetchone()
+
+            # Query indipendenti per nome
+            queries = {
+                'stats': stats_query,
+                'results': results_query,
+                'comp': comp_wins_query,
+                'sess': session_stats_query,
+                'ta': ta_wins_query,
+                'bad': bad_reports_query,
+            }
+            # Sei letture di una riga per pilota: in sequenza su una sola connessione,
+            # la consegna al pool costa più di quanto fa risparmiare
+            conn = self.connect(history=True)
+            try:
+                rows = {name: conn.execute(query, [driver_id]).fetchone() for name, query in queries.items()}
+            finally:
+                conn.close()
+
+            row = rows['stats']
+            stats = {
+                'total_sessions': row[0] if row[0] else 0,
+                'official_sessions': row[1] if row[1] else 0,
+                'num_tracks': row[2] if row[2] else 0,
+                'trust_level': row[3] if row[3] is not None else 'N/A',
+                'total_valid_laps': row[4] if row[4] else 0,
+            }
+
+            row = rows['results']
+            stats['championships'] = row[0] if row and row[0] else 0
+
+            comp_row = rows['comp']
+            stats['official_comp_wins'] = comp_row[0] if comp_row and comp_row[0] else 0
+            stats['fun_comp_wins']      = comp_row[1] if comp_row and comp_row[1] else 0
+
+            sess_row = rows['sess']
+            if sess_row:
+                stats['wins']         = sess_row[0] if sess_row[0] else 0
+                stats['poles']        = sess_row[1] if sess_row[1] else 0
+                stats['podiums']      = sess_row[2] if sess_row[2] else 0
+                stats['fastest_laps'] = sess_row[3] if sess_row[3] else 0
+            else:
+                stats['wins'] = stats['poles'] = stats['podiums'] = stats['fastest_laps'] = 0
+
+            ta_row = rows['ta']
+            stats['ta_wins'] = ta_row[0] if ta_row and ta_row[0] else 0
+
+            bad_row = rows['bad']
             stats['bad_reports'] = bad_row[0] if bad_row and bad_row[0] else 0
-            
-            conn.close()
+
             return stats
             
         except Exception as e:
             st.error(f"❌ Errore nel recupero statistiche pilota: {e}")
             return {}
     
+    @frame_cached('drivers')
     def get_driver_best_times(self, driver_id: int) -> pd.DataFrame:
-        """Ottiene tutti i migliori tempi del pilota per ogni pista"""
-        
-        query = '''
+        """Ottiene tutti i migliori tempi del pilota per ogni pista.
+        Il record di pista considera i soli piloti TFL (filtro dall'indice delle dimensioni, vedi driver_filter)"""
+        registered_join, registered_filter, registered_params = self.get_dimensions().driver_filter('l.driver_id', 2)
+
+        query = f'''
             WITH driver_track_bests AS (
                 SELECT 
                     s.track_name,
@@ -3343,30 +4248,45 @@ class ACCWebDashboard:
                     MIN(l.lap_time) as track_record
                 FROM laps l
                 JOIN sessions s ON l.session_id = s.session_id
-                JOIN drivers d ON l.driver_id = d.driver_id
+                {registered_join}
                 WHERE l.is_valid_for_best = 1 AND l.lap_time > 0
-                  AND d.trust_level = 2
+                  AND s.track_name IN (SELECT track_name FROM driver_track_bests)
+                  AND {registered_filter}
                 GROUP BY s.track_name
+            ),
+            best_lap_sessions AS (
+                -- Sessione del miglior giro (la prima se ripetuto)
+                SELECT
+                    dtb.track_name,
+                    dtb.best_lap,
+                    dtb.valid_laps,
+                    s.session_date,
+                    s.session_type,
+                    s.competition_id,
+                    s.is_time_attack,
+                    CASE WHEN dtb.best_lap = tr.track_record THEN 1 ELSE 0 END as is_record,
+                    ROW_NUMBER() OVER (PARTITION BY dtb.track_name ORDER BY s.session_date, l.id) as lap_rank
+                FROM driver_track_bests dtb
+                JOIN laps l ON dtb.best_lap = l.lap_time
+                JOIN sessions s ON l.session_id = s.session_id AND s.track_name = dtb.track_name
+                JOIN track_records tr ON dtb.track_name = tr.track_name
+                WHERE l.driver_id = ? AND l.is_valid_for_best = 1
             )
             SELECT
-                dtb.track_name,
-                dtb.best_lap,
-                dtb.valid_laps,
-                s.session_date,
-                s.session_type,
-                s.competition_id,
-                s.is_time_attack,
-                CASE WHEN dtb.best_lap = tr.track_record THEN 1 ELSE 0 END as is_record
-            FROM driver_track_bests dtb
-            JOIN laps l ON dtb.best_lap = l.lap_time
-            JOIN sessions s ON l.session_id = s.session_id AND s.track_name = dtb.track_name
-            JOIN track_records tr ON dtb.track_name = tr.track_name
-            WHERE l.driver_id = ? AND l.is_valid_for_best = 1
-            GROUP BY dtb.track_name
-            ORDER BY s.session_date DESC
+                track_name,
+                best_lap,
+                valid_laps,
+                session_date,
+                session_type,
+                competition_id,
+                is_time_attack,
+                is_record
+            FROM best_lap_sessions
+            WHERE lap_rank = 1
+            ORDER BY session_date DESC
         '''
 
-        return self.safe_sql_query(query, [driver_id, driver_id])
+        return self.analytics_query(query, [driver_id, *registered_params, driver_id], history=True)
 
     def get_driver_tracks_list(self, driver_id: int) -> List[str]:
         """Restituisce le piste su cui il pilota ha giri validi"""
@@ -3377,13 +4297,22 @@ class ACCWebDashboard:
             WHERE l.driver_id = ? AND l.is_valid_for_best = 1 AND l.lap_time > 0
             ORDER BY s.track_name
         '''
-        df = self.safe_sql_query(query, [driver_id])
+        df = self.safe_sql_query(query, [driver_id], history=True)
         if df.empty:
             return []
         return df['track_name'].tolist()
 
+    @frame_cached('drivers')
     def get_driver_lap_trend(self, driver_id: int, track_name: str) -> pd.DataFrame:
         """Restituisce il miglior tempo per competizione del pilota su una pista, con la data massima della competizione sull'asse X"""
+        # Storico completo dall'export Parquet se configurato (acc_export.py)
+        parquet_dir = self.config.get('analytics', {}).get('parquet_dir')
+        if has_export(parquet_dir):
+            try:
+                return load_driver_lap_trend(parquet_dir, driver_id, track_name)
+            except Exception as e:
+                st.warning(f"⚠️ Parquet export not readable, using database: {e}")
+
         query = '''
             SELECT
                 s.competition_id,
@@ -3400,25 +4329,42 @@ class ACCWebDashboard:
             GROUP BY s.competition_id
             ORDER BY MAX(DATE(s.session_date)) ASC
         '''
-        return self.safe_sql_query(query, [driver_id, track_name])
+        return self.safe_sql_query(query, [driver_id, track_name], history=True)
 
     def show_drivers_report(self):
         """Mostra il report Drivers con selezione generale o per pilota specifico"""
         st.header("👥 Drivers")
         
-        # Ottieni lista piloti
+        # Indice di ricerca su tutti i piloti (registrati, amici e ospiti)
+        search_index = self.get_driver_search()
         drivers = self.get_drivers_list()
-        
-        if not drivers:
+
+        if search_index is None or len(search_index) == 0:
             st.warning("❌ No drivers found in database")
             return
-        
-        # Selectbox pilota con riepilogo generale come prima opzione
-        driver_options = ["📊 General Summary"] + [f"{driver['last_name']}" for driver in drivers]
+
+        search_query = st.text_input(
+            "🔎 Search Driver:",
+            placeholder="Name, short name or race number",
+            key="driver_search"
+        )
+
+        # Senza ricerca: riepilogo generale e piloti registrati; con ricerca: risultati ordinati
+        if search_query.strip():
+            matches = search_index.search(search_query, limit=25)
+            driver_labels = {driver['driver_id']: self.format_driver_option(driver) for driver in matches}
+            if not driver_labels:
+                st.info(f"ℹ️ No drivers matching '{search_query}'")
+                return
+        else:
+            driver_labels = {"summary": "📊 General Summary"}
+            driver_labels.update({driver['driver_id']: driver['last_name'] for driver in drivers})
+
         selected_driver = st.selectbox(
             "👤 Select Driver:",
-            options=driver_options,
-            index=0,  # Riepilogo generale selezionato di default
+            options=list(driver_labels),
+            index=0,  # Riepilogo generale o miglior risultato
+            format_func=lambda driver_id: driver_labels[driver_id],
             key="driver_select"
         )
 
@@ -3438,7 +4384,7 @@ class ACCWebDashboard:
             st.markdown(f"""
             <div style="background: #f8f9fa; padding: 1rem; border-radius: 8px; border-left: 3px solid #6c757d; margin: 1rem 0;">
                 <p style="color: #495057; margin: 0 0 0.5rem 0; font-size: 0.95rem; font-weight: 500;">
-                    ℹ️ Only registered drivers shown - Join the TFL by registering on SimGrid or joining our Discord server
+                    ℹ️ Registered drivers listed by default, search to find any driver - Join the TFL by registering on SimGrid or joining our Discord server
                 </p>
                 <div style="text-align: center; margin-top: 0.8rem;">
                     {''.join(social_links)}
@@ -3446,14 +4392,14 @@ class ACCWebDashboard:
             </div>
             """, unsafe_allow_html=True)
 
-        if selected_driver == "📊 General Summary":
+        if selected_driver == "summary":
             st.markdown("---")
             st.subheader("👑 Hall of Fame")
             self.show_all_drivers_summary()
             
         else:
-            # Trova il pilota selezionato
-            selected_driver_data = next((d for d in drivers if d['last_name'] == selected_driver), None)
+            # Risolve il pilota selezionato per driver_id
+            selected_driver_data = search_index.get(selected_driver)
             if selected_driver_data:
                 # Mostra dettagli del pilota specifico
                 st.markdown("---")
@@ -3599,12 +4545,21 @@ class ACCWebDashboard:
         
         # Nome pista senza indicatore record (ora è nel tempo)
         display_df['Track'] = display_df['track_name']
+
+        # Piazzamento del best lap tra tutti i giri validi della pista
+        percentile_table = self.get_lap_percentiles()
+        display_df['Top %'] = display_df.apply(
+            lambda row: self.format_top_percent(percentile_table.top_percent(row['track_name'], int(row['best_lap'])))
+            if percentile_table is not None and pd.notna(row['best_lap']) else "-",
+            axis=1
+        )
         
         # Seleziona colonne finali
-        columns_to_show = ['Track', 'Best Time', 'valid_laps', 'Session', 'Date']
+        columns_to_show = ['Track', 'Best Time', 'Top %', 'valid_laps', 'Session', 'Date']
         column_names = {
             'Track': 'Track',
             'Best Time': 'Best Time',
+            'Top %': 'Top %',
             'valid_laps': 'Valid Laps',
             'Session': 'Session Type',
             'Date': 'Date'
@@ -3813,11 +4768,20 @@ class ACCWebDashboard:
 def main():
     """Funzione principale dell'applicazione"""
     try:
+        # Community richiesta (modalità multi-community con acc_tenants.json)
+        try:
+            tenant = resolve_tenant()
+        except TenantError as e:
+            st.error(f"❌ {e}")
+            st.stop()
+
         # Inizializza dashboard
-        dashboard = ACCWebDashboard()
+        dashboard = ACCWebDashboard(tenant)
+        dashboard.start_cache_warmup()
         
         # Sidebar per navigazione
         st.sidebar.title("🏁 Navigation")
+        dashboard.show_tenant_selector()
 
         # Info versione per admin (solo in locale)
         if not dashboard.is_github_deployment:
@@ -3865,6 +4829,7 @@ def main():
         elif page == "📈 Statistics":
             st.header("📈 Statistics")
             st.info("🚧 Section under development - will be implemented soon")
+            dashboard.show_cache_stats()
         
         # Footer
         st.sidebar.markdown("---")
@@ -0,0 +1,32 @@
+"""
+Test piani SQL - nessuna scansione completa nuova sulle tabelle grandi
+Esegue l'audit di bench_plans.py su acc_stats.db del repository e confronta le scansioni
+complete con quelle note in plan_baseline.json (rigenerabile con --save-baseline).
+
+Uso:
+    python -m pytest -q test_bench_plans.py
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import bench_plans
+
+ROOT = Path(__file__).resolve().parent
+DB_PATH = ROOT / 'acc_stats.db'
+BASELINE_PATH = ROOT / bench_plans.DEFAULT_BASELINE
+
+
+@pytest.mark.skipif(not DB_PATH.exists(), reason="acc_stats.db not available")
+def test_no_new_full_scans():
+    os.environ['ACC_CACHE_WARMUP'] = '0'
+    known = set(json.loads(BASELINE_PATH.read_text(encoding='utf-8'))['full_scans'])
+
+    report = bench_plans.audit(str(DB_PATH), False, [], bench_plans.LARGE_TABLES, 600)
+
+    assert not report.empty
+    new_scans = bench_plans.full_scans(report) - known
+    assert not new_scans, f"new full scans over large tables: {sorted(new_scans)}"